@@ -25,6 +25,9 @@ setuptools.setup(
     url='https://github.com/saintamh/tdds/',
     packages=setuptools.find_packages(),
     install_requires=[],
+    extras_require={
+        'numpy': ['numpy'],
+    },
     classifiers=[
         'License :: OSI Approved :: MIT License',
         'Operating System :: OS Independent',
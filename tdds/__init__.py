@@ -24,7 +24,31 @@ from .cleaner import \
     Cleaner
 
 from .collections import \
-    dict_of, pair_of, seq_of, set_of
+    array_of, dict_of, pair_of, pmap_of, pvec_of, seq_of, set_of
+
+from .instrumentation import \
+    InvocationStats, enable_instrumentation, disable_instrumentation, reset_stats, scoped_stats, stats
+
+from .indexing import \
+    RecordIndex
+
+from .interning import \
+    Interner
+
+from .querying import \
+    select
+
+from .memory import \
+    MemoryReport, MemoryUsage, format_memory_report, memory_report, sizeof
+
+from .sorting import \
+    record_sort
+
+from .diffing import \
+    diff, patch
+
+from .migrations import \
+    MissingMigration, register_migration, unregister_migration, temporary_migration_registration
 
 from .marshaller import \
     CannotMarshalType, Marshaller, \
@@ -36,7 +60,16 @@ from .utils.builder import \
 from .utils.codegen import \
     SourceCodeTemplate
 
+from .utils.immutablearray import \
+    ImmutableArray
+
 from .utils.immutabledict import \
     ImmutableDict
 
+from .utils.pmap import \
+    PersistentMap
+
+from .utils.pvector import \
+    PersistentVector
+
 #----------------------------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Decoding records from PODS without blocking an asyncio event loop, e.g.
+
+    album = await Album.from_pods_async(json.loads(body))
+    tracks = await tdds.aio.decode_many(Track, json.loads(body))
+    async for track in tdds.aio.iter_jsonl(Track, request.content):
+        ...
+
+By default decoding is cooperative: it runs on the event loop, but yields to it every `chunk_size' records, so that other tasks
+get to run while a large payload is being decoded. Records are counted at the level of the sequences being decoded: the elements
+of `seq_of' (and `pair_of', `set_of', `pvec_of') fields are decoded `chunk_size' at a time, recursing into the fields of records
+that hold such sequences and into sequences of sequences, while any other value is decoded in one go.
+
+Alternatively, if an `executor' is given, decoding is offloaded to it, and the event loop isn't busy at all.
+
+This module requires Python 3.6 or later, which is why it isn't imported by `tdds' itself.
+"""
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# includes
+
+# 2+3 compat
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+# standards
+import asyncio
+from functools import partial
+import json
+
+# this module
+from .migrations import migrate_pods
+from .pods import PodsMethodsTemplate
+from .record import Record
+from .utils.codegen import SourceCodeTemplate, compile_expr
+from .utils.immutablearray import ImmutableArray
+
+#----------------------------------------------------------------------------------------------------------------------------------
+
+DEFAULT_CHUNK_SIZE = 1000
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# public interface
+
+async def decode(cls, pods, chunk_size=DEFAULT_CHUNK_SIZE, executor=None, fields=None, fingerprint=None):
+    """
+    Returns the same as `cls.from_pods(pods, fields=fields, fingerprint=fingerprint)', without blocking the event loop for long.
+    `Record.from_pods_async' calls this. PODS with an older fingerprint are migrated first, as `from_pods' does. A projection given
+    in `fields' is decoded in one go, by `from_pods'.
+    """
+    kwargs = {'fields': fields, 'fingerprint': fingerprint}
+    kwargs = {key: value for key, value in kwargs.items() if value is not None}
+    if executor is not None:
+        return await asyncio.get_event_loop().run_in_executor(executor, partial(cls.from_pods, pods, **kwargs))
+    if fingerprint is not None:
+        pods = migrate_pods(cls, pods, fingerprint)
+    if fields is not None:
+        value = cls.from_pods(pods, fields=fields)
+        await asyncio.sleep(0)
+        return value
+    return await CooperativeDecoder(chunk_size).decode(cls, pods)
+
+async def decode_many(cls, iter_pods, chunk_size=DEFAULT_CHUNK_SIZE, executor=None):
+    """
+    Decodes each of the given PODS into an instance of `cls', and returns a list of them.
+    """
+    all_pods = list(iter_pods)
+    if executor is not None:
+        return await asyncio.get_event_loop().run_in_executor(executor, decode_list, cls, all_pods)
+    return await CooperativeDecoder(chunk_size).decode_in_chunks(lambda chunk: decode_list(cls, chunk), all_pods)
+
+async def iter_jsonl(cls, lines, chunk_size=DEFAULT_CHUNK_SIZE, executor=None):
+    """
+    Asynchronously iterates over the records encoded in the given async iterable of JSON lines (str or bytes), such as an aiohttp
+    `StreamReader'. Blank lines are skipped. Lines are parsed and decoded in batches of `chunk_size'.
+    """
+    batch = []
+    async for line in lines:
+        if line.strip():
+            batch.append(line)
+        if len(batch) >= chunk_size:
+            for record in await _decode_jsonl_batch(cls, batch, executor):
+                yield record
+            batch = []
+    if batch:
+        for record in await _decode_jsonl_batch(cls, batch, executor):
+            yield record
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# implementation
+
+class CooperativeDecoder(object):
+
+    def __init__(self, chunk_size):
+        if chunk_size < 1:
+            raise ValueError('chunk_size must be positive, not %r' % (chunk_size,))
+        self.chunk_size = chunk_size
+        self.num_decoded = 0
+
+    async def pause(self, num_decoded):
+        # Yields to the event loop if at least `chunk_size' records have been decoded since the last time we did
+        self.num_decoded += num_decoded
+        if self.num_decoded >= self.chunk_size:
+            self.num_decoded = 0
+            await asyncio.sleep(0)
+
+    async def decode(self, cls, pods):
+        if pods is None:
+            return None
+        if _is_sequence_class(cls) and isinstance(pods, list):
+            element_type = cls.element_field.type
+            if _is_sequence_class(element_type):
+                # e.g. a `pair_of(seq_of(...))', whose elements may each be large
+                return [await self.decode(element_type, elem) for elem in pods]
+            # the generated `from_pods' of sequences returns a list, so it can be applied to slices of the PODS
+            return await self.decode_in_chunks(cls.from_pods, pods)
+        if isinstance(cls, type) and issubclass(cls, Record) and isinstance(pods, dict):
+            return await self.decode_record(cls, pods)
+        value = cls.from_pods(pods)
+        await self.pause(1)
+        return value
+
+    async def decode_record(self, cls, pods):
+        values = {}
+        for field_id, field in cls.record_fields.items():
+            value = pods.get(field_id)
+            if value is not None and _decodes_cooperatively(field.type):
+                values[field_id] = await self.decode(field.type, value)
+            else:
+                values[field_id] = field_decoder(field)(value)
+        record = cls(**values)
+        await self.pause(1)
+        return record
+
+    async def decode_in_chunks(self, decode_chunk, all_pods):
+        values = []
+        for start in range(0, len(all_pods), self.chunk_size):
+            chunk = all_pods[start:start + self.chunk_size]
+            values.extend(decode_chunk(chunk))
+            await self.pause(len(chunk))
+        return values
+
+
+def decode_list(cls, all_pods):
+    return [cls.from_pods(pods) for pods in all_pods]
+
+def decode_jsonl_lines(cls, lines):
+    return [cls.from_pods(json.loads(line)) for line in lines]
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# Fields that aren't decoded cooperatively are decoded by a function compiled from the same code that the record's `from_pods'
+# uses for that field. These are cached on the field objects, which are immutable and shared by record subclasses.
+
+def field_decoder(field):
+    decoder = field.__dict__.get('_pods_decoder')
+    if decoder is None:
+        decoder = compile_expr(
+            SourceCodeTemplate(
+                '''
+                def decode_field(value):
+                    return $code
+                ''',
+                code=PodsMethodsTemplate.pods_to_value('value', field),
+            ),
+            'decode_field',
+        )
+        field.__dict__['_pods_decoder'] = decoder
+    return decoder
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# private utils
+
+async def _decode_jsonl_batch(cls, lines, executor):
+    if executor is not None:
+        return await asyncio.get_event_loop().run_in_executor(executor, decode_jsonl_lines, cls, lines)
+    records = decode_jsonl_lines(cls, lines)
+    await asyncio.sleep(0)
+    return records
+
+def _is_sequence_class(cls):
+    # i.e. collection classes created by `seq_of', `pair_of', `set_of' and `pvec_of'. Arrays are decoded in C anyway.
+    return getattr(cls, 'element_field', None) is not None and not issubclass(cls, ImmutableArray)
+
+def _decodes_cooperatively(cls):
+    return _is_sequence_class(cls) or (isinstance(cls, type) and issubclass(cls, Record))
+
+#----------------------------------------------------------------------------------------------------------------------------------
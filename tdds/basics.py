@@ -7,6 +7,18 @@
 # 2+3 compat
 from __future__ import absolute_import, division, print_function, unicode_literals
 
+# standards
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+# this module
+from .utils.compatibility import PY2, integer_types, string_types
+
+if PY2:
+    from repr import Repr  # pylint: disable=import-error
+else:
+    from reprlib import Repr
+
 #----------------------------------------------------------------------------------------------------------------------------------
 # core data structures
 
@@ -60,16 +72,74 @@ class RecordsAreImmutable(TypeError):
     pass
 
 class FieldError(ValueError):
-    pass
+    """
+    The errors raised by the generated constructors carry the details of the invalid value in the attributes below, and only format
+    their message when it's asked for, since rows that fail validation are often discarded without it ever being looked at. NB
+    this means that their `args' is (), so use `str(error)' rather than `error.args[0]' to get the message. They can also be
+    raised with a message, as with any other exception, in which case these attributes are None.
+    """
+
+    # The field, e.g. 'Album.title', or '[elem]' for the elements of a collection
+    description = None
+    # The invalid value, and for FieldTypeErrors, the type that was expected
+    value = None
+    expected_type = None
+    # Set by `Record.record_validate' to the path to the invalid value
+    path = ()
+
+    @classmethod
+    def for_value(cls, description, value, expected_type=None):
+        error = cls()
+        error.description = description
+        error.value = value
+        error.expected_type = expected_type
+        return error
+
+    def format_message(self):
+        return '%s: %s' % (self.description, bounded_repr(self.value))
+
+    def __str__(self):
+        if self.description is None:
+            return super(FieldError, self).__str__()
+        return self.format_message()
+
+    def __repr__(self):
+        if self.description is None:
+            return super(FieldError, self).__repr__()
+        return '%s(%r)' % (self.__class__.__name__, str(self))
 
 class FieldValueError(FieldError):
-    pass
+
+    def format_message(self):
+        return '%s: %s is not a valid value' % (self.description, bounded_repr(self.value))
 
 class FieldTypeError(FieldError):
-    pass
+
+    def format_message(self):
+        return '%s should be of type %s, not %s (%s)' % (
+            self.description,
+            self.expected_type.__name__,
+            self.value.__class__.__name__,
+            bounded_repr(self.value),
+        )
 
 class FieldNotNullable(FieldValueError):
-    pass
+
+    def format_message(self):
+        return '%s cannot be None' % (self.description,)
+
+
+def bounded_repr(value):
+    """
+    Like `repr', but values in error messages can be whole collections, which could take a long time to format, and would be of
+    little use once formatted. This shortens long strings, and collections beyond their first few elements, with '...'.
+    """
+    return ERROR_MESSAGE_REPR.repr(value)
+
+ERROR_MESSAGE_REPR = Repr()
+ERROR_MESSAGE_REPR.maxstring = ERROR_MESSAGE_REPR.maxother = ERROR_MESSAGE_REPR.maxlong = 200
+ERROR_MESSAGE_REPR.maxlist = ERROR_MESSAGE_REPR.maxtuple = ERROR_MESSAGE_REPR.maxset = ERROR_MESSAGE_REPR.maxfrozenset = 20
+ERROR_MESSAGE_REPR.maxdict = 10
 
 #----------------------------------------------------------------------------------------------------------------------------------
 # If a field has `RecursiveType' as its `type', then that gets translated to the record's own class. This allows the user to define
@@ -91,3 +161,25 @@ def compile_field(field, **kwargs):
         return Field(field)
 
 #----------------------------------------------------------------------------------------------------------------------------------
+# Records and collections are immutable, so `copy.copy' can always return them as they are. `copy.deepcopy' can too, but only if
+# the values of their fields can't be modified either, and nor can any of the values within them.
+
+# The types whose values can't be modified, and don't refer to any values that can. NB subclasses of these could add mutable state,
+# so only the exact types count.
+DEEP_IMMUTABLE_TYPES = frozenset(integer_types + string_types + (
+    bool,
+    float,
+    complex,
+    Decimal,
+    date,
+    datetime,
+    time,
+    timedelta,
+))
+
+def is_deep_immutable(value_type):
+    # Record and collection classes say so themselves, once compiled. Until a lazy record class is compiled we can't tell, and
+    # looking it up mustn't compile it, hence `__dict__' rather than `getattr'.
+    return value_type in DEEP_IMMUTABLE_TYPES or vars(value_type).get('record_deep_immutable', False)
+
+#----------------------------------------------------------------------------------------------------------------------------------
@@ -13,7 +13,9 @@ import re
 
 # this repo
 from .utils.compatibility import bytes_type, text_type
+from .utils.immutablearray import ImmutableArray
 from .utils.immutabledict import ImmutableDict
+from .utils.pvector import PersistentVector
 
 #----------------------------------------------------------------------------------------------------------------------------------
 
@@ -41,7 +43,7 @@ class Cleaner(object):
         )
         if clean_by_fname:
             cleaned = clean_by_fname(value)
-        elif issubclass(field.type, tuple) and hasattr(field.type, 'element_field'):
+        elif issubclass(field.type, (tuple, PersistentVector, ImmutableArray)) and hasattr(field.type, 'element_field'):
             cleaned = tuple(
                 self._clean_field(prefix + field_id + '_element', field.type.element_field, element)
                 for element in value
@@ -7,17 +7,27 @@
 # 2+3 compat
 from __future__ import absolute_import, division, print_function, unicode_literals
 
+# standards
+from array import array
+
 # tdds
-from .basics import Field, FieldValueError, compile_field
-from .pods import PodsMethodsForSeqTemplate, PodsMethodsForDictTemplate
-from .record import FieldHandlingStmtsTemplate
-from .unpickler import RecordRegistryMetaClass, RecordUnpickler
-from .utils.codegen import SourceCodeTemplate, compile_expr
+from .basics import Field, FieldValueError, RecursiveType, compile_field, is_deep_immutable
+from .instrumentation import instrument_class, instrumentation_enabled
+from .pods import PodsMethodsForArrayTemplate, PodsMethodsForSeqTemplate, PodsMethodsForDictTemplate
+from .record import FieldHandlingStmtsTemplate, Record
+from .unpickler import RecordRegistryMetaClass
+from .utils.codegen import ExternalValue, SourceCodeTemplate, compile_expr
+from .utils.immutablearray import ImmutableArray
 from .utils.immutabledict import ImmutableDict
+from .utils.pmap import PersistentMap
+from .utils.pvector import PersistentVector
+
+# The smallest magnitude that rounds to infinity as a 32-bit float, i.e. the largest finite one plus half of its last place
+FLOAT32_OVERFLOW = (2 - 2**-24) * 2**127
 
 #----------------------------------------------------------------------------------------------------------------------------------
-# Collection fields are instances of an appropriate subclass of tuple, frozenset, or ImmutableDict. This is the template used to
-# generate these subclasses
+# Collection fields are instances of an appropriate subclass of tuple, frozenset, PersistentVector, ImmutableArray, ImmutableDict
+# or PersistentMap. This is the template used to generate these subclasses
 
 class CollectionTypeCodeTemplate(SourceCodeTemplate):
 
@@ -38,15 +48,37 @@ class CollectionTypeCodeTemplate(SourceCodeTemplate):
             $core_methods
 
             def __reduce__(self):
-                return($RecordUnpickler("$class_name"), ($superclass(self),))
+                return (self._record_unpickler, ($reduce_arg,))
+
+            def __copy__(self):
+                return self
+
+            record_deep_immutable = $record_deep_immutable
+            $deepcopy_def
     '''
 
     RecordRegistryMetaClass = RecordRegistryMetaClass
-    RecordUnpickler = RecordUnpickler
 
     # by default, __repr__, __cmp__ and __hash__ are left to the superclass to implement, but subclasses may override this:
     core_methods = ''
 
+    # the value that gets pickled, and passed to the constructor when unpickling
+    reduce_arg = '$superclass(self)'
+
+    @property
+    def record_deep_immutable(self):
+        # NB unlike for records, elements of RecursiveType don't count, since they may be of a record class that isn't
+        return all(is_deep_immutable(field.type) for field in self.element_fields)
+
+    @property
+    def deepcopy_def(self):
+        if self.record_deep_immutable:
+            # else `copy.deepcopy' falls back to `__reduce__', and builds a new collection from deep copies of the elements
+            return '''
+                def __deepcopy__(self, memo):
+                    return self
+            '''
+
 #----------------------------------------------------------------------------------------------------------------------------------
 # Subclasses of the above template, one per type
 
@@ -59,22 +91,57 @@ class SequenceCollCodeTemplate(CollectionTypeCodeTemplate):
     def __init__(self, element_field):
         super(SequenceCollCodeTemplate, self).__init__()
         self.class_name = _ucfirst(element_field.type.__name__) + self.class_name_suffix
+        self.element_fields = (element_field,)
         self.pods_methods = PodsMethodsForSeqTemplate(element_field)
         self.elem_check_impl = FieldHandlingStmtsTemplate(
             element_field,
             'elem',
             description='[elem]',
+            stats_key=self.class_name + '[elem]',
         )
         self.class_fields = SourceCodeTemplate(
             'element_field = $element_field',
             element_field=element_field,
         )
 
-    check_elems_body = '''
-        for elem in iter_elems:
-            $elem_check_impl
-            yield elem
-    '''
+    @property
+    def check_elems_body(self):
+        if self.bulk_type_check_applies():
+            # The elements are all of the exact expected type in the common case, and then a single scan over their types, which
+            # runs in C, is all we need to do. If there are any other types we fall back to the full checks, which will either
+            # accept them (e.g. subclasses) or raise the appropriate exception.
+            return '''
+                if iter_elems.__class__ is not tuple and iter_elems.__class__ is not list:
+                    iter_elems = list(iter_elems)
+                if not set(map(type, iter_elems)) <= $exact_elem_types:
+                    for elem in iter_elems:
+                        $elem_check_impl
+                return iter_elems
+            '''
+        return '''
+            for elem in iter_elems:
+                $elem_check_impl
+                yield elem
+        '''
+
+    def bulk_type_check_applies(self):
+        # i.e. if the only thing that the statements in `elem_check_impl' do is check the type of the element, and maybe that it's
+        # not None. Not done when instrumented, so that the statements that time each element are still run.
+        field = self.element_fields[0]
+        return (
+            field.coerce is None
+            and field.check is None
+            and field.default is None
+            and field.type is not RecursiveType
+            and field.type is not float
+            and not issubclass(field.type, Record)
+            and not self.elem_check_impl.instrumented
+        )
+
+    @property
+    def exact_elem_types(self):
+        field = self.element_fields[0]
+        return ExternalValue(frozenset((field.type, type(None)) if field.nullable else (field.type,)))
 
 class PairCollCodeTemplate(SequenceCollCodeTemplate):
     FieldValueError = FieldValueError
@@ -91,6 +158,109 @@ class PairCollCodeTemplate(SequenceCollCodeTemplate):
             raise $FieldValueError("A pair must have two elements, not %d" % num_elems)        
     '''
 
+class PersistentVectorCollCodeTemplate(SequenceCollCodeTemplate):
+    # PersistentVector passes new elements through `check_elems' when deriving new vectors, so that only these get checked
+    superclass = PersistentVector
+    constructor = '__init__'
+    class_name_suffix = 'PVec'
+
+class ArrayCollCodeTemplate(SequenceCollCodeTemplate):
+    superclass = ImmutableArray
+    constructor = '__init__'
+    reduce_arg = 'self.to_array()'
+    array = array
+    FieldValueError = FieldValueError
+
+    CLASS_NAME_PREFIXES = {
+        'b': 'Int8',
+        'B': 'UInt8',
+        'h': 'Int16',
+        'H': 'UInt16',
+        'i': 'Int',
+        'I': 'UInt',
+        'l': 'Long',
+        'L': 'ULong',
+        'q': 'Int64',
+        'Q': 'UInt64',
+        'f': 'Float32',
+        'd': 'Float64',
+    }
+
+    def __init__(self, typecode):
+        if typecode not in self.CLASS_NAME_PREFIXES:
+            raise ValueError('Unsupported array typecode: %r' % (typecode,))
+        element_field = Field(float if typecode in 'fd' else int)
+        super(ArrayCollCodeTemplate, self).__init__(element_field)
+        self.typecode = typecode
+        self.class_name = self.CLASS_NAME_PREFIXES[typecode] + 'Array'
+        self.pods_methods = PodsMethodsForArrayTemplate()
+        self.elem_check_impl.stats_key = self.class_name + '[elem]'
+        self.class_fields = SourceCodeTemplate(
+            '''
+            element_field = $element_field
+            typecode = "$typecode"
+            ''',
+            element_field=element_field,
+            typecode=typecode,
+        )
+
+    # Returns a list or an array, which the ImmutableArray constructor then copies into its own array
+    check_elems_body = '''
+        if iter_elems.__class__ is $array and iter_elems.typecode == "$typecode":
+            return iter_elems
+        if iter_elems.__class__ is not tuple and iter_elems.__class__ is not list:
+            iter_elems = list(iter_elems)
+        if not set(map(type, iter_elems)) <= $exact_elem_types:
+            checked_elems = []
+            for elem in iter_elems:
+                $elem_check_impl
+                checked_elems.append(elem)
+            iter_elems = checked_elems
+        $range_check
+        return iter_elems
+    '''
+
+    @property
+    def exact_elem_types(self):
+        # ints are promoted to floats by the array itself
+        return ExternalValue(frozenset((float, int) if self.typecode in 'fd' else (int,)))
+
+    @property
+    def range_check(self):
+        if self.typecode not in 'fd':
+            num_bits = 8 * array(str(self.typecode)).itemsize
+            min_value, max_value = (0, 2**num_bits - 1) if self.typecode.isupper() else (-2**(num_bits-1), 2**(num_bits-1) - 1)
+            return '''
+                if iter_elems and (min(iter_elems) < {min_value!r} or max(iter_elems) > {max_value!r}):
+                    raise $FieldValueError("[elem]: %r is out of range for an array of typecode '$typecode'" % (
+                        next(elem for elem in iter_elems if not {min_value!r} <= elem <= {max_value!r}),
+                    ))
+            '''.format(min_value=min_value, max_value=max_value)
+        elif self.typecode == 'f':
+            # Finite values this large round to infinity as 32-bit floats, which the array would store without complaint. Infinities
+            # themselves are fine. Each element is checked, since `min' and `max' can skip over values that follow a NaN.
+            return '''
+                if any({limit!r} <= abs(elem) < $inf for elem in iter_elems):
+                    raise $FieldValueError("[elem]: %r is out of range for an array of typecode 'f'" % (
+                        next(elem for elem in iter_elems if {limit!r} <= abs(elem) < $inf),
+                    ))
+            '''.format(limit=FLOAT32_OVERFLOW)
+        else:
+            # Only ints can be too large for a double, and the array raises OverflowError for them, so the array is built here
+            return '''
+                try:
+                    return $array("d", iter_elems)
+                except OverflowError:
+                    for elem in iter_elems:
+                        try:
+                            float(elem)
+                        except OverflowError:
+                            raise $FieldValueError("[elem]: %r is out of range for an array of typecode 'd'" % (elem,))
+                    raise
+            '''
+
+    inf = ExternalValue(float('inf'))
+
 class SetCollCodeTemplate(SequenceCollCodeTemplate):
     superclass = frozenset
     class_name_suffix = 'Set'
@@ -102,15 +272,27 @@ class SetCollCodeTemplate(SequenceCollCodeTemplate):
 class DictCollCodeTemplate(CollectionTypeCodeTemplate):
     superclass = ImmutableDict
     constructor = '__init__'
+    class_name_format = '{}To{}Dict'
 
     def __init__(self, key_field, value_field):
         super(DictCollCodeTemplate, self).__init__()
-        self.class_name = '{}To{}Dict'.format(
+        self.class_name = self.class_name_format.format(
             _ucfirst(key_field.type.__name__),
             _ucfirst(value_field.type.__name__),
         )
-        self.key_handling_stmts = FieldHandlingStmtsTemplate(key_field, 'key', description='<key>')
-        self.val_handling_stmts = FieldHandlingStmtsTemplate(value_field, 'value', description='<value>')
+        self.element_fields = (key_field, value_field)
+        self.key_handling_stmts = FieldHandlingStmtsTemplate(
+            key_field,
+            'key',
+            description='<key>',
+            stats_key=self.class_name + '<key>',
+        )
+        self.val_handling_stmts = FieldHandlingStmtsTemplate(
+            value_field,
+            'value',
+            description='<value>',
+            stats_key=self.class_name + '<value>',
+        )
         self.pods_methods = PodsMethodsForDictTemplate(key_field, value_field)
         self.class_fields = SourceCodeTemplate(
             '''
@@ -128,14 +310,70 @@ class DictCollCodeTemplate(CollectionTypeCodeTemplate):
             yield key, value
     '''
 
+class PersistentMapCollCodeTemplate(DictCollCodeTemplate):
+    # PersistentMap passes the new entry through `check_elems' when deriving a new map, so that only it gets checked
+    superclass = PersistentMap
+    class_name_format = '{}To{}PMap'
+
 #----------------------------------------------------------------------------------------------------------------------------------
 
+# Compiled collection classes are shared between all fields whose elements are declared identically, so that e.g. all `seq_of(int)'
+# fields use the same IntSeq class, and it only needs compiling once. They're keyed on the template class and on every attribute
+# of the element fields that goes into the generated code.
+
+COLLECTION_CLASSES = {}
+
+def collection_class_key(templ):
+    if any(field.type is RecursiveType for field in templ.element_fields):
+        # `set_recursive_type' will imperatively modify these fields once the record class is compiled, so no sharing
+        return None
+    # NB the class name is part of the key because e.g. arrays of different typecodes have identical element fields
+    key = (templ.__class__, templ.class_name, instrumentation_enabled()) + tuple(
+        (field.type, field.nullable, field.default, field.coerce, field.check)
+        for field in templ.element_fields
+    )
+    try:
+        hash(key)
+    except TypeError:
+        # e.g. a list as a default value
+        return None
+    return key
+
+def collection_class_cache(templ):
+    # Collections of records (or of other collections) are cached on their element class rather than in the global dict, so that
+    # the cache doesn't keep record classes that are created on the fly from being garbage-collected
+    for field in templ.element_fields:
+        if isinstance(field.type, RecordRegistryMetaClass):
+            cache = field.type.__dict__.get('_record_collection_classes')
+            if cache is None:
+                cache = {}
+                type.__setattr__(field.type, '_record_collection_classes', cache)
+            return cache
+    return COLLECTION_CLASSES
+
+def compile_collection_class(templ, verbose=False):
+    key = None if verbose else collection_class_key(templ)
+    cache = collection_class_cache(templ) if key is not None else None
+    compiled = cache.get(key) if key is not None else None
+    if compiled is None:
+        collection = compile_expr(templ, templ.class_name, verbose=verbose)
+        if instrumentation_enabled():
+            instrument_class(collection)
+        # Collections are immutable, so if we're given an instance of the right class its elements have already been checked
+        coerce = lambda elems: elems if elems.__class__ is collection or elems is None else collection(elems)
+        compiled = (collection, coerce)
+        if key is not None:
+            cache[key] = compiled
+    return compiled
+
 def compile_collection_field(templ, **kwargs):
     verbose = kwargs.pop('__verbose', False)
-    collection = compile_expr(templ, templ.class_name, verbose=verbose)
+    collection, default_coerce = compile_collection_class(templ, verbose=verbose)
     user_supplied_coerce = kwargs.pop('coerce', None)
     if user_supplied_coerce is None:
-        kwargs['coerce'] = lambda elems: collection(elems) if elems is not None else None
+        # NB using the same coerce function for all fields of the same collection class means that collections of collections can
+        # also be shared
+        kwargs['coerce'] = default_coerce
     else:
         kwargs['coerce'] = lambda elems: collection(user_supplied_coerce(elems))
     return Field(collection, **kwargs)
@@ -159,6 +397,20 @@ def pair_of(element_field, **kwargs):
         **kwargs
     )
 
+def pvec_of(element_field, **kwargs):
+    element_field = compile_field(element_field)
+    return compile_collection_field(
+        PersistentVectorCollCodeTemplate(element_field),
+        subfields=[element_field],
+        **kwargs
+    )
+
+def array_of(typecode, **kwargs):
+    return compile_collection_field(
+        ArrayCollCodeTemplate(typecode),
+        **kwargs
+    )
+
 def set_of(element_field, **kwargs):
     element_field = compile_field(element_field)
     return compile_collection_field(
@@ -176,6 +428,15 @@ def dict_of(key_field, value_field, **kwargs):
         **kwargs
     )
 
+def pmap_of(key_field, value_field, **kwargs):
+    key_field = compile_field(key_field)
+    value_field = compile_field(value_field)
+    return compile_collection_field(
+        PersistentMapCollCodeTemplate(key_field, value_field),
+        subfields=[key_field, value_field],
+        **kwargs
+    )
+
 #----------------------------------------------------------------------------------------------------------------------------------
 # private utils
 
@@ -0,0 +1,249 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Computing the differences between two versions of a record, and applying them, e.g. to replicate a record's state without sending
+the whole of it every time:
+
+    delta = diff(old_album, new_album)  # send this
+    new_album = patch(old_album, delta)  # on the receiving end, which has `old_album' too
+
+`diff' returns None if the values are equal. Otherwise it returns a patch, which is a tuple whose first element says how to apply
+the rest:
+
+    ('=', value)                        the value is replaced altogether
+    ('r', {field_id: patch})            the given fields of a record are patched
+    ('s', (edit, ...))                  the elements of a sequence are edited, where each edit is either an (index, patch) tuple,
+                                        or a (start, stop, values) tuple that replaces the old elements from `start' to `stop'
+    ('d', {key: patch}, removed_keys)   the values under the given keys of a dict are patched (or added), and other keys removed
+    ('S', added, removed)               elements are added to and removed from a set
+
+Patches only hold standard Python types and field values, so they can be pickled. Indices and keys always refer to the old value.
+
+Values that are shared between the old and new versions, as is the case for fields that `record_derive' didn't change, aren't
+compared at all. `patch' derives new records from the old ones, so it too leaves such values shared.
+"""
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# includes
+
+# 2+3 compat
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+# standards
+from difflib import SequenceMatcher
+
+# this module
+from .basics import RecursiveType
+from .record import Record
+from .unpickler import RecordRegistryMetaClass
+from .utils.codegen import ExternalValue, Joiner, SourceCodeTemplate, compile_expr
+from .utils.immutablearray import ImmutableArray
+from .utils.immutabledict import ImmutableDict
+from .utils.pmap import PersistentMap
+from .utils.pvector import PersistentVector
+
+#----------------------------------------------------------------------------------------------------------------------------------
+
+REPLACE = '='
+RECORD = 'r'
+SEQUENCE = 's'
+DICT = 'd'
+SET = 'S'
+
+SEQUENCE_TYPES = (tuple, PersistentVector, ImmutableArray)
+DICT_TYPES = (ImmutableDict, PersistentMap)
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# public interface
+
+def diff(old, new):
+    """
+    Returns a patch that turns `old' into `new', or None if they're equal.
+    """
+    if old is new:
+        return None
+    cls = old.__class__
+    if new.__class__ is not cls:
+        return (REPLACE, new)
+    if isinstance(old, Record):
+        return record_differ(cls)(old, new)
+    if isinstance(old, SEQUENCE_TYPES):
+        return diff_sequences(old, new)
+    if isinstance(old, DICT_TYPES):
+        return diff_dicts(old, new)
+    if isinstance(old, frozenset):
+        added, removed = tuple(new - old), tuple(old - new)
+        return (SET, added, removed) if added or removed else None
+    return (REPLACE, new) if old != new else None
+
+def patch(old, delta):
+    """
+    Applies a patch returned by `diff(old, new)', and returns the new value.
+    """
+    if delta is None:
+        return old
+    kind = delta[0]
+    if kind == REPLACE:
+        return delta[1]
+    if kind == RECORD:
+        return old.record_derive(**{
+            field_id: patch(getattr(old, field_id), field_delta)
+            for field_id, field_delta in delta[1].items()
+        })
+    if kind == SEQUENCE:
+        return patch_sequence(old, delta[1])
+    if kind == DICT:
+        return patch_dict(old, delta[1], delta[2])
+    if kind == SET:
+        return old.__class__(old.difference(delta[2]).union(delta[1]))
+    raise ValueError('Unknown patch type: %r' % (kind,))
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# records
+
+def record_differ(cls):
+    """
+    Returns a function that diffs two instances of the given record class. Fields are compared in unrolled code, which is compiled
+    once per class, and cached on it.
+    """
+    differ = cls.__dict__.get('_record_differ')
+    if differ is None:
+        differ = compile_expr(RecordDifferTemplate(cls.record_fields), 'diff_record')
+        type.__setattr__(cls, '_record_differ', differ)
+    return differ
+
+
+class RecordDifferTemplate(SourceCodeTemplate):
+
+    template = '''
+        def diff_record(old, new):
+            changes = {}
+            $field_diffs
+            return ($RECORD, changes) if changes else None
+    '''
+
+    RECORD = ExternalValue(RECORD)
+
+    def __init__(self, fields):
+        super(RecordDifferTemplate, self).__init__()
+        self.fields = fields
+
+    @property
+    def field_diffs(self):
+        return Joiner('\n', values=(
+            SourceCodeTemplate(
+                '''
+                if old.$field_id is not new.$field_id:
+                    change = $diff(old.$field_id, new.$field_id)
+                    if change is not None:
+                        changes[$key] = change
+                '''
+                if self.is_diffed(field)
+                else '''
+                if old.$field_id is not new.$field_id and old.$field_id != new.$field_id:
+                    changes[$key] = ($REPLACE, new.$field_id)
+                ''',
+                field_id=field_id,
+                key=repr(field_id),
+                diff=diff,
+                REPLACE=ExternalValue(REPLACE),
+            )
+            for field_id, field in sorted(self.fields.items())
+        ))
+
+    @staticmethod
+    def is_diffed(field):
+        # Values of other types are replaced as a whole when they change
+        return field.type is RecursiveType or isinstance(field.type, RecordRegistryMetaClass)
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# collections
+
+def diff_sequences(old, new):
+    # Common prefixes and suffixes, which are what usually makes up most of the sequence, are skipped without hashing anything
+    start = 0
+    stop = min(len(old), len(new))
+    while start < stop and _same(old[start], new[start]):
+        start += 1
+    old_stop, new_stop = len(old), len(new)
+    while old_stop > start and new_stop > start and _same(old[old_stop - 1], new[new_stop - 1]):
+        old_stop -= 1
+        new_stop -= 1
+    edits = []
+    matcher = SequenceMatcher(None, old[start:old_stop], new[start:new_stop], autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            continue
+        if tag == 'replace' and i2 - i1 == j2 - j1:
+            # elements changed in place are patched, so that only the parts of them that changed are in the patch
+            edits.extend(
+                (start + i, diff(old[start + i], new[start + j]))
+                for i, j in zip(range(i1, i2), range(j1, j2))
+            )
+        else:
+            edits.append((start + i1, start + i2, tuple(new[start + j1:start + j2])))
+    return (SEQUENCE, tuple(edits)) if edits else None
+
+def patch_sequence(old, edits):
+    if isinstance(old, PersistentVector) and all(len(edit) == 2 for edit in edits):
+        # vectors share all but the patched elements
+        for index, delta in edits:
+            old = old.set(index, patch(old[index], delta))
+        return old
+    values = []
+    position = 0
+    for edit in edits:
+        if len(edit) == 2:
+            index, delta = edit
+            values.extend(old[position:index])
+            values.append(patch(old[index], delta))
+            position = index + 1
+        else:
+            start, stop, new_values = edit
+            values.extend(old[position:start])
+            values.extend(new_values)
+            position = stop
+    values.extend(old[position:])
+    return old.__class__(values)
+
+def diff_dicts(old, new):
+    changes = {}
+    for key, new_value in new.items():
+        if key not in old:
+            changes[key] = (REPLACE, new_value)
+        elif old[key] is not new_value:
+            change = diff(old[key], new_value)
+            if change is not None:
+                changes[key] = change
+    removed_keys = tuple(key for key in old if key not in new)
+    return (DICT, changes, removed_keys) if changes or removed_keys else None
+
+def patch_dict(old, changes, removed_keys):
+    if isinstance(old, PersistentMap):
+        # maps share all but the patched entries
+        for key in removed_keys:
+            old = old.delete(key)
+        for key, delta in changes.items():
+            old = old.set(key, patch(old.get(key), delta))
+        return old
+    values = dict(old.items())
+    for key in removed_keys:
+        del values[key]
+    for key, delta in changes.items():
+        values[key] = patch(values.get(key), delta)
+    return old.__class__(values)
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# private utils
+
+def _same(old, new):
+    return old is new or (not _hashes_differ(old, new) and old == new)
+
+def _hashes_differ(old, new):
+    # Only for values that cache their hash, since computing it would cost as much as comparing them
+    old_hash = getattr(old, '_hash', None)
+    new_hash = getattr(new, '_hash', None)
+    return old_hash is not None and new_hash is not None and old_hash != new_hash
+
+#----------------------------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,234 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+In-memory indexes over collections of records, for finding records by the values of their fields without scanning them all, e.g.
+
+    index = RecordIndex(Album, albums, on=('artist', 'year'))
+    index.find(artist='Nick Drake')
+    index.find(artist='Nick Drake', year=1972)
+    index.find_range('year', 1970, 1980)  # 1970 <= year < 1980, in order of year
+    index.add(new_album)
+
+Every field in `on' gets a hash index, used by `find'. Fields whose values are orderable scalars (numbers, strings, dates, etc)
+also get a sorted index, used by `find_range'.
+
+Since records are immutable, the values of their fields can't change once they're indexed, and so the indexes can't go stale.
+"""
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# includes
+
+# 2+3 compat
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+# standards
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from datetime import date, time, timedelta
+from decimal import Decimal
+from itertools import chain
+from operator import attrgetter, itemgetter
+
+# this module
+from .utils.compatibility import PY2, integer_types, string_types
+
+#----------------------------------------------------------------------------------------------------------------------------------
+
+# Scalar types whose values have a total order. NB this excludes sets, whose `<' means "is a subset of", and tuples and records,
+# which can't be compared on Python 3 as soon as they differ in a field that's None in one of them
+ORDERABLE_TYPES = integer_types + string_types + (float, Decimal, bytes, date, time, timedelta)
+
+EMPTY_BUCKET = {}
+
+# Records are kept in dicts keyed by their IDs, which must keep them in the order they were added
+if PY2:
+    ordered_dict = OrderedDict  # pylint: disable=invalid-name
+else:
+    ordered_dict = dict  # pylint: disable=invalid-name
+
+#----------------------------------------------------------------------------------------------------------------------------------
+
+class RecordIndex(object):
+    """
+    A multiset of records of a given class, indexed on some of their fields. Adding an equal record twice stores it twice.
+    """
+
+    def __init__(self, record_class, records=(), on=()):
+        self.record_class = record_class
+        self.hash_indexes = {}
+        self.sorted_indexes = {}
+        for field_id in on:
+            field = record_class.record_fields.get(field_id)
+            if field is None:
+                raise ValueError('%s has no field %r' % (record_class.__name__, field_id))
+            self.hash_indexes[field_id] = HashIndex(field_id)
+            if isinstance(field.type, type) and issubclass(field.type, ORDERABLE_TYPES):
+                self.sorted_indexes[field_id] = SortedIndex(field_id)
+        # Each record added is given an ID, and the indexes only hold IDs. IDs are allocated in increasing order, so sorting by ID
+        # sorts in the order records were added. This way records only need hashing once, when they're added or removed, and
+        # comparing IDs is much cheaper than comparing records.
+        self.records_by_id = ordered_dict()
+        self.ids_by_record = {}
+        self.next_id = 0
+        self.update(records)
+
+    def add(self, record):
+        self.update((record,))
+
+    def update(self, records):
+        entries = []
+        for record in records:
+            if not isinstance(record, self.record_class):
+                raise TypeError('Expected %s, not %s' % (self.record_class.__name__, record.__class__.__name__))
+            record_id = self.next_id
+            self.next_id += 1
+            self.records_by_id[record_id] = record
+            self.ids_by_record.setdefault(record, []).append(record_id)
+            entries.append((record_id, record))
+        for index in self._all_indexes():
+            index.update(entries)
+
+    def remove(self, record):
+        """
+        Removes one occurrence of the given record, the one added last. Raises KeyError if it isn't in the index.
+        """
+        record_ids = self.ids_by_record[record]
+        record_id = record_ids.pop()
+        if not record_ids:
+            del self.ids_by_record[record]
+        record = self.records_by_id.pop(record_id)
+        for index in self._all_indexes():
+            index.remove(record_id, record)
+
+    def find(self, **criteria):
+        """
+        Returns a list of the records whose fields have the given values, in the order they were added. Fields that aren't indexed
+        can be given too, in which case the records found by the indexed fields are filtered on them.
+        """
+        for field_id in criteria:
+            if field_id not in self.record_class.record_fields:
+                raise ValueError('%s has no field %r' % (self.record_class.__name__, field_id))
+        buckets = sorted(
+            (
+                self.hash_indexes[field_id].bucket(criteria.pop(field_id))
+                for field_id in list(criteria)
+                if field_id in self.hash_indexes
+            ),
+            key=len,
+        )
+        records_by_id = self.records_by_id
+        if buckets:
+            # start from the smallest bucket, and look up its IDs in the others
+            smallest = buckets.pop(0)
+            candidates = [records_by_id[record_id] for record_id in smallest if all(record_id in bucket for bucket in buckets)]
+        else:
+            candidates = list(self)
+        for field_id, value in criteria.items():
+            getter = attrgetter(field_id)
+            candidates = [record for record in candidates if getter(record) == value]
+        return candidates
+
+    def find_range(self, field_id, start=None, stop=None, include_stop=False):
+        """
+        Returns a list of the records whose given field has a value between `start' (inclusive) and `stop' (exclusive, unless
+        `include_stop' is set), sorted by that value. If either bound is None, the range is open on that side. Records whose value
+        is None are never returned.
+        """
+        index = self.sorted_indexes.get(field_id)
+        if index is None:
+            raise ValueError('%r has no sorted index' % (field_id,))
+        records_by_id = self.records_by_id
+        return [records_by_id[record_id] for record_id in index.find_range(start, stop, include_stop)]
+
+    def __len__(self):
+        return len(self.records_by_id)
+
+    def __iter__(self):
+        return iter(list(self.records_by_id.values()))
+
+    def __contains__(self, record):
+        return record in self.ids_by_record
+
+    def _all_indexes(self):
+        return tuple(self.hash_indexes.values()) + tuple(self.sorted_indexes.values())
+
+#----------------------------------------------------------------------------------------------------------------------------------
+
+class HashIndex(object):
+    # Maps field values to ordered dicts whose keys are the IDs of the records that have that value. Dicts rather than sets, so that
+    # IDs stay in the order they were added.
+
+    def __init__(self, field_id):
+        self.field_id = field_id
+        self.getter = attrgetter(field_id)
+        self.buckets = {}
+
+    def update(self, entries):
+        getter = self.getter
+        buckets = self.buckets
+        for record_id, record in entries:
+            value = getter(record)
+            bucket = buckets.get(value)
+            if bucket is None:
+                bucket = buckets[value] = ordered_dict()
+            bucket[record_id] = None
+
+    def remove(self, record_id, record):
+        value = self.getter(record)
+        bucket = self.buckets[value]
+        del bucket[record_id]
+        if not bucket:
+            del self.buckets[value]
+
+    def bucket(self, value):
+        return self.buckets.get(value, EMPTY_BUCKET)
+
+
+class SortedIndex(object):
+    # Two parallel lists, of the non-null values of the field, and of the IDs of the records that hold them, sorted by value and
+    # then by ID. Since IDs are unique, every entry has a single position, which can be found by bisecting.
+
+    def __init__(self, field_id):
+        self.field_id = field_id
+        self.getter = attrgetter(field_id)
+        self.values = []
+        self.ids = []
+
+    def update(self, entries):
+        getter = self.getter
+        if len(entries) < len(self.values) // 8:
+            for record_id, record in entries:
+                value = getter(record)
+                if value is not None:
+                    # the new ID is greater than all others, so it goes after all equal values
+                    position = bisect_right(self.values, value)
+                    self.values.insert(position, value)
+                    self.ids.insert(position, record_id)
+        else:
+            # cheaper to sort everything again. The sort is stable, and new IDs are greater than all others, so equal values stay
+            # sorted by ID.
+            new_entries = ((getter(record), record_id) for record_id, record in entries)
+            sorted_entries = sorted(
+                chain(zip(self.values, self.ids), (entry for entry in new_entries if entry[0] is not None)),
+                key=itemgetter(0),
+            )
+            self.values = [value for value, _ in sorted_entries]
+            self.ids = [record_id for _, record_id in sorted_entries]
+
+    def remove(self, record_id, record):
+        value = self.getter(record)
+        if value is not None:
+            start = bisect_left(self.values, value)
+            position = bisect_left(self.ids, record_id, start, bisect_right(self.values, value, start))
+            del self.values[position]
+            del self.ids[position]
+
+    def find_range(self, start, stop, include_stop):
+        return self.ids[
+            0 if start is None else bisect_left(self.values, start)
+            :
+            len(self.values) if stop is None else (bisect_right if include_stop else bisect_left)(self.values, stop)
+        ]
+
+#----------------------------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Opt-in instrumentation of the generated code, for finding out which record types and which field checks dominate CPU time.
+
+Instrumentation is decided when a class is compiled: classes compiled while it's enabled count invocations of, and accumulate time
+spent in, their constructor, `record_pods', `from_pods' and (for collections) `check_elems', as well as the statements that handle
+each of their fields (checks, coercion, etc). Classes compiled while it's disabled (which is the default) contain no instrumentation
+code at all, and so pay nothing for it.
+"""
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# includes
+
+# 2+3 compat
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+# standards
+from collections import namedtuple
+from contextlib import contextmanager
+from functools import wraps
+from os import environ
+from timeit import default_timer
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# global state
+
+INSTRUMENTATION = {
+    'enabled': bool(environ.get('TDDS_INSTRUMENTATION')),
+}
+
+# [invocation count, total seconds] lists, indexed by strings like 'Album.__init__' or 'Album.tracks'
+ALL_STATS = {}
+
+InvocationStats = namedtuple('InvocationStats', ('calls', 'seconds'))
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# public interface
+
+def enable_instrumentation():
+    """
+    Instruments all classes compiled from now on. You can also set the TDDS_INSTRUMENTATION environment variable.
+    """
+    INSTRUMENTATION['enabled'] = True
+
+def disable_instrumentation():
+    INSTRUMENTATION['enabled'] = False
+
+def instrumentation_enabled():
+    return INSTRUMENTATION['enabled']
+
+def stats():
+    """
+    Returns a dict that maps strings like 'Album.__init__' or 'Album.tracks' to InvocationStats tuples
+    """
+    return {
+        key: InvocationStats(*entry)
+        for key, entry in ALL_STATS.items()
+    }
+
+def reset_stats():
+    ALL_STATS.clear()
+
+@contextmanager
+def scoped_stats():
+    """
+    Yields a dict which, when the block exits, gets filled with the stats for the invocations that took place within the block.
+    """
+    before = stats()
+    scoped = {}
+    try:
+        yield scoped
+    finally:
+        for key, after in stats().items():
+            calls, seconds = before.get(key, (0, 0.0))
+            if after.calls > calls:
+                scoped[key] = InvocationStats(after.calls - calls, after.seconds - seconds)
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# used by the generated code
+
+def record_timing(key, start_time):
+    elapsed = default_timer() - start_time
+    entry = ALL_STATS.get(key)
+    if entry is None:
+        entry = ALL_STATS[key] = [0, 0.0]
+    entry[0] += 1
+    entry[1] += elapsed
+
+def timed(key, func):
+    @wraps(func)
+    def timed_func(*args, **kwargs):
+        start_time = default_timer()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            record_timing(key, start_time)
+    return timed_func
+
+def timed_check_elems(key, check_elems):
+    # `check_elems' is lazy, but the constructors consume it whole anyway
+    @wraps(check_elems)
+    def timed_func(iter_elems):
+        start_time = default_timer()
+        try:
+            return tuple(check_elems(iter_elems))
+        finally:
+            record_timing(key, start_time)
+    return timed_func
+
+def instrument_class(cls):
+    """
+    Wraps the given class's generated methods in timers. Only called on classes compiled with instrumentation enabled.
+    """
+    for name, value in tuple(vars(cls).items()):
+        key = '{}.{}'.format(cls.__name__, name)
+        if name in ('__init__', 'record_pods'):
+            setattr(cls, name, timed(key, value))
+        elif name == '__new__':
+            setattr(cls, name, staticmethod(timed(key, value.__func__)))
+        elif name == 'from_pods':
+            setattr(cls, name, classmethod(timed(key, value.__func__)))
+        elif name == 'check_elems':
+            setattr(cls, name, staticmethod(timed_check_elems(key, value.__func__)))
+
+#----------------------------------------------------------------------------------------------------------------------------------
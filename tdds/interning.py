@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Interning (aka hash-consing) of record instances. Since records are immutable, two equal instances of the same class can be
+replaced by one shared, canonical instance, which saves memory when the same values appear over and over again, and makes
+comparing two interned instances an identity check.
+
+A record class is interned by setting `__intern = True' in its body, in which case it gets its own weak-valued Interner, or by
+setting `__intern' to an Interner object, which can then be shared between classes:
+
+    catalog_interner = Interner(max_size=100000)
+
+    class Artist(Record):
+        __intern = catalog_interner
+        name = text_type
+
+Interners can also be used directly, by calling `interner.intern(record)'.
+
+Some values are equal without being interchangeable, e.g. True == 1 and -0.0 == 0.0, so the fields of a canonical instance must
+also have values of the same types, and floats of the same sign. NB this only applies to the values of the record's own fields: the
+values within its collections and nested records are only compared for equality, so e.g. `seq_of(float)' fields holding (-0.0,)
+and (0.0,) get the same canonical instance.
+"""
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# includes
+
+# 2+3 compat
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+# standards
+from collections import OrderedDict
+from math import copysign
+from operator import attrgetter
+from threading import Lock
+from weakref import WeakValueDictionary
+
+#----------------------------------------------------------------------------------------------------------------------------------
+
+class Interner(object):
+    """
+    Maps records to a canonical instance with the same class and the same field values.
+
+    By default, canonical instances are held on to via weak references, so they're evicted once nothing else refers to them. If
+    `max_size' is given, they are instead held on to via strong references, and the least recently used ones are evicted once
+    there are more than `max_size' of them.
+    """
+
+    def __init__(self, max_size=None):
+        self.max_size = max_size
+        self.lock = Lock()
+        if max_size is None:
+            self.canonical = WeakValueDictionary()
+        else:
+            self.canonical = OrderedDict()
+
+    def intern(self, record):
+        key = (record.__class__, interning_key(field_values(record)))
+        with self.lock:
+            canonical = self.canonical.get(key)
+            if canonical is None:
+                canonical = self.canonical[key] = record
+                if self.max_size is not None and len(self.canonical) > self.max_size:
+                    self.canonical.popitem(last=False)
+            elif self.max_size is not None:
+                # Move it to the end, i.e. make it the most recently used. OrderedDict.move_to_end isn't available in PY2.
+                del self.canonical[key]
+                self.canonical[key] = canonical
+        return canonical
+
+    def clear(self):
+        with self.lock:
+            self.canonical.clear()
+
+    def __len__(self):
+        return len(self.canonical)
+
+    def __repr__(self):
+        return 'Interner(max_size=%r)' % (self.max_size,)
+
+
+def field_values(record):
+    # The values of all the record's fields. NB not its `__key__', since a class's own `__key__' may leave some fields out, and
+    # records that differ in these must not be interned to the same instance.
+    cls = record.__class__
+    getter = cls.__dict__.get('_record_field_values')
+    if getter is None:
+        field_ids = sorted(cls.record_fields)
+        if len(field_ids) == 1:
+            single = attrgetter(field_ids[0])
+            getter = lambda record: (single(record),)
+        else:
+            getter = attrgetter(*field_ids) if field_ids else lambda record: ()
+        type.__setattr__(cls, '_record_field_values', getter)
+    return getter(record)
+
+def interning_key(values):
+    return tuple(
+        (value.__class__, value, copysign(1.0, value)) if value.__class__ is float else (value.__class__, value)
+        for value in values
+    )
+
+#----------------------------------------------------------------------------------------------------------------------------------
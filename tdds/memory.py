@@ -0,0 +1,216 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Measures how much memory a graph of records takes up. Unlike `sys.getsizeof', this follows record fields into the objects they
+refer to, and knows what's inside tdds collections (including the tries behind `pvec_of' and `pmap_of' fields, the array behind
+`array_of' fields, and the dict inside an `ImmutableDict').
+
+Objects that are referenced more than once are only counted once, and that includes the trie nodes that different versions of a
+`pvec_of' or `pmap_of' collection share. All sizes are in bytes.
+"""
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# includes
+
+# 2+3 compat
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+# standards
+from collections import namedtuple
+import sys
+
+# this module
+from .record import Record
+from .utils.immutablearray import ImmutableArray
+from .utils.immutabledict import ImmutableDict
+from .utils.pmap import BitmapNode, PersistentMap
+from .utils.pvector import BITS, PersistentVector
+
+#----------------------------------------------------------------------------------------------------------------------------------
+
+MemoryUsage = namedtuple('MemoryUsage', ('count', 'bytes'))
+
+MemoryReport = namedtuple('MemoryReport', (
+    # size of everything reachable from the roots
+    'total_bytes',
+    # maps class names to MemoryUsage tuples. The bytes of a collection include those of its internal structures, but not those
+    # of its elements
+    'by_class',
+    # maps strings like 'Album.tracks' to the bytes of all objects that were reached through that field, excluding those reached
+    # through the fields of nested records, which get their own entries
+    'by_field',
+    # maps record class names to the bytes that would be freed if every record that is equal to, but not the same object as,
+    # another record in the graph were replaced by that other record, as interning does (see `tdds.Interner'). NB the savings for
+    # a record class include those for any duplicate records nested within its duplicates, so they can't be added up
+    'interning_savings',
+))
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# public interface
+
+def sizeof(obj, deep=True):
+    """
+    Returns the size of the given object. If `deep' is true, this includes all objects reachable from it, otherwise it only includes
+    the object itself and, for collections, their internal structures.
+    """
+    if not deep:
+        return own_size(obj)
+    walker = MemoryWalker()
+    walker.walk(obj)
+    return walker.total_bytes
+
+def memory_report(roots):
+    """
+    Walks all objects reachable from the given iterable of root objects, and returns a MemoryReport.
+    """
+    walker = MemoryWalker()
+    for root in roots:
+        walker.walk(root)
+    return MemoryReport(
+        walker.total_bytes,
+        {name: MemoryUsage(*usage) for name, usage in walker.by_class.items()},
+        walker.by_field,
+        walker.interning_savings,
+    )
+
+def format_memory_report(report, limit=None):
+    lines = ['{:>12} {:>10}  {}'.format('bytes', 'count', 'class')]
+    for name, usage in sorted(report.by_class.items(), key=lambda item: -item[1].bytes)[:limit]:
+        lines.append('{:>12} {:>10}  {}'.format(usage.bytes, usage.count, name))
+    lines.extend(['', '{:>12}  {}'.format('bytes', 'field')])
+    for field_key, num_bytes in sorted(report.by_field.items(), key=lambda item: -item[1])[:limit]:
+        lines.append('{:>12}  {}'.format(num_bytes, field_key))
+    if report.interning_savings:
+        lines.extend(['', '{:>12}  {}'.format('bytes', 'could be saved by interning')])
+        for name, num_bytes in sorted(report.interning_savings.items(), key=lambda item: -item[1])[:limit]:
+            lines.append('{:>12}  {}'.format(num_bytes, name))
+    lines.extend(['', '{:d} bytes in total'.format(report.total_bytes)])
+    return '\n'.join(lines)
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# implementation
+
+class MemoryWalker(object):
+
+    def __init__(self):
+        self.seen_ids = set()
+        self.total_bytes = 0
+        self.by_class = {}
+        self.by_field = {}
+        self.interning_savings = {}
+        # maps (record class, record key) to the first record with that class and key
+        self.canonical_records = {}
+
+    def walk(self, root):
+        # We walk depth-first with an explicit stack, so that long chains of records don't hit the recursion limit. When we enter a
+        # record we also push a marker, which gets popped once all objects reachable from that record have been walked.
+        stack = [(root, None, False)]
+        while stack:
+            obj, field_key, is_end_marker = stack.pop()
+            if is_end_marker:
+                record, bytes_before = obj
+                self._record_exited(record, bytes_before)
+                continue
+            if id(obj) in self.seen_ids:
+                continue
+            self.seen_ids.add(id(obj))
+            num_bytes = own_size(obj, self.seen_ids)
+            self.total_bytes += num_bytes
+            class_name = obj.__class__.__name__
+            usage = self.by_class.setdefault(class_name, [0, 0])
+            usage[0] += 1
+            usage[1] += num_bytes
+            if field_key is not None:
+                self.by_field[field_key] = self.by_field.get(field_key, 0) + num_bytes
+            if isinstance(obj, Record):
+                stack.append(((obj, self.total_bytes - num_bytes), None, True))
+                for field_id in obj.record_fields:
+                    stack.append((getattr(obj, field_id), '%s.%s' % (class_name, field_id), False))
+            else:
+                for child in iter_children(obj):
+                    stack.append((child, field_key, False))
+
+    def _record_exited(self, record, bytes_before):
+        try:
+            key = (record.__class__, record.__key__())
+            canonical = self.canonical_records.setdefault(key, record)
+        except TypeError:
+            # unhashable field values
+            return
+        if canonical is not record:
+            class_name = record.__class__.__name__
+            self.interning_savings[class_name] = self.interning_savings.get(class_name, 0) + self.total_bytes - bytes_before
+
+
+def own_size(obj, seen_ids=None):
+    # The size of the object, including the internal structures of the collection types we know about, but not of the elements.
+    # If a set of `seen_ids' is given, the trie nodes of pvecs and pmaps whose ids are in it aren't counted, and the ids of the
+    # others are added to it, so that nodes shared by several versions of a collection are only counted once.
+    size = sys.getsizeof(obj)
+    if isinstance(obj, PersistentVector):
+        size += _nodes_size(_iter_pvector_nodes(obj), seen_ids)
+    elif isinstance(obj, PersistentMap):
+        size += sys.getsizeof(vars(obj)) + _nodes_size(_iter_pmap_nodes(obj), seen_ids)
+    elif isinstance(obj, ImmutableDict):
+        size += sys.getsizeof(vars(obj)) + sys.getsizeof(obj._ImmutableDict__impl)  # pylint: disable=protected-access
+    elif isinstance(obj, ImmutableArray):
+        # the elements are stored unboxed in the array, so they're included here, and it has no children
+        size += sys.getsizeof(obj._array)  # pylint: disable=protected-access
+    return size
+
+
+def iter_children(obj):
+    if isinstance(obj, PersistentVector):
+        for node, level in _iter_pvector_nodes_with_level(obj):
+            if level == 0:
+                for elem in node:
+                    yield elem
+    elif isinstance(obj, (ImmutableDict, dict)):
+        for key, value in obj.items():
+            yield key
+            yield value
+    elif isinstance(obj, (tuple, list, frozenset, set)):
+        for elem in obj:
+            yield elem
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# private utils. These reach into the collection classes' internals, pylint: disable=protected-access
+
+def _nodes_size(nodes, seen_ids):
+    size = 0
+    for node in nodes:
+        if seen_ids is not None:
+            if id(node) in seen_ids:
+                continue
+            seen_ids.add(id(node))
+        size += sys.getsizeof(node)
+    return size
+
+def _iter_pvector_nodes_with_level(pvec):
+    # NB this includes all nodes of the trie, even if `pvec' is a slice that only uses some of them, since they're all kept alive
+    stack = [(pvec._root, pvec._shift)]
+    while stack:
+        node, level = stack.pop()
+        yield node, level
+        if level > 0:
+            stack.extend((child, level - BITS) for child in node)
+
+def _iter_pvector_nodes(pvec):
+    return (node for node, _ in _iter_pvector_nodes_with_level(pvec))
+
+def _iter_pmap_nodes(pmap):
+    # Yields the node objects, their tuples of children or entries, and the (key, value) tuples themselves
+    stack = [pmap._root]
+    while stack:
+        node = stack.pop()
+        yield node
+        children = node.children if node.__class__ is BitmapNode else node.entries
+        yield children
+        for child in children:
+            if child.__class__ is tuple:
+                yield child
+            else:
+                stack.append(child)
+
+#----------------------------------------------------------------------------------------------------------------------------------
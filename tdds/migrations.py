@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Reading data that was serialized with an older version of a record class's schema.
+
+Every record class has a fingerprint of its schema, returned by `record_fingerprint()'. When the schema changes, you register a
+migration from the old fingerprint to the new one:
+
+    register_migration(Album, 'c0ffee...', Album.record_fingerprint(), lambda values: dict(values, year=values.pop('released')))
+
+A migration is a function that receives a dict of the field values of a record as it was under the old schema, and returns a
+dict of the field values for the new one. It may modify the dict it is given. Migrations are applied:
+
+  * when unpickling: pickles record the fingerprint and field names of each record class, so old records are migrated
+    automatically. The dict then holds the field values, with nested records already unpickled (and migrated) in turn.
+
+  * by `from_pods', if given the fingerprint of the schema that the PODS were produced with, e.g. `Album.from_pods(pods,
+    fingerprint=stored_fingerprint)'. The dict then is the PODS of the record, and nested values are still PODS. Only the
+    top-level PODS are migrated, so the migration must take care of any nested PODS whose schema changed.
+
+Migrations registered from one fingerprint to another, then from that one to a third, etc, are chained. Each chain is compiled
+into a single function the first time it's needed.
+"""
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# includes
+
+# 2+3 compat
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+# standards
+from contextlib import contextmanager
+from threading import RLock
+
+# this module
+from .unpickler import schema_fingerprint
+from .utils.codegen import Joiner, SourceCodeTemplate, compile_expr
+
+#----------------------------------------------------------------------------------------------------------------------------------
+
+class MissingMigration(ValueError):
+    pass
+
+# Migrations are registered by class module and name rather than by class object, so that they still apply if the class is
+# redefined. This maps (module, name) tuples to dicts that map each `from_fingerprint' to a (to_fingerprint, migrate) tuple.
+MIGRATIONS = {}
+
+# maps (module, name, from_fingerprint, to_fingerprint) tuples to compiled migration chains
+COMPILED_CHAINS = {}
+
+MIGRATIONS_LOCK = RLock()
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# public interface
+
+def register_migration(record_class, from_fingerprint, to_fingerprint, migrate):
+    """
+    Registers a function that converts the field values of a record of the given class from the schema with fingerprint
+    `from_fingerprint' to the schema with fingerprint `to_fingerprint'. There can only be one migration from any given fingerprint.
+    """
+    if from_fingerprint == to_fingerprint:
+        raise ValueError("Can't migrate from a fingerprint to itself")
+    with MIGRATIONS_LOCK:
+        migrations = MIGRATIONS.setdefault(_class_key(record_class), {})
+        if from_fingerprint in migrations:
+            raise ValueError('A migration from %s is already registered for %s' % (from_fingerprint, record_class.__name__))
+        migrations[from_fingerprint] = (to_fingerprint, migrate)
+        COMPILED_CHAINS.clear()
+
+def unregister_migration(record_class, from_fingerprint):
+    with MIGRATIONS_LOCK:
+        del MIGRATIONS[_class_key(record_class)][from_fingerprint]
+        COMPILED_CHAINS.clear()
+
+@contextmanager
+def temporary_migration_registration(record_class, from_fingerprint, to_fingerprint, migrate):
+    register_migration(record_class, from_fingerprint, to_fingerprint, migrate)
+    try:
+        yield
+    finally:
+        unregister_migration(record_class, from_fingerprint)
+
+def migration_chain(record_class, from_fingerprint):
+    """
+    Returns a function that migrates field values from the schema with the given fingerprint to the class's current schema, or None
+    if the fingerprint is the current one. Raises MissingMigration if there's no chain of migrations between the two.
+    """
+    to_fingerprint = schema_fingerprint(record_class)
+    if from_fingerprint == to_fingerprint:
+        return None
+    key = _class_key(record_class) + (from_fingerprint, to_fingerprint)
+    chain = COMPILED_CHAINS.get(key)
+    if chain is None:
+        with MIGRATIONS_LOCK:
+            chain = COMPILED_CHAINS[key] = compile_chain(_find_steps(record_class, from_fingerprint, to_fingerprint))
+    return chain
+
+def migrating_constructor(record_class, from_fingerprint, field_ids):
+    """
+    Returns a function that takes the positional field values of a record pickled with the schema with the given fingerprint, whose
+    fields were `field_ids', and returns an instance of `record_class' with the migrated values.
+    """
+    return compile_expr(
+        SourceCodeTemplate(
+            '''
+            def construct($params):
+                return $cls(**$migrate({$values}))
+            ''',
+            params=', '.join('field_%d' % i for i in range(len(field_ids))) or None,
+            cls=record_class,
+            migrate=migration_chain(record_class, from_fingerprint),
+            values=', '.join('%r: field_%d' % (field_id, i) for i, field_id in enumerate(field_ids)) or None,
+        ),
+        'construct',
+    )
+
+def migrate_pods(record_class, pods, fingerprint):
+    # Called by `from_pods' when given a fingerprint
+    chain = migration_chain(record_class, fingerprint)
+    return pods if chain is None else chain(dict(pods))
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# implementation
+
+def compile_chain(steps):
+    return compile_expr(
+        SourceCodeTemplate(
+            '''
+            def migrate(values):
+                $steps
+                return values
+            ''',
+            steps=Joiner('\n', values=(
+                SourceCodeTemplate('values = $step(values)', step=step)
+                for step in steps
+            )),
+        ),
+        'migrate',
+    )
+
+def _find_steps(record_class, from_fingerprint, to_fingerprint):
+    migrations = MIGRATIONS.get(_class_key(record_class), {})
+    steps = []
+    fingerprint = from_fingerprint
+    while fingerprint != to_fingerprint:
+        if fingerprint not in migrations or len(steps) > len(migrations):
+            raise MissingMigration('No migration from %s to %s for %s' % (from_fingerprint, to_fingerprint, record_class.__name__))
+        fingerprint, migrate = migrations[fingerprint]
+        steps.append(migrate)
+    return steps
+
+def _class_key(record_class):
+    return (record_class.__module__, record_class.__name__)
+
+#----------------------------------------------------------------------------------------------------------------------------------
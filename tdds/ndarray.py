@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Support for record fields that hold NumPy arrays, e.g.
+
+    from tdds.ndarray import ndarray_of
+
+    class TimeSeries(Record):
+        samples = nonnegative(ndarray_of('float64', ndim=1))
+
+Field values are stored as FrozenNDArray instances, which are read-only copies of the arrays given to the constructor. Value checks
+are vectorized: the check expression is evaluated once on the whole array, and passes if it holds for all elements.
+
+This module requires NumPy, which is why it isn't imported by `tdds' itself.
+"""
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# includes
+
+# 2+3 compat
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+# standards
+from base64 import b64decode, b64encode
+from hashlib import sha1
+
+# numpy
+import numpy
+
+# this module
+from .basics import Field, FieldTypeError, FieldValueError
+from .utils.codegen import SourceCodeGenerator, SourceCodeTemplate
+from .utils.compatibility import string_types
+
+#----------------------------------------------------------------------------------------------------------------------------------
+
+class FrozenNDArray(numpy.ndarray):
+    """
+    A read-only array that, like the other field values, can be compared and hashed as a whole. NB this means that `==' compares
+    whole arrays and returns a bool, rather than comparing element-wise. Use `numpy.equal' for element-wise comparisons.
+
+    Arrays computed from a FrozenNDArray, e.g. `arr * 2', are plain, writeable ndarrays, with the usual element-wise `=='.
+    """
+
+    def __array_wrap__(self, obj, context=None, return_scalar=False):  # pylint: disable=unused-argument
+        if return_scalar:
+            return obj[()]
+        return obj.view(numpy.ndarray)
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if not isinstance(other, numpy.ndarray):
+            return False
+        return self.shape == other.shape and self.dtype == other.dtype and bool(numpy.array_equal(self, other))
+
+    def __ne__(self, other):
+        return not (self == other)
+
+    def __hash__(self):
+        # The content digest is cached. It's safe to do so since the array is read-only.
+        digest_hash = self.__dict__.get('_digest_hash')
+        if digest_hash is None:
+            digest = sha1(self.dtype.str.encode('ascii'))
+            digest.update(repr(self.shape).encode('ascii'))
+            values = self.view(numpy.ndarray)
+            if self.dtype.kind in 'fc':
+                # -0.0 and 0.0 are equal, but their bytes differ. Adding 0.0 turns the one into the other.
+                values = values + 0.0
+            digest.update(numpy.ascontiguousarray(values).tobytes())
+            digest_hash = self.__dict__['_digest_hash'] = hash(digest.digest())
+        return digest_hash
+
+    def record_pods(self):
+        return {
+            'dtype': self.dtype.str,
+            'shape': list(self.shape),
+            'data': b64encode(numpy.ascontiguousarray(self).tobytes()).decode('ascii'),
+        }
+
+    @classmethod
+    def from_pods(cls, pods):
+        arr = numpy.frombuffer(b64decode(pods['data']), dtype=numpy.dtype(str(pods['dtype'])))
+        return freeze(arr.reshape(pods['shape']))
+
+
+def freeze(arr):
+    frozen = arr.view(FrozenNDArray)
+    frozen.flags.writeable = False
+    return frozen
+
+#----------------------------------------------------------------------------------------------------------------------------------
+
+class NDArrayField(Field):
+    """
+    A Field whose value checks are vectorized, i.e. `check' is applied once to the whole array, and must hold for all elements.
+    """
+
+    def __init__(self, dtype, ndim=None, shape=None, nullable=False, default=None, check=None):
+        object.__setattr__(self, 'dtype', numpy.dtype(dtype))
+        object.__setattr__(self, 'ndim', len(shape) if shape is not None else ndim)
+        object.__setattr__(self, 'shape', tuple(shape) if shape is not None else None)
+        super(NDArrayField, self).__init__(
+            FrozenNDArray,
+            nullable=nullable,
+            default=default,
+            coerce=self.coerce_array,
+            check=vectorized_check(check),
+        )
+
+    def coerce_array(self, value):
+        if value is None:
+            return None
+        if value.__class__ is FrozenNDArray and value.dtype == self.dtype and not value.flags.writeable:
+            # already checked and frozen by us
+            arr = value
+        else:
+            arr = numpy.asarray(value)
+            if not numpy.can_cast(arr.dtype, self.dtype, casting='same_kind'):
+                raise FieldTypeError('Expected an array of %s, not %s' % (self.dtype, arr.dtype))
+            # NB always copy, since whoever gave us the array may still modify it
+            arr = freeze(numpy.array(arr, dtype=self.dtype, copy=True))
+        if self.ndim is not None and arr.ndim != self.ndim:
+            raise FieldValueError('Expected an array with %d dimensions, not %d' % (self.ndim, arr.ndim))
+        if self.shape is not None and any(
+                expected is not None and actual != expected
+                for expected, actual in zip(self.shape, arr.shape)):
+            raise FieldValueError('Expected an array of shape %r, not %r' % (self.shape, arr.shape))
+        return arr
+
+    def derive(self, **kwargs):
+        new_field = NDArrayField(
+            self.dtype,
+            shape=self.shape,
+            ndim=self.ndim,
+            nullable=kwargs.pop('nullable', self.nullable),
+            default=kwargs.pop('default', self.default),
+        )
+        if 'check' in kwargs:
+            object.__setattr__(new_field, 'check', vectorized_check(kwargs.pop('check')))
+        else:
+            object.__setattr__(new_field, 'check', self.check)
+        if kwargs:
+            raise TypeError('Unknown kwargs: %s' % ', '.join(sorted(kwargs)))
+        return new_field
+
+
+def vectorized_check(check):
+    if check is None:
+        return None
+    elif isinstance(check, (string_types, SourceCodeGenerator)):
+        return SourceCodeTemplate('$all($check)', all=numpy.all, check=check)
+    else:
+        return lambda arr: numpy.all(check(arr))
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# public interface
+
+def ndarray_of(dtype, ndim=None, shape=None, **kwargs):
+    """
+    Declares a field holding a NumPy array of the given dtype. If `ndim' is given, the array must have that many dimensions. If
+    `shape' is given, it must have that shape, where `None' can be used for dimensions whose size can vary, e.g. (None, 3).
+    """
+    return NDArrayField(dtype, ndim=ndim, shape=shape, **kwargs)
+
+#----------------------------------------------------------------------------------------------------------------------------------
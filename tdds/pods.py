@@ -15,12 +15,15 @@ JSON specifically, the PODS should be immediately serializable to strings using
 from __future__ import absolute_import, division, print_function, unicode_literals
 
 # standards
+from copy import copy
 from functools import wraps
 
 # this module
 from .basics import RecursiveType
 from .marshaller import lookup_marshalling_code_for_type, lookup_unmarshalling_code_for_type, wrap_in_null_check
-from .utils.codegen import ExternalCodeInvocation, ExternalValue, Joiner, SourceCodeTemplate
+from .migrations import migrate_pods
+from .unpickler import RecordRegistryMetaClass
+from .utils.codegen import ExternalCodeInvocation, ExternalValue, Joiner, SourceCodeTemplate, compile_expr
 from .utils.compatibility import integer_types, string_types, text_type
 
 #----------------------------------------------------------------------------------------------------------------------------------
@@ -55,22 +58,103 @@ def serialization_exceptions_at_runtime(func):
                 raise
     return wrapper
 
+#----------------------------------------------------------------------------------------------------------------------------------
+# Projections select which fields `record_pods' and `from_pods' should process, e.g. {'title': True, 'tracks': {'title': True}}
+# selects the `title' field, and the `title' field of each of the records in the `tracks' collection. A list of field names can
+# also be given, which selects these fields in full.
+
+class Projection(tuple):
+    """
+    The normalized form of a projection: a sorted tuple of (field_id, subprojection) pairs, where `subprojection' is either True,
+    to select the whole value, or another Projection. These are hashable, and used as keys in the cache of compiled methods.
+    """
+
+def normalize_projection(fields):
+    if fields.__class__ is Projection:
+        return fields
+    if isinstance(fields, string_types):
+        fields = (fields,)
+    items = fields.items() if isinstance(fields, dict) else ((field_id, True) for field_id in fields)
+    return Projection(sorted(
+        (field_id, True if subfields is True else normalize_projection(subfields))
+        for field_id, subfields in items
+        if subfields
+    ))
+
 #----------------------------------------------------------------------------------------------------------------------------------
 
 class PodsMethodsTemplate(SourceCodeTemplate):
 
     template = '''
-        def record_pods (self):
+        def record_pods (self, fields=None):
+            if fields is not None:
+                return $compile_projection(fields)(self)
             $record_pods_impl
 
         @classmethod
-        def from_pods (cls, pods):
+        def from_pods (cls, pods, $from_pods_params):
+            $migrate_pods
+            if fields is not None:
+                return $compile_projection(fields, True)(cls, pods)
+            $from_pods_impl
+    '''
+
+    projected_record_pods_template = '''
+        def project(self):
+            $record_pods_impl
+    '''
+
+    projected_from_pods_template = '''
+        def project(cls, pods):
             $from_pods_impl
     '''
 
+    # The Projection that the `*_impl' properties implement, None for all fields
+    projection = None
+
+    # Records also accept the fingerprint of the schema that the PODS were produced with, see `tdds.migrations'
+    from_pods_params = 'fields=None'
+    migrate_pods = None
+
+    @property
+    def compile_projection(self):
+        return ExternalValue(self.compile_projection_impl)
+
+    def compile_projection_impl(self, fields, decode=False):
+        # Compiled projections are cached on the template, of which there is one per record or collection class
+        cache = self.__dict__.get('compiled_projections')
+        if cache is None:
+            cache = self.__dict__.setdefault('compiled_projections', {})
+        projection = normalize_projection(fields)
+        compiled = cache.get((projection, decode))
+        if compiled is None:
+            projected = copy(self)
+            projected.projection = projection
+            compiled = compile_expr(
+                SourceCodeTemplate(
+                    self.projected_from_pods_template if decode else self.projected_record_pods_template,
+                    from_pods_impl=projected.from_pods_impl if decode else None,
+                    record_pods_impl=None if decode else projected.record_pods_impl,
+                ),
+                'project',
+            )
+            cache[(projection, decode)] = compiled
+        return compiled
+
     @staticmethod
-    def value_to_pods(value_expr, field, needs_null_check=True):
-        if field.type in PODS_TYPES:
+    def value_to_pods(value_expr, field, needs_null_check=True, projection=None):
+        if projection is not None:
+            check_projection(field.type, projection)
+            return wrap_in_null_check(
+                field.nullable and needs_null_check,
+                value_expr,
+                SourceCodeTemplate(
+                    '$value.record_pods($projection)',
+                    value=value_expr,
+                    projection=ExternalValue(projection),
+                ),
+            )
+        elif field.type in PODS_TYPES:
             return value_expr
         elif field.type is RecursiveType or callable(getattr(field.type, 'record_pods', None)):
             return wrap_in_null_check(
@@ -92,8 +176,20 @@ class PodsMethodsTemplate(SourceCodeTemplate):
                 ))
 
     @staticmethod
-    def pods_to_value(value_expr, field):
-        if field.type in PODS_TYPES:
+    def pods_to_value(value_expr, field, projection=None):
+        if projection is not None:
+            check_projection(field.type, projection)
+            return wrap_in_null_check(
+                field.nullable,
+                value_expr,
+                SourceCodeTemplate(
+                    '$cls.from_pods($value, $projection)',
+                    cls=field.type,
+                    value=value_expr,
+                    projection=ExternalValue(projection),
+                ),
+            )
+        elif field.type in PODS_TYPES:
             return value_expr
         elif field.type is RecursiveType or callable(getattr(field.type, 'from_pods', None)):
             return wrap_in_null_check(
@@ -126,11 +222,34 @@ class PodsMethodsTemplate(SourceCodeTemplate):
 
 class PodsMethodsForRecordTemplate(PodsMethodsTemplate):
 
+    from_pods_params = 'fields=None, fingerprint=None'
+
     def __init__(self, class_name, fields):
         super(PodsMethodsForRecordTemplate, self).__init__()
         self.class_name = class_name
         self.fields = fields
 
+    @property
+    def migrate_pods(self):
+        return SourceCodeTemplate(
+            '''
+            if fingerprint is not None:
+                pods = $migrate_pods(cls, pods, fingerprint)
+            ''',
+            migrate_pods=migrate_pods,
+        )
+
+    def iter_projected_fields(self):
+        # Yields (field_id, field, subprojection) tuples, where `subprojection' is None if the whole value is selected
+        if self.projection is None:
+            for field_id, field in sorted(self.fields.items()):
+                yield field_id, field, None
+        else:
+            for field_id, subprojection in self.projection:
+                if field_id not in self.fields:
+                    raise ValueError('%s has no field %r' % (self.class_name, field_id))
+                yield field_id, self.fields[field_id], (None if subprojection is True else subprojection)
+
     @property
     @serialization_exceptions_at_runtime
     def record_pods_impl(self):
@@ -148,14 +267,17 @@ class PodsMethodsForRecordTemplate(PodsMethodsTemplate):
                     'self.{}'.format(field_id),
                     field,
                     needs_null_check=False,
+                    projection=subprojection,
                 ),
             )
-            for field_id, field in sorted(self.fields.items())
+            for field_id, field, subprojection in self.iter_projected_fields()
         ))
 
     @property
     @serialization_exceptions_at_runtime
     def from_pods_impl(self):
+        if self.projection is not None:
+            return self.projected_from_pods_impl()
         return Joiner(', ', 'return cls(', ')', tuple(
             SourceCodeTemplate(
                 '$key = $value',
@@ -168,6 +290,29 @@ class PodsMethodsForRecordTemplate(PodsMethodsTemplate):
             for field_id, field in self.fields.items()
         ))
 
+    def projected_from_pods_impl(self):
+        # A partially decoded record is returned as a dict. Fields that are selected in full go through the same checks and
+        # coercion as in the record's constructor, so their values are the same as the record would hold.
+        from .record import FieldHandlingStmtsTemplate  # circular import, pylint: disable=import-outside-toplevel
+        stmts = []
+        for field_id, field, subprojection in self.iter_projected_fields():
+            variable_name = 'field_{}'.format(field_id)
+            stmts.append(SourceCodeTemplate(
+                '$variable_name = $value',
+                variable_name=variable_name,
+                value=self.pods_to_value('pods.get({})'.format(repr(field_id)), field, projection=subprojection),
+            ))
+            if subprojection is None:
+                stmts.append(FieldHandlingStmtsTemplate(
+                    field,
+                    variable_name,
+                    description='{}.{}'.format(self.class_name, field_id),
+                ))
+        return Joiner('\n', '', '\nreturn {%s}' % ', '.join(
+            '{!r}: field_{}'.format(field_id, field_id)
+            for field_id, _, _ in self.iter_projected_fields()
+        ), stmts)
+
 #----------------------------------------------------------------------------------------------------------------------------------
 
 class PodsMethodsForSeqTemplate(PodsMethodsTemplate):
@@ -176,12 +321,14 @@ class PodsMethodsForSeqTemplate(PodsMethodsTemplate):
         super(PodsMethodsForSeqTemplate, self).__init__()
         self.element_field = element_field
 
+    # The projection of a collection applies to its elements
+
     @property
     @serialization_exceptions_at_runtime
     def record_pods_impl(self):
         return SourceCodeTemplate(
             'return [ $code_for_elem for elem in self ]',
-            code_for_elem=self.value_to_pods('elem', self.element_field),
+            code_for_elem=self.value_to_pods('elem', self.element_field, projection=self.projection),
         )
 
     @property
@@ -189,11 +336,28 @@ class PodsMethodsForSeqTemplate(PodsMethodsTemplate):
     def from_pods_impl(self):
         return SourceCodeTemplate(
             'return [ $code_for_elem for elem in pods ]',
-            code_for_elem=self.pods_to_value('elem', self.element_field),
+            code_for_elem=self.pods_to_value('elem', self.element_field, projection=self.projection),
         )
 
 #----------------------------------------------------------------------------------------------------------------------------------
 
+class PodsMethodsForArrayTemplate(PodsMethodsTemplate):
+    # array elements are always PODS already
+
+    @property
+    def record_pods_impl(self):
+        if self.projection is not None:
+            raise ValueError("Can't select fields within arrays")
+        return 'return self.tolist()'
+
+    @property
+    def from_pods_impl(self):
+        if self.projection is not None:
+            raise ValueError("Can't select fields within arrays")
+        return 'return cls(pods)'
+
+#----------------------------------------------------------------------------------------------------------------------------------
+
 class PodsMethodsForDictTemplate(PodsMethodsTemplate):
 
     def __init__(self, key_field, value_field):
@@ -201,13 +365,15 @@ class PodsMethodsForDictTemplate(PodsMethodsTemplate):
         self.key_field = key_field
         self.value_field = value_field
 
+    # The projection of a dict applies to its values
+
     @property
     @serialization_exceptions_at_runtime
     def record_pods_impl(self):
         return SourceCodeTemplate(
             'return { $code_for_key:$code_for_val for key, value in self.items() }',
             code_for_key=self.value_to_pods('key', self.key_field),
-            code_for_val=self.value_to_pods('value', self.value_field),
+            code_for_val=self.value_to_pods('value', self.value_field, projection=self.projection),
         )
 
     @property
@@ -216,7 +382,27 @@ class PodsMethodsForDictTemplate(PodsMethodsTemplate):
         return SourceCodeTemplate(
             'return { $code_for_key:$code_for_val for key, value in pods.items() }',
             code_for_key=self.pods_to_value('key', self.key_field),
-            code_for_val=self.pods_to_value('value', self.value_field),
+            code_for_val=self.pods_to_value('value', self.value_field, projection=self.projection),
         )
 
 #----------------------------------------------------------------------------------------------------------------------------------
+# utils
+
+def check_projection(value_type, projection):
+    # Raises ValueError if the projection can't be applied to values of the given type, i.e. records or collections of records.
+    # Nested projections are checked here too, rather than when the nested values are first serialized.
+    if isinstance(value_type, RecordRegistryMetaClass):
+        for attr in ('value_field', 'element_field'):
+            element_field = getattr(value_type, attr, None)
+            if element_field is not None:
+                return check_projection(element_field.type, projection)
+    record_fields = getattr(value_type, 'record_fields', None) if isinstance(value_type, RecordRegistryMetaClass) else None
+    if record_fields is None:
+        raise ValueError("Can't select fields within %s values" % value_type.__name__)
+    for field_id, subprojection in projection:
+        if field_id not in record_fields:
+            raise ValueError('%s has no field %r' % (value_type.__name__, field_id))
+        if subprojection is not True:
+            check_projection(record_fields[field_id].type, subprojection)
+
+#----------------------------------------------------------------------------------------------------------------------------------
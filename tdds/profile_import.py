@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Imports the given module, and reports which of the classes that tdds compiled along the way were the most expensive to compile.
+
+    python -m tdds.profile_import mymodule [--limit N]
+"""
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# includes
+
+# 2+3 compat
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+# standards
+from argparse import ArgumentParser
+from importlib import import_module
+
+# this module
+from .utils.codegen import temporary_compilation_listener
+
+#----------------------------------------------------------------------------------------------------------------------------------
+
+def profile_import(module_name):
+    """
+    Imports the named module, and returns a list of CompilationStats objects, one per class compiled while doing so, slowest
+    first.
+    """
+    all_stats = []
+    with temporary_compilation_listener(all_stats.append):
+        import_module(module_name)
+    return sorted(all_stats, key=total_seconds, reverse=True)
+
+def total_seconds(stats):
+    return stats.expand_seconds + stats.compile_seconds + stats.eval_seconds
+
+def format_report(all_stats, limit=None):
+    row_fmt = '{:>10} {:>10} {:>10} {:>10} {:>10} {:>7}  {}'
+    ms_fmt = '{:.2f}'.format
+    lines = [row_fmt.format('total ms', 'expand ms', 'compile ms', 'eval ms', 'src bytes', 'interns', 'class')]
+    for stats in all_stats[:limit]:
+        lines.append(row_fmt.format(
+            ms_fmt(total_seconds(stats) * 1000),
+            ms_fmt(stats.expand_seconds * 1000),
+            ms_fmt(stats.compile_seconds * 1000),
+            ms_fmt(stats.eval_seconds * 1000),
+            stats.source_size,
+            stats.namespace_size,
+            stats.name,
+        ))
+    lines.append('')
+    lines.append('{:d} classes compiled in {:.1f} ms'.format(
+        len(all_stats),
+        sum(map(total_seconds, all_stats)) * 1000,
+    ))
+    return '\n'.join(lines)
+
+#----------------------------------------------------------------------------------------------------------------------------------
+
+def main():
+    parser = ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('module', help='name of the module to import')
+    parser.add_argument('--limit', type=int, default=20, help='number of classes to list (default: %(default)s)')
+    args = parser.parse_args()
+    print(format_report(profile_import(args.module), limit=args.limit))
+
+if __name__ == '__main__':
+    main()
+
+#----------------------------------------------------------------------------------------------------------------------------------
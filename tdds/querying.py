@@ -0,0 +1,330 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Querying sequences of records, e.g.
+
+    query = select(Album).where(year__gt=1999, artist='Wah-wah').order_by('title')
+    albums = query.execute(all_albums)
+
+    # fields can be selected, and criteria and ordering can use paths into nested records
+    select(Track, 'title', 'album__year').where(album__artist='Wah-wah').order_by('-album__year', 'title')
+
+Criteria are given as `field=value' for equality, or `field__op=value', where `op' is one of:
+
+    ne, lt, lte, gt, gte    the field's value is !=, <, <=, >, >= the given value
+    in                      the field's value is one of the given values
+    isnull                  the field's value is None, or isn't if given False
+
+Records whose value is None never match `lt', `lte', `gt' and `gte'. When sorting, None values come after all others, or before
+them in descending order.
+
+Each query is compiled to a function the first time it's executed, with its criteria and the selected fields unrolled into a list
+comprehension, so that it runs about as fast as a hand-written one. The compiled functions take the operands of the criteria as
+arguments, and are cached on the record class, so that queries that only differ in their operands, such as those built each time a
+function runs, share them. If the query is executed on a RecordIndex rather than on a plain
+sequence, then rather than scanning all records, it starts from those that the index finds for the query's equality criteria, or
+failing that, for the range criteria on one of the fields.
+"""
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# includes
+
+# 2+3 compat
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+# standards
+from itertools import islice
+
+# this module
+from .indexing import RecordIndex
+from .utils.codegen import Joiner, SourceCodeTemplate, compile_expr
+
+#----------------------------------------------------------------------------------------------------------------------------------
+
+# maps operators to the code that applies them, and to whether records whose value is None are excluded
+OPERATORS = {
+    'eq': ('$value == $operand', False),
+    'ne': ('$value != $operand', False),
+    'lt': ('$value < $operand', True),
+    'lte': ('$value <= $operand', True),
+    'gt': ('$value > $operand', True),
+    'gte': ('$value >= $operand', True),
+    'in': ('$value in $operand', False),
+    'isnull': (None, False),
+}
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# public interface
+
+def select(record_class, *fields):
+    """
+    Returns a query over records of the given class. If fields are given, the query returns a tuple of their values for each
+    record, rather than the record itself.
+    """
+    return Query(record_class, fields=tuple(FieldPath(record_class, field) for field in fields))
+
+
+class Query(object):
+    """
+    Queries are immutable: `where', `order_by' and `limit' return new queries.
+    """
+
+    def __init__(self, record_class, fields=(), criteria=(), ordering=(), max_results=None):
+        self.record_class = record_class
+        self.fields = fields
+        self.criteria = criteria
+        self.ordering = ordering
+        self.max_results = max_results
+
+    def where(self, **criteria):
+        return self.derive(criteria=self.criteria + tuple(
+            Criterion(self.record_class, key, operand)
+            for key, operand in sorted(criteria.items())
+        ))
+
+    def order_by(self, *field_ids):
+        """
+        Sorts results by the given fields. Prefix a field with '-' to sort by it in descending order.
+        """
+        return self.derive(ordering=self.ordering + tuple(
+            (FieldPath(self.record_class, field_id.lstrip('-')), field_id.startswith('-'))
+            for field_id in field_ids
+        ))
+
+    def limit(self, max_results):
+        return self.derive(max_results=max_results)
+
+    def derive(self, **kwargs):
+        return Query(**dict(
+            {
+                'record_class': self.record_class,
+                'fields': self.fields,
+                'criteria': self.criteria,
+                'ordering': self.ordering,
+                'max_results': self.max_results,
+            },
+            **kwargs
+        ))
+
+    def execute(self, records):
+        """
+        Runs the query over the given records, which can be any iterable, or a RecordIndex, and returns a list of results.
+        """
+        records, already_sorted = self.plan(records)
+        operands = tuple(criterion.operand for criterion in self.criteria)
+        if not self.ordering:
+            if self.max_results is not None:
+                return list(islice(self.compiled('iter_results')(records, operands), self.max_results))
+            return self.compiled('results')(records, operands)
+        matches = self.compiled('matches')(records, operands)
+        if not already_sorted:
+            self.sort(matches)
+        if self.max_results is not None:
+            del matches[self.max_results:]
+        return self.compiled('project')(matches) if self.fields else matches
+
+    def plan(self, records):
+        # If `records' is an index on our class, returns the records that the index finds, rather than all of them. These still need
+        # filtering on all criteria. Also returns whether the records are in the order that the query wants.
+        if not isinstance(records, RecordIndex) or not issubclass(records.record_class, self.record_class):
+            return records, False
+        equalities = {
+            criterion.path.field_id: criterion.operand
+            for criterion in self.criteria
+            if criterion.operator == 'eq' and criterion.path.field_id in records.hash_indexes
+        }
+        if equalities:
+            return records.find(**equalities), False
+        for criterion in self.criteria:
+            field_id = criterion.path.field_id
+            if criterion.operator in ('lt', 'lte', 'gt', 'gte') and field_id in records.sorted_indexes:
+                start, stop, include_stop = None, None, False
+                for other in self.criteria:
+                    if other.path.field_id == field_id and other.operator in ('gt', 'gte'):
+                        start = other.operand if start is None else max(start, other.operand)
+                    elif other.path.field_id == field_id and other.operator in ('lt', 'lte'):
+                        if stop is None or other.operand < stop or (other.operand == stop and other.operator == 'lt'):
+                            stop, include_stop = other.operand, other.operator == 'lte'
+                ordering = [(path.field_id, descending) for path, descending in self.ordering]
+                return records.find_range(field_id, start, stop, include_stop), ordering == [(field_id, False)]
+        return list(records), False
+
+    def sort(self, matches):
+        if len(set(descending for _, descending in self.ordering)) == 1:
+            matches.sort(key=self.compiled('sort_key'), reverse=self.ordering[0][1])
+        else:
+            # sorts are stable, so sorting by each field in turn, starting with the last, sorts by all of them
+            for position in reversed(range(len(self.ordering))):
+                matches.sort(key=self.compiled('sort_key', position), reverse=self.ordering[position][1])
+
+    def compiled(self, name, *args):
+        # Compiled functions are cached on the record class, keyed on everything about the query that goes into their code, i.e.
+        # everything but the operands of the criteria
+        cache = self.record_class.__dict__.get('_record_compiled_queries')
+        if cache is None:
+            cache = {}
+            type.__setattr__(self.record_class, '_record_compiled_queries', cache)
+        key = (name, args, self.shape())
+        compiled = cache.get(key)
+        if compiled is None:
+            compiled = cache[key] = compile_expr(getattr(QueryFunctions(self), name)(*args), name)
+        return compiled
+
+    def shape(self):
+        return (
+            tuple(path.path for path in self.fields),
+            tuple(criterion.shape() for criterion in self.criteria),
+            tuple((path.path, descending) for path, descending in self.ordering),
+        )
+
+
+class QueryFunctions(object):
+    # Each method returns the template of one of the functions that a Query compiles
+
+    def __init__(self, query):
+        self.query = query
+
+    def results(self):
+        return SourceCodeTemplate(
+            '''
+            def results(records, operands):
+                $unpack_operands
+                return [$projection for r in records if $predicate]
+            ''',
+            unpack_operands=self.unpack_operands(),
+            projection=self.projection(),
+            predicate=self.predicate(),
+        )
+
+    def project(self):
+        return SourceCodeTemplate(
+            '''
+            def project(records):
+                return [$projection for r in records]
+            ''',
+            projection=self.projection(),
+        )
+
+    def iter_results(self):
+        return SourceCodeTemplate(
+            '''
+            def iter_results(records, operands):
+                $unpack_operands
+                return ($projection for r in records if $predicate)
+            ''',
+            unpack_operands=self.unpack_operands(),
+            projection=self.projection(),
+            predicate=self.predicate(),
+        )
+
+    def matches(self):
+        return SourceCodeTemplate(
+            '''
+            def matches(records, operands):
+                $unpack_operands
+                return [r for r in records if $predicate]
+            ''',
+            unpack_operands=self.unpack_operands(),
+            predicate=self.predicate(),
+        )
+
+    def sort_key(self, position=None):
+        ordering = self.query.ordering if position is None else self.query.ordering[position:position + 1]
+        keys = [path.sort_key() for path, _ in ordering]
+        return SourceCodeTemplate(
+            '''
+            def sort_key(r):
+                return $key
+            ''',
+            key=keys[0] if len(keys) == 1 else Joiner(', ', '(', ',)', keys),
+        )
+
+    def projection(self):
+        if not self.query.fields:
+            return 'r'
+        return Joiner(', ', '(', ',)', [path.value() for path in self.query.fields])
+
+    def unpack_operands(self):
+        if self.query.criteria:
+            return ''.join('operand_%d, ' % position for position in range(len(self.query.criteria))) + '= operands'
+
+    def predicate(self):
+        if not self.query.criteria:
+            return 'True'
+        return Joiner(' and ', values=[
+            criterion.code('operand_%d' % position)
+            for position, criterion in enumerate(self.query.criteria)
+        ])
+
+#----------------------------------------------------------------------------------------------------------------------------------
+
+class FieldPath(object):
+    # A field, or a path into nested records, e.g. 'album__artist' for `r.album.artist'
+
+    def __init__(self, record_class, path):
+        self.path = path
+        self.field_ids = tuple(path.split('__'))
+        self.nullable = False
+        # the code that evaluates the path, and for each nested record on the way that could be None, the code that evaluates it
+        self.code = 'r'
+        self.nullable_steps = []
+        for position, field_id in enumerate(self.field_ids):
+            field = getattr(record_class, 'record_fields', {}).get(field_id)
+            if field is None:
+                raise ValueError('%s has no field %r' % (record_class.__name__, field_id))
+            self.code += '.' + field_id
+            if field.nullable:
+                self.nullable = True
+                if position < len(self.field_ids) - 1:
+                    self.nullable_steps.append(self.code)
+            record_class = field.type
+
+    @property
+    def field_id(self):
+        # The field's ID if the path is a single field, else None
+        return self.field_ids[0] if len(self.field_ids) == 1 else None
+
+    def value(self):
+        # The value is None if any nested record on the way is None
+        code = self.code
+        for step in reversed(self.nullable_steps):
+            code = '({} if {} is not None else None)'.format(code, step)
+        return code
+
+    def sort_key(self):
+        if self.nullable:
+            return '({0} is None, {0})'.format(self.value())
+        return self.value()
+
+
+class Criterion(object):
+
+    def __init__(self, record_class, key, operand):
+        path, _, operator = key.rpartition('__')
+        if operator not in OPERATORS or not path:
+            path, operator = key, 'eq'
+        self.path = FieldPath(record_class, path)
+        self.operator = operator
+        if operator == 'in':
+            try:
+                operand = frozenset(operand)
+            except TypeError:
+                operand = tuple(operand)
+        self.operand = operand
+
+    def shape(self):
+        # The operand of `isnull' is the only one that goes into the compiled code
+        return (self.path.path, self.operator, bool(self.operand) if self.operator == 'isnull' else None)
+
+    def code(self, operand):
+        value = self.path.value()
+        if self.operator == 'isnull':
+            return '{} is {}None'.format(value, '' if self.operand else 'not ')
+        template, excludes_null = OPERATORS[self.operator]
+        code = SourceCodeTemplate(template, value=value, operand=operand)
+        if excludes_null and self.path.nullable:
+            return SourceCodeTemplate('($value is not None and $code)', value=value, code=code)
+        return code
+
+#----------------------------------------------------------------------------------------------------------------------------------
@@ -9,13 +9,18 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 
 # standards
 from itertools import chain
+from operator import attrgetter, methodcaller
 import re
+from threading import RLock
+from timeit import default_timer
 
 # this module
 from .basics import Field, FieldError, FieldValueError, FieldTypeError, FieldNotNullable, RecordsAreImmutable, \
-    RecursiveType, compile_field
+    RecursiveType, compile_field, is_deep_immutable
+from .instrumentation import instrument_class, instrumentation_enabled, record_timing
+from .interning import Interner
 from .pods import PodsMethodsForRecordTemplate
-from .unpickler import RecordRegistryMetaClass, RecordUnpickler
+from .unpickler import RecordRegistryMetaClass, schema_fingerprint
 from .utils.codegen import ExternalCodeInvocation, ExternalValue, Joiner, SourceCodeTemplate, compile_expr
 from .utils.compatibility import PY2, integer_types, native_string, string_types  # you're confused, pylint: disable=unused-import
 from .utils.immutabledict import ImmutableDict
@@ -29,28 +34,174 @@ else:
     builtin_module = 'builtins'  # pylint: disable=invalid-name
 
 
+# The comparison methods of classes that define their own __lt__ or __eq__, rather than comparing keys
+DERIVED_COMPARISONS = {
+    '__le__': lambda self, other: self < other or self == other,
+    '__gt__': lambda self, other: not (self < other or self == other),
+    '__ge__': lambda self, other: not (self < other),
+}
+
+# The sort key of classes that define their own __lt__: the records themselves, so that sorting with it calls their __lt__
+def sort_by_lt(record):
+    return record
+
+
 class RecordMetaClass(RecordRegistryMetaClass):
     def __new__(mcs, class_name, bases, attrib):
         attrib.pop('__qualname__', None)
         module = attrib.pop('__module__', None)
         is_codegen = (module == builtin_module)
+        if any(isinstance(base, LazyRecordMetaClass) for base in bases):
+            if not issubclass(mcs, CompiledRecordMetaClass):
+                mcs = CompiledRecordMetaClass
+            if not is_codegen:
+                # Subclassing a lazy record compiles it, and the subclass then extends the compiled class
+                bases = tuple(base.record_compile() if isinstance(base, LazyRecordMetaClass) else base for base in bases)
+        if is_codegen and attrib.get('record_interner') is not None:
+            mcs = CompiledInterningRecordMetaClass if issubclass(mcs, CompiledRecordMetaClass) else InterningRecordMetaClass
         if bases == (object,) or is_codegen or Record not in bases:
+            if not is_codegen and 'record_sort_key' not in attrib:
+                # a non-record subclass that defines its own __lt__ or __key__ needs a sort key that uses it
+                if '__lt__' in attrib:
+                    attrib['record_sort_key'] = sort_by_lt
+                elif '__key__' in attrib:
+                    attrib['record_sort_key'] = methodcaller('__key__')
+            if not is_codegen and ('__lt__' in attrib or '__eq__' in attrib):
+                # likewise if it defines its own __lt__ or __eq__, the record class's le, gt and ge, which compare keys, no longer
+                # agree with them, and so are replaced with ones that call them
+                for method_name, method in DERIVED_COMPARISONS.items():
+                    attrib.setdefault(method_name, method)
             return type.__new__(mcs, class_name, bases, attrib)
         verbose = attrib.pop('_%s__verbose' % class_name, False)
+        lazy = attrib.pop('_%s__lazy' % class_name, False)
+        interner = attrib.pop('_%s__intern' % class_name, None)
+        if interner is True:
+            interner = Interner()
+        elif interner is not None and not isinstance(interner, Interner):
+            raise TypeError('__intern should be either True or an Interner, not %r' % (interner,))
+        if lazy and mcs is RecordMetaClass:  # i.e. unless extending a lazy record, in which case we compile right away
+            return LazyRecordMetaClass.create_placeholder(class_name, bases, attrib, module, verbose, interner)
+        return mcs.compile_record_class(class_name, bases, attrib, module, verbose, interner)
+
+    @classmethod
+    def compile_record_class(mcs, class_name, bases, attrib, module, verbose, interner=None, placeholder=None):
         src_code_gen = RecordClassTemplate(class_name, bases, **attrib)
+        src_code_gen.placeholder = placeholder
+        src_code_gen.interner = interner
         cls = compile_expr(src_code_gen, class_name, verbose=verbose)
         if module is not None:
             setattr(cls, '__module__', module)
+        if src_code_gen.instrumented:
+            instrument_class(cls)
         mcs.register(class_name, cls)
         for field in cls.record_fields.values():
             field.set_recursive_type(cls)
         return cls
 
 
+class LazyRecordMetaClass(RecordMetaClass):
+    """
+    A record class that sets `__lazy = True' isn't compiled when its class statement is executed. Instead a placeholder class is
+    created, which only holds on to the class definition, and the actual class is compiled the first time the placeholder is
+    called, or one of its attributes is looked up. The compiled class is a subclass of the placeholder, so all instances are
+    instances of the placeholder, as you'd expect. (There's no need to compile on an `isinstance' check, since until the class is
+    compiled there can be no instances.)
+    """
+
+    compile_lock = RLock()
+
+    @classmethod
+    def create_placeholder(mcs, class_name, bases, attrib, module, verbose, interner):
+        placeholder = type.__new__(mcs, class_name, bases, {
+            '__slots__': (),
+            '__module__': module,
+            '_record_definition': (attrib, verbose, interner),
+            '_record_compiled': None,
+            # These are here so that other classes can tell that this is a record class, without that compiling it
+            'record_pods': lambda self, *args, **kwargs: self.__class__.record_compile().record_pods(self, *args, **kwargs),
+            'from_pods': classmethod(lambda cls, *args, **kwargs: cls.record_compile().from_pods(*args, **kwargs)),
+        })
+        mcs.register(class_name, placeholder)
+        return placeholder
+
+    def record_compile(cls):
+        with cls.compile_lock:
+            compiled = cls._record_compiled
+            if compiled is None:
+                attrib, verbose, interner = cls._record_definition
+                compiled = CompiledRecordMetaClass.compile_record_class(
+                    cls.__name__,
+                    cls.__bases__,
+                    dict(attrib),
+                    cls.__module__,
+                    verbose,
+                    interner,
+                    placeholder=cls,
+                )
+                # Copying the compiled class's attributes onto the placeholder means that from here on they're looked up at
+                # normal speed, without going through `__getattr__'
+                for attr in compiled.__dict__:
+                    if not attr.startswith('__'):
+                        type.__setattr__(cls, attr, getattr(compiled, attr))
+                type.__setattr__(cls, '_record_compiled', compiled)
+        return compiled
+
+    def __call__(cls, *args, **kwargs):
+        return (cls._record_compiled or cls.record_compile())(*args, **kwargs)
+
+    def __getattr__(cls, attr):
+        if attr.startswith('__'):
+            raise AttributeError(attr)
+        return getattr(cls.record_compile(), attr)
+
+
+class CompiledRecordMetaClass(LazyRecordMetaClass):
+    # Metaclass of the classes compiled from a lazy placeholder, and of their subclasses. These are normal record classes again.
+
+    __call__ = type.__call__
+
+    def record_compile(cls):
+        return cls
+
+    def __getattr__(cls, attr):
+        raise AttributeError(attr)
+
+
+class InterningRecordMetaClass(RecordMetaClass):
+    # Metaclass of record classes that set `__intern'. Constructing an instance returns the canonical instance with those values.
+
+    def __call__(cls, *args, **kwargs):
+        return cls.record_interner.intern(type.__call__(cls, *args, **kwargs))
+
+
+class CompiledInterningRecordMetaClass(InterningRecordMetaClass, CompiledRecordMetaClass):
+    # Same, for classes compiled from a lazy placeholder
+    pass
+
+
+def from_pods_async(cls, pods, **kwargs):
+    """
+    Returns an awaitable version of `from_pods', which doesn't block the event loop for long. See `tdds.aio.decode' for kwargs.
+    """
+    from .aio import decode  # not imported at the top since it requires Python 3, pylint: disable=import-outside-toplevel
+    return decode(cls, pods, **kwargs)
+
+
+def collect_validation_errors(cls, values, error):
+    """
+    Called by the generated `record_validate' classmethods once the values have failed to validate. See `tdds.validation'.
+    """
+    from .validation import collect_errors  # circular import, pylint: disable=import-outside-toplevel
+    return collect_errors(cls, values, error)
+
+
 Record = RecordMetaClass(
     native_string('Record'),
     (object,),
-    {}
+    {
+        'from_pods_async': classmethod(from_pods_async),
+        'record_fingerprint': classmethod(schema_fingerprint),
+    }
 )
 
 #----------------------------------------------------------------------------------------------------------------------------------
@@ -91,6 +242,9 @@ class RecordClassTemplate(SourceCodeTemplate):
             $pods_methods
 
             record_fields = $record_fields
+            record_deep_immutable = $record_deep_immutable
+            record_sort_key = $record_sort_key
+            $record_interner_def
 
             def record_derive(self, **kwargs):
                 return self.__class__(**{
@@ -98,16 +252,18 @@ class RecordClassTemplate(SourceCodeTemplate):
                     for field_id in $fields_including_super
                 })
 
+            $record_validate_def
+
             $core_methods
     '''
 
     Record = Record
     RecordsAreImmutable = RecordsAreImmutable
-    RecordUnpickler = RecordUnpickler
 
     def __init__(self, class_name, bases, **fields):
         super(RecordClassTemplate, self).__init__()
         self.class_name = class_name
+        self.instrumented = instrumentation_enabled()
         self.super_records = tuple(spr for spr in bases if spr is not Record and issubclass(spr, Record))
         self.super_fields = self._compile_super_fields(self.super_records, fields)
         self.property_defs, self.classmethod_defs, self.staticmethod_defs = (
@@ -177,8 +333,21 @@ class RecordClassTemplate(SourceCodeTemplate):
     def init_params(self, field_id, field):
         return '{}{}'.format(field_id, '=None' if field.nullable else '')
 
+    # When compiling a lazy record, the compiled class extends the placeholder class
+    placeholder = None
+
+    # When the class sets `__intern', this is the Interner that its constructor passes new instances through
+    interner = None
+
+    @property
+    def record_interner_def(self):
+        if self.interner is not None:
+            return SourceCodeTemplate('record_interner = $interner', interner=ExternalValue(self.interner))
+
     @property
     def superclasses(self):
+        if self.placeholder is not None:
+            return self.placeholder
         return Joiner(', ', values=self.super_records + (Record,))
 
     @property
@@ -238,6 +407,72 @@ class RecordClassTemplate(SourceCodeTemplate):
     def record_fields(self):
         return ImmutableDict(self.fields_including_super)
 
+    @property
+    def record_deep_immutable(self):
+        # A field that holds a record of this same class doesn't change the answer
+        return all(
+            field.type is RecursiveType or is_deep_immutable(field.type)
+            for field in self.fields_including_super.values()
+        )
+
+    @property
+    def record_sort_key(self):
+        # A function that returns a key that sorts records in the same order as `__lt__', for use with `sorted(key=...)', which
+        # then compares keys without calling any of the record's methods. Unless the class defines its own `__key__', that's an
+        # `attrgetter' for the same fields as the default `__key__'. If the class defines its own `__lt__', there's no key that
+        # agrees with it, so the records themselves are the keys.
+        if '__lt__' in self.instancemethod_defs:
+            return ExternalValue(sort_by_lt)
+        field_ids = tuple(field_id for field_id, _ in self._iter_fields_in_fixed_order(include_super=True))
+        if '__key__' in self.instancemethod_defs or not field_ids:
+            return ExternalValue(methodcaller('__key__'))
+        return ExternalValue(attrgetter(*field_ids))
+
+    @property
+    def record_validate_def(self):
+        # Runs the same statements as the constructor, but on copies of the given values, so that if they fail, all the errors can
+        # be found starting from the originals. No record is created, so valid values cost no more than the constructor. The
+        # parameters are named after the fields, so the other names in the function start with an underscore.
+        if 'record_validate' in self.classmethod_defs:
+            return None
+        fields = self._iter_fields_in_fixed_order(include_super=True)
+        return SourceCodeTemplate(
+            '''
+            @classmethod
+            def record_validate(_cls, $params):
+                \"\"\"
+                Returns a list of all the FieldErrors that the constructor would raise for these values, rather than just the first
+                one. Each error's `path' is a tuple of the field IDs, indices and keys that lead to the invalid value, e.g.
+                ('tracks', 3, 'title'). Returns an empty list if the values are valid.
+                \"\"\"
+                try:
+                    $checks
+                except ($FieldError, TypeError) as _error:
+                    return $collect_validation_errors(_cls, {$values}, _error)
+                return []
+            ''',
+            params=Joiner(', ', values=('{}=None'.format(field_id) for field_id, _ in fields)),
+            checks=Joiner('\n', values=(
+                SourceCodeTemplate(
+                    '''
+                    $variable_name = $field_id
+                    $stmts
+                    ''',
+                    field_id=field_id,
+                    variable_name='_checked_{}'.format(field_id),
+                    stmts=FieldHandlingStmtsTemplate(
+                        field,
+                        '_checked_{}'.format(field_id),
+                        description='{}.{}'.format(self.class_name, field_id),
+                    ),
+                )
+                for field_id, field in fields
+            )) if fields else 'pass',
+            values=', '.join('{0!r}: {0}'.format(field_id) for field_id, _ in fields),
+            FieldError=FieldError,
+            collect_validation_errors=collect_validation_errors,
+        )
+
     @property
     def core_methods(self):
         return Joiner('\n\n', values=(
@@ -253,8 +488,18 @@ class RecordClassTemplate(SourceCodeTemplate):
         '''
         yield '__reduce__', '''
             def __reduce__(self):
-                return ($RecordUnpickler(self.__class__.__name__), $values_as_tuple)
+                return (self._record_unpickler, $values_as_tuple)
         '''
+        yield '__copy__', '''
+            def __copy__(self):
+                return self
+        '''
+        if self.record_deep_immutable:
+            # else `copy.deepcopy' falls back to `__reduce__', and builds a new record from deep copies of the values
+            yield '__deepcopy__', '''
+                def __deepcopy__(self, memo):
+                    return self
+            '''
         yield '__key__', SourceCodeTemplate(
             '''
                 def __key__(self):
@@ -268,7 +513,7 @@ class RecordClassTemplate(SourceCodeTemplate):
         # eq, lt and hash defined on the basis of __key__
         yield '__eq__', '''
             def __eq__(self, other):
-                return self.__key__() == other.__key__()
+                return self is other or self.__key__() == other.__key__()
         '''
         yield '__lt__', '''
             def __lt__(self, other):
@@ -278,23 +523,38 @@ class RecordClassTemplate(SourceCodeTemplate):
             def __hash__(self):
                 return hash(self.__key__())
         '''
-        # ne, le, gt and ge defined on the basis of eq and lt
         yield '__ne__', '''
             def __ne__(self, other):
                 return not (self == other)
         '''
-        yield '__le__', '''
-            def __le__(self, other):
-                return self < other or self == other
-        '''
-        yield '__gt__', '''
-            def __gt__(self, other):
-                return not (self < other or self == other)
-        '''
-        yield '__ge__', '''
-            def __ge__(self, other):
-                return not (self < other)
-        '''
+        if '__lt__' in self.instancemethod_defs or '__eq__' in self.instancemethod_defs:
+            # le, gt and ge defined on the basis of the class's own eq and lt
+            yield '__le__', '''
+                def __le__(self, other):
+                    return self < other or self == other
+            '''
+            yield '__gt__', '''
+                def __gt__(self, other):
+                    return not (self < other or self == other)
+            '''
+            yield '__ge__', '''
+                def __ge__(self, other):
+                    return not (self < other)
+            '''
+        else:
+            # Otherwise they compare keys directly, so that each key is only built once per comparison
+            yield '__le__', '''
+                def __le__(self, other):
+                    return self.__key__() <= other.__key__()
+            '''
+            yield '__gt__', '''
+                def __gt__(self, other):
+                    return self.__key__() > other.__key__()
+            '''
+            yield '__ge__', '''
+                def __ge__(self, other):
+                    return self.__key__() >= other.__key__()
+            '''
 
     @field_joiner_property(', ', include_super=True)
     def repr_str(self, field_id, _field_unused):
@@ -316,12 +576,14 @@ class FieldHandlingStmtsTemplate(SourceCodeTemplate):
     )
 
     template = '''
+        $start_timer
         $default_value
         $promote
         $coerce
         $null_check
         $value_check
         $type_check
+        $stop_timer
     '''
 
     FieldError = FieldError
@@ -330,14 +592,27 @@ class FieldHandlingStmtsTemplate(SourceCodeTemplate):
     FieldNotNullable = FieldNotNullable
     re = re
     integer_types = integer_types
+    record_timing = staticmethod(record_timing)
+    default_timer = default_timer
 
-    def __init__(self, field, variable_name, description):
+    def __init__(self, field, variable_name, description, stats_key=None):
         super(FieldHandlingStmtsTemplate, self).__init__()
         self.field = field
         self.variable_name = variable_name
         self.description = description
+        self.stats_key = stats_key or description
         self.field_type = field.type
-        self.field_type_name = field.type.__name__
+        self.instrumented = instrumentation_enabled()
+
+    @property
+    def start_timer(self):
+        if self.instrumented:
+            return 'field_handling_start_time = $default_timer()'
+
+    @property
+    def stop_timer(self):
+        if self.instrumented:
+            return '$record_timing("$stats_key", field_handling_start_time)'
 
     @property
     def default_value(self):
@@ -380,7 +655,7 @@ class FieldHandlingStmtsTemplate(SourceCodeTemplate):
         if not self.field.nullable and self.field.coerce not in self.KNOWN_COERCE_FUNCTIONS_THAT_NEVER_RETURN_NONE:
             return '''
                 if $variable_name is None:
-                    raise $FieldNotNullable("$description cannot be None")
+                    raise $FieldNotNullable.for_value("$description", None)
             '''
 
     @property
@@ -388,7 +663,7 @@ class FieldHandlingStmtsTemplate(SourceCodeTemplate):
         if self.field.check is not None:
             return '''
                 if $variable_name is not None and not $check_invocation:
-                    raise $FieldValueError("$description: %r is not a valid value" % ($variable_name,))
+                    raise $FieldValueError.for_value("$description", $variable_name)
             '''
 
     @property
@@ -400,10 +675,7 @@ class FieldHandlingStmtsTemplate(SourceCodeTemplate):
         if self.field.coerce is not self.field.type:
             return '''
                 if $not_null_and not $type_check_expr:
-                    raise $FieldTypeError("$description should be of type $field_type_name, not %s (%r)" % (
-                        $variable_name.__class__.__name__,
-                        $variable_name,
-                    ))
+                    raise $FieldTypeError.for_value("$description", $variable_name, $field_type)
             '''
 
     @property
@@ -12,7 +12,7 @@ import re
 
 # this module
 from .record import Field, compile_field
-from .utils.codegen import SourceCodeTemplate
+from .utils.codegen import SourceCodeTemplate, compile_expr
 from .utils.compatibility import bytes_type, native_string, text_type
 
 #----------------------------------------------------------------------------------------------------------------------------------
@@ -33,33 +33,69 @@ strictly_positive = value_check('strictly_positive', '{} > 0')
 
 #----------------------------------------------------------------------------------------------------------------------------------
 
-def regex_check(name, char_def):
+def regex_check(name, char_def, str_methods=None):
+    """
+    Returns a function that declares a text field whose value must be made of the characters in `char_def', which is the inside of
+    a regex character class. If given `n', the value must have exactly `n' characters, otherwise it can have any number.
+
+    The check is the `fullmatch' method of a precompiled pattern. If `str_methods' is given, then where possible the check instead
+    calls these `str' methods, which must all return True on a non-empty ASCII string iff it only has characters in `char_def'.
+    That's faster still.
+    """
+    checks = {}
     def func(n=None):
-        multiplier = ('{{%d}}' % n) if n is not None else '*'
-        field = Field(
-            type=text_type,
-            check="$re.search(r'^[%s]%s$',{})" % (char_def, multiplier),
-        )
-        return field
+        # Checks are shared between calls with the same `n', so that collection classes whose element fields use the same check
+        # can be shared too
+        check = checks.get(n)
+        if check is None:
+            if str_methods is not None and hasattr(text_type, 'isascii'):
+                check = str_methods_check(str_methods, n)
+            else:
+                check = fullmatch_check('[%s]%s' % (char_def, '{%d}' % n if n is not None else '*'))
+            check = checks.setdefault(n, check)
+        return Field(type=text_type, check=check)
     func.__name__ = native_string(name)
     return func
 
-uppercase_letters = regex_check('uppercase_letters', 'A-Z')
+def fullmatch_check(pattern):
+    compiled = re.compile(pattern)
+    if hasattr(compiled, 'fullmatch'):
+        return compiled.fullmatch
+    # Python 2 has no `fullmatch'
+    return re.compile(pattern + (b'\\Z' if isinstance(pattern, bytes_type) else '\\Z')).match
+
+def str_methods_check(str_methods, n):
+    method_calls = ' and '.join('value.%s()' % method for method in ('isascii',) + str_methods)
+    if n is None:
+        expr = 'not value or (%s)' % method_calls
+    elif n == 0:
+        expr = 'not value'
+    else:
+        expr = 'len(value) == %d and %s' % (n, method_calls)
+    return compile_expr(
+        SourceCodeTemplate(
+            '''
+            def check(value):
+                return $expr
+            ''',
+            expr=expr,
+        ),
+        'check',
+    )
+
+uppercase_letters = regex_check('uppercase_letters', 'A-Z', ('isalpha', 'isupper'))
 uppercase_wchars = regex_check('uppercase_wchars', 'A-Z0-9_')
 uppercase_hex = regex_check('uppercase_hex', '0-9A-F')
 
-lowercase_letters = regex_check('lowercase_letters', 'a-z')
+lowercase_letters = regex_check('lowercase_letters', 'a-z', ('isalpha', 'islower'))
 lowercase_wchars = regex_check('lowercase_wchars', 'a-z0-9_')
 lowercase_hex = regex_check('lowercase_hex', '0-9a-f')
 
-digits_str = regex_check('digits_str', '0-9')
+digits_str = regex_check('digits_str', '0-9', ('isdigit',))
 
 absolute_http_url = Field(
     type=bytes_type,
-    check=SourceCodeTemplate(
-        "$re.search(r'^https?://.{{1, 2000}}$', {})",
-        re=re,
-    ),
+    check=fullmatch_check(br'https?://.{1,2000}'),
 )
 
 #----------------------------------------------------------------------------------------------------------------------------------
@@ -7,16 +7,32 @@
 # 2+3 compat
 from __future__ import absolute_import, division, print_function, unicode_literals
 
+# standards
+from hashlib import sha1
+from threading import RLock
+from weakref import ref
+
 #----------------------------------------------------------------------------------------------------------------------------------
 
 # Because Records are dynamically created classes that are compiled within a function, 'pickle' cannot find the class definition by
-# name alone. For this reason we need to keep a register here of all Record classes that have been created, indexed by name.
+# name alone. For this reason we need to keep a register here of all Record classes (and collection classes) that have been
+# created.
+#
+# Classes are registered under their module and name. Several classes can share a module and name, e.g. when schemas are defined
+# on the fly, so each pickle also records a fingerprint of the class's schema, which is used to pick the right one. Classes are
+# only weakly referenced, so that they can still be garbage-collected.
 #
-# This is rather hacky, and has a few implications: you shouldn't create millions of record classes, as they'll all be referenced
-# here, and you can't create two record classes with the same name. The latter could come back to bite me some day. I'm not sure
-# what I'll do then.
+# Lookups, which happen every time a record is unpickled, don't take any lock: the registry maps keys to tuples of weakrefs, which
+# are replaced rather than modified. Only registering classes, which is rare, takes the lock.
+
+# maps (module, name) tuples to tuples of weakrefs to the classes registered under that key, most recently registered last
+CLASSES_BY_KEY = {}
 
-ALL_RECORDS = {}
+# maps bare class names to a weakref to the class most recently registered under that name. Pickles created before classes were
+# registered by module only have the class name.
+CLASSES_BY_NAME = {}
+
+REGISTRY_LOCK = RLock()
 
 #----------------------------------------------------------------------------------------------------------------------------------
 
@@ -30,15 +46,162 @@ class RecordRegistryMetaClass(type):
 
     @classmethod
     def register(mcs, name, cls):
-        ALL_RECORDS[name] = cls
+        key = (cls.__module__, name)
+        with REGISTRY_LOCK:
+            CLASSES_BY_KEY[key] = tuple(
+                cls_ref
+                for cls_ref in CLASSES_BY_KEY.get(key, ())
+                if cls_ref() is not None
+            ) + (ref(cls, lambda cls_ref: _unregister(key, cls_ref)),)
+            CLASSES_BY_NAME[name] = ref(cls)
+        type.__setattr__(cls, '_record_unpickler', RecordUnpickler.for_class(name, cls))
+
+
+def lookup_class(class_name, module=None, fingerprint=None):
+    """
+    Returns the registered class with the given name and module whose schema has the given fingerprint. If there's no such class,
+    returns the one with that name and module that was registered last, or failing that the one with that name, in any module.
+    If several classes match, the one registered last is returned.
+    """
+    candidates = tuple(filter(None, (cls_ref() for cls_ref in CLASSES_BY_KEY.get((module, class_name), ()))))
+    if fingerprint is not None and len(candidates) > 1:
+        for cls in reversed(candidates):
+            if schema_fingerprint(cls) == fingerprint:
+                return cls
+    if candidates:
+        return candidates[-1]
+    cls = CLASSES_BY_NAME.get(class_name, _dead_ref)()
+    if cls is None:
+        raise KeyError('No record class called %r' % class_name)
+    return cls
 
 
 class RecordUnpickler(object):
+    """
+    The callable that records and collections reduce to when pickled. Every class has one instance of this, which is stored in its
+    `_record_unpickler' attribute, so that `pickle' memoizes it, and a pickle holds the class's name only once.
 
-    def __init__(self, class_name):
+    For records, the pickle also holds the names of the fields, in the order in which their values are pickled, so that records
+    pickled with an older schema can be migrated (see `tdds.migrations').
+    """
+
+    # Pickles created before these were added only have a `class_name'
+    module = None
+    fingerprint = None
+    field_ids = None
+
+    def __init__(self, class_name, module=None, fingerprint=None, field_ids=None):
         self.class_name = class_name
+        self.module = module
+        self.fingerprint = fingerprint
+        self.field_ids = field_ids
+
+    @classmethod
+    def for_class(cls, class_name, record_class):
+        unpickler = cls(class_name, record_class.__module__)
+        # The fingerprint is only computed when the unpickler is first pickled, since it would e.g. compile lazy classes
+        unpickler._class_ref = ref(record_class)
+        return unpickler
 
     def __call__(self, *values):
-        return ALL_RECORDS[self.class_name](*values)
+        construct = self.__dict__.get('_construct')
+        if construct is None:
+            construct = self.__dict__['_construct'] = self._resolve()
+        return construct(*values)
+
+    def _resolve(self):
+        # Returns the function that builds a value from the pickled values. Unless the record needs migrating, that's the class.
+        # If we're the class's own unpickler, e.g. when a record is copied rather than unpickled, it's that class, even if another
+        # one with the same name has since been defined.
+        class_ref = self.__dict__.get('_class_ref')
+        if class_ref is not None and class_ref() is not None:
+            return class_ref()
+        record_class = lookup_class(self.class_name, self.module, self.fingerprint)
+        if self.field_ids is None or schema_fingerprint(record_class) == self.fingerprint:
+            return record_class
+        from .migrations import MissingMigration, migrating_constructor  # circular import, pylint: disable=import-outside-toplevel
+        try:
+            return migrating_constructor(record_class, self.fingerprint, self.field_ids)
+        except MissingMigration:
+            # e.g. only a nested record's schema has changed, and the values can be used as they are. They're passed by name if the
+            # pickled fields all still exist, since their order may have changed, e.g. if a field was made nullable. Otherwise
+            # they're passed by position, as they were before field IDs were pickled.
+            field_ids = self.field_ids
+            if set(field_ids) <= set(record_class.record_fields):
+                return lambda *values: record_class(**dict(zip(field_ids, values)))
+            return record_class
+
+    def __reduce__(self):
+        fingerprint = self.fingerprint
+        field_ids = self.field_ids
+        class_ref = self.__dict__.get('_class_ref')
+        if fingerprint is None and class_ref is not None and class_ref() is not None:
+            fingerprint = schema_fingerprint(class_ref())
+            field_ids = pickled_field_ids(class_ref())
+        return (RecordUnpickler, (self.class_name, self.module, fingerprint, field_ids))
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# schema fingerprints
+
+def schema_fingerprint(cls):
+    """
+    Returns a short hex digest of the schema of the given record or collection class, i.e. of the names, types and nullability of
+    its fields (or elements, for collections). Nested record and collection types contribute their own schema.
+    """
+    fingerprint = cls.__dict__.get('_record_fingerprint')
+    if fingerprint is None:
+        fingerprint = _compute_fingerprint(cls, ())
+        type.__setattr__(cls, '_record_fingerprint', fingerprint)
+    return fingerprint
+
+def pickled_field_ids(cls):
+    """
+    Returns the names of the fields of the given record class, in the order in which their values are passed to the unpickler, or
+    None for collection classes.
+    """
+    if getattr(cls, 'key_field', None) is not None or getattr(cls, 'element_field', None) is not None:
+        return None
+    # same order as RecordClassTemplate._iter_fields_in_fixed_order
+    return tuple(
+        field_id
+        for field_id, field in sorted(
+            (getattr(cls, 'record_fields', None) or {}).items(),
+            key=lambda item: (item[1].nullable, item[0]),
+        )
+    )
+
+def schema_fields(cls):
+    if getattr(cls, 'key_field', None) is not None:
+        return {'<key>': cls.key_field, '<value>': cls.value_field}
+    if getattr(cls, 'element_field', None) is not None:
+        return {'[elem]': cls.element_field}
+    return getattr(cls, 'record_fields', None) or {}
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# private utils
+
+def _unregister(key, dead_ref):
+    # Called when a registered class is garbage-collected
+    with REGISTRY_LOCK:
+        remaining = tuple(cls_ref for cls_ref in CLASSES_BY_KEY.get(key, ()) if cls_ref is not dead_ref)
+        if remaining:
+            CLASSES_BY_KEY[key] = remaining
+        else:
+            CLASSES_BY_KEY.pop(key, None)
+
+def _dead_ref():
+    return None
+
+def _compute_fingerprint(cls, stack):
+    # `stack' holds the classes whose fingerprint is being computed, so that recursive types don't recurse forever
+    digest = sha1()
+    for field_id, field in sorted(schema_fields(cls).items()):
+        field_type = field.type
+        type_desc = '%s.%s' % (getattr(field_type, '__module__', None), getattr(field_type, '__name__', field_type))
+        if isinstance(field_type, RecordRegistryMetaClass) and field_type is not cls and field_type not in stack:
+            # NB not using the nested class's cached fingerprint, which may have been computed with a different stack
+            type_desc += '(%s)' % _compute_fingerprint(field_type, stack + (cls,))
+        digest.update(('%s:%s:%s\n' % (field_id, type_desc, 'nullable' if field.nullable else '')).encode('UTF-8'))
+    return digest.hexdigest()[:16]
 
 #----------------------------------------------------------------------------------------------------------------------------------
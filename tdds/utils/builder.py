@@ -9,6 +9,7 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 
 # standards
 from functools import wraps
+from threading import local
 
 #----------------------------------------------------------------------------------------------------------------------------------
 
@@ -70,7 +71,8 @@ class BuilderBase(object):
     """
     Subclasses of this are for taking some input value (typically an HTML Element, but could be anything), and parsing from it an
     instance of some Record data structure. Instances are single-use: you need to build a new instance for every object that gets
-    created. This allows the above metaclass to cache data on `self'.
+    created. This allows the above metaclass to cache data on `self'. When building many records in a row, `build_many' will
+    recycle a single instance instead, wiping everything cached on it between inputs.
 
     2017-02-08 - This is a bit of an experiment, an attempt at making scraper writing a bit more elegant. Maybe experience will
     show that this is overkill and cumbersome, maybe I'll end up using it all the time, we'll see.
@@ -96,6 +98,32 @@ class BuilderBase(object):
             self._on_error(ex)
             raise
 
+    def _reset(self, *args):
+        # Drops the memoized values cached on `self' by the metaclass, as well as whatever `__init__' stored, and re-initialises
+        # the same instance for a new input
+        self.__dict__.clear()
+        self.__init__(*args)
+
+    @classmethod
+    def build_many(cls, inputs, executor=None):
+        """
+        Builds one record per value in `inputs', where each value is what you would otherwise pass to the builder's constructor.
+        Rather than allocating a new builder for every input, a single instance is reused (one per thread, if an `executor' is
+        given, e.g. a `concurrent.futures.ThreadPoolExecutor', for builders that do I/O). Records are returned lazily, in order.
+        """
+        pool = local()
+        def build_one(value):
+            builder_obj = getattr(pool, 'builder', None)
+            if builder_obj is None:
+                builder_obj = pool.builder = cls(value)
+            else:
+                builder_obj._reset(value)  # pylint: disable=protected-access
+            return builder_obj()
+        if executor is not None:
+            return executor.map(build_one, inputs)
+        else:
+            return (build_one(value) for value in inputs)
+
 def builder(record_cls):
     return type(
         '%sBuilder' % record_cls.__name__,
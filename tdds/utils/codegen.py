@@ -12,9 +12,12 @@ A toolset for building and evaluating strings of Python code.
 from __future__ import absolute_import, division, print_function, unicode_literals
 
 # standards
+from collections import namedtuple
+from contextlib import contextmanager
 from itertools import count
 import logging
 import re
+from timeit import default_timer
 
 from .compatibility import python_builtins, string_types
 
@@ -79,50 +82,38 @@ class SourceCodeTemplate(SourceCodeGenerator):
             raise UnknownVariableInTemplate(self, variable_name, self.template)
         return self.code_string(ns, variable_value)
 
-    def replace_whole_lines(self, src, ns, expanded_vars=frozenset()):
+    def expand(self, ns):
+        # Variables are looked up at most once per expansion, since many of them are properties that build further templates
+        return self.expand_src(shift_left(self.template), ns, {}, frozenset())
+
+    def expand_src(self, src, ns, lookups, expanded_vars):
         """
-        When a variable appears on its own on a line in the template, the substitution happens somewhat differently: if the string
-        that the variable resolves to is a multiline piece of code, each line will be indented to be at the same level as the
-        variable originally appeared within the template.
+        Substitutes all $variables in `src' in a single pass over its pre-parsed tokens. When a variable appears on its own on a
+        line in the template, the substitution happens somewhat differently: if the string that the variable resolves to is a
+        multiline piece of code, each line will be indented to be at the same level as the variable originally appeared within the
+        template. In either case the substituted code is itself expanded, except for variables that are already being expanded.
         """
-        def whole_line_subst(indent, variable_name):
-            if variable_name not in expanded_vars:
-                subst = shift_left(self.lookup(variable_name, ns))
-                subst = shift_right(indent, subst).lstrip()
-                subst = subst and (indent + subst + '\n')
-                subst = self.replace_whole_lines(subst, ns, expanded_vars | set([variable_name]))
-                return subst
-            else:
-                return '$' + variable_name
-        return re.sub(
-            r'(?<![^\n])(\ *)\$(?:(\w+)|\{(\w+)\})\ *(?:$|\n)',
-            lambda m: whole_line_subst(
-                m.group(1),
-                m.group(2) or m.group(3),
-            ),
-            src
-        )
-
-    def replace_all_variables(self, src, ns, expanded_vars=frozenset()):
-        def simple_subst(variable_name):
-            if variable_name not in expanded_vars:
-                subst = self.lookup(variable_name, ns)
+        parts = []
+        for token in parse_template(src):
+            if token.__class__ is not tuple:
+                parts.append(token)
+                continue
+            indent, variable_name = token
+            if variable_name in expanded_vars:
+                parts.append('$' + variable_name if indent is None else '{}${}\n'.format(indent, variable_name))
+                continue
+            subst = lookups.get(variable_name)
+            if subst is None:
+                subst = lookups[variable_name] = self.lookup(variable_name, ns)
+            if indent is None:
                 assert '\n' not in subst, (src, variable_name, subst)
-                subst = self.replace_all_variables(subst, ns, expanded_vars | set([variable_name]))
-                return subst
             else:
-                return '$' + variable_name
-        return re.sub(
-            r'\$(?:(\w+)|\{(\w+)\})',
-            lambda m: simple_subst(m.group(1) or m.group(2)),
-            src,
-        )
-
-    def expand(self, ns):
-        src = shift_left(self.template)
-        src = self.replace_whole_lines(src, ns)
-        src = self.replace_all_variables(src, ns)
-        return src
+                subst = shift_right(indent, shift_left(subst)).lstrip()
+                subst = subst and (indent + subst + '\n')
+            if '$' in subst:
+                subst = self.expand_src(subst, ns, lookups, expanded_vars | frozenset([variable_name]))
+            parts.append(subst)
+        return ''.join(parts)
 
 #----------------------------------------------------------------------------------------------------------------------------------
 
@@ -162,24 +153,70 @@ class ClassDefEvaluationNamespace(object):
     def as_dict(self):
         return dict(self.value_by_name)
 
+#----------------------------------------------------------------------------------------------------------------------------------
+# compilation listeners
+
+# If any listeners are registered, each compilation is timed, and the listeners are called with a CompilationStats object. This is
+# for finding out which classes are expensive to compile (see `tdds.profile_import'). When none are registered nothing is timed.
+
+CompilationStats = namedtuple('CompilationStats', (
+    'name',
+    'expand_seconds',
+    'compile_seconds',
+    'eval_seconds',
+    'source_size',
+    'namespace_size',
+))
+
+COMPILATION_LISTENERS = []
+
+def register_compilation_listener(listener):
+    COMPILATION_LISTENERS.append(listener)
+
+def unregister_compilation_listener(listener):
+    COMPILATION_LISTENERS.remove(listener)
+
+@contextmanager
+def temporary_compilation_listener(listener):
+    register_compilation_listener(listener)
+    try:
+        yield
+    finally:
+        unregister_compilation_listener(listener)
+
 #----------------------------------------------------------------------------------------------------------------------------------
 # compilation functions
 
-def compile_template(template, verbose=False):
+def compile_template(template, verbose=False, name=None):
+    timed = bool(COMPILATION_LISTENERS)
+    if timed:
+        time_0 = default_timer()
     ns = ClassDefEvaluationNamespace()
     src_code_str = template.expand(ns)
     if verbose:
         logging.debug('\n%s', src_code_str)
     ns_dict = ns.as_dict()
     try:
-        eval(  # yes, pylint: disable=eval-used
-            compile(src_code_str, '<string>', 'exec'),
-            ns_dict,
-            ns_dict,
-        )
+        if timed:
+            time_1 = default_timer()
+        code = compile(src_code_str, '<string>', 'exec')
+        if timed:
+            time_2 = default_timer()
+        eval(code, ns_dict, ns_dict)  # yes, pylint: disable=eval-used
     except SyntaxError:
         logging.error(src_code_str)
         raise
+    if timed:
+        stats = CompilationStats(
+            name=name,
+            expand_seconds=time_1 - time_0,
+            compile_seconds=time_2 - time_1,
+            eval_seconds=default_timer() - time_2,
+            source_size=len(src_code_str),
+            namespace_size=len(ns.value_by_name),
+        )
+        for listener in tuple(COMPILATION_LISTENERS):
+            listener(stats)
     return ns_dict
 
 def compile_expr(template, expr_name=None, verbose=False):
@@ -188,21 +225,61 @@ def compile_expr(template, expr_name=None, verbose=False):
         if m is None:
             raise ValueError('expr_name not specified and not found in template')
         expr_name = m.group(1)
-    ns_dict = compile_template(template, verbose=verbose)
+    ns_dict = compile_template(template, verbose=verbose, name=expr_name)
     return ns_dict[expr_name]
 
 #----------------------------------------------------------------------------------------------------------------------------------
 # utils
 
+TEMPLATE_VARIABLE_RE = re.compile(
+    # either a variable alone on its line, in which case we capture its indent, or a variable anywhere else
+    r'(?<![^\n])(\ *)\$(?:(\w+)|\{(\w+)\})\ *(?:$|\n)'
+    r'|\$(?:(\w+)|\{(\w+)\})'
+)
+
+PARSED_TEMPLATES_MAX_SIZE = 10000
+
+PARSED_TEMPLATES = {}
+
+def parse_template(src):
+    """
+    Splits a template string into a list of tokens, which are either literal strings, or (indent, variable_name) tuples, where
+    `indent' is None if the variable isn't alone on its line. Parses are cached, since the same template strings get expanded again
+    and again, once for every class that's compiled.
+    """
+    tokens = PARSED_TEMPLATES.get(src)
+    if tokens is None:
+        tokens = []
+        position = 0
+        for match in TEMPLATE_VARIABLE_RE.finditer(src):
+            if match.start() > position:
+                tokens.append(src[position:match.start()])
+            whole_line_name = match.group(2) or match.group(3)
+            if whole_line_name:
+                tokens.append((match.group(1), whole_line_name))
+            else:
+                tokens.append((None, match.group(4) or match.group(5)))
+            position = match.end()
+        if position < len(src):
+            tokens.append(src[position:])
+        if len(PARSED_TEMPLATES) >= PARSED_TEMPLATES_MAX_SIZE:
+            PARSED_TEMPLATES.clear()
+        PARSED_TEMPLATES[src] = tokens
+    return tokens
+
 def shift_left(src):
     """
     Given a piece of Python code as a string, shift it all left (i.e. deindent it) as far as possible. Assumes that all lines are
     at least as far indented as the 1st (non-empty) line.
     """
     assert '\t' not in src, repr(src)
-    src = re.sub(r'^\ *\n', '', src)
+    first_newline = src.find('\n')
+    if first_newline != -1 and not src[:first_newline].strip(' '):
+        src = src[first_newline + 1:]
     src = src.rstrip()
-    indent = re.search(r'^(\ *)', src).group(1)
+    indent = src[:len(src) - len(src.lstrip(' '))]
+    if not indent:
+        return src
     parts = []
     for line in src.split('\n'):
         if line.startswith(indent):
@@ -219,7 +296,7 @@ def shift_right(indent, src):
     Shifts the given piece of Python code right by the given indent.
     """
     assert '\t' not in src, repr(src)
-    return re.sub(r'^', indent, src, flags=re.M)
+    return indent + src.replace('\n', '\n' + indent) if indent else src
 
 #----------------------------------------------------------------------------------------------------------------------------------
 # code-generation utils (private)
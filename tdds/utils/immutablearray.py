@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+An immutable sequence of numbers, stored unboxed in an `array.array', so that e.g. a sequence of a million floats takes up 8MB
+rather than the 32MB it would take in a tuple.
+
+The underlying buffer can be shared without copying through a read-only memoryview, e.g. `numpy.asarray(arr.as_memoryview())'.
+"""
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# includes
+
+# 2+3 compat
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+# standards
+from array import array
+
+#----------------------------------------------------------------------------------------------------------------------------------
+
+class ImmutableArray(object):
+
+    __slots__ = ('_array', '_hash')
+
+    # Set by subclasses, e.g. 'd' for an array of doubles. See the docs for the `array' module.
+    typecode = None
+
+    def __init__(self, iter_elems=()):
+        # NB if `iter_elems' is an array with the same typecode, this copies its buffer directly
+        self._array = array(str(self.typecode), iter_elems)
+        self._hash = None
+
+    def _derive(self, arr):
+        # Constructs an instance of the same class without going through `__init__', since the elements are already checked
+        derived = object.__new__(self.__class__)
+        derived._array = arr
+        derived._hash = None
+        return derived
+
+    @property
+    def itemsize(self):
+        return self._array.itemsize
+
+    def tolist(self):
+        return self._array.tolist()
+
+    def tobytes(self):
+        return self._array.tobytes()
+
+    def to_array(self):
+        """
+        Returns a copy of the contents, as a mutable `array.array'
+        """
+        return array(self._array.typecode, self._array)
+
+    def as_memoryview(self):
+        """
+        Returns a read-only view on the underlying buffer, without copying it
+        """
+        view = memoryview(self._array)
+        return view.toreadonly() if hasattr(view, 'toreadonly') else view
+
+    def __buffer__(self, _flags_unused):
+        # buffer protocol, for Python versions that support implementing it in Python (PEP 688)
+        return self.as_memoryview()
+
+    # sequence protocol
+
+    def __len__(self):
+        return len(self._array)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self._derive(self._array[index])
+        return self._array[index]
+
+    def __iter__(self):
+        return iter(self._array)
+
+    def __reversed__(self):
+        return reversed(self._array)
+
+    def __contains__(self, value):
+        return value in self._array
+
+    def index(self, value):
+        return self._array.index(value)
+
+    def count(self, value):
+        return self._array.count(value)
+
+    # comparison, hashing, etc
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if isinstance(other, ImmutableArray):
+            return self._array == other._array  # pylint: disable=protected-access
+        if isinstance(other, (tuple, list)):
+            return len(self) == len(other) and self.tolist() == list(other)
+        return False
+
+    def __ne__(self, other):
+        return not (self == other)
+
+    def __lt__(self, other):
+        return self.tolist() < list(other)
+
+    def __le__(self, other):
+        return self.tolist() <= list(other)
+
+    def __gt__(self, other):
+        return self.tolist() > list(other)
+
+    def __ge__(self, other):
+        return self.tolist() >= list(other)
+
+    def __hash__(self):
+        # NB consistent with tuples with the same elements, since we compare equal to them
+        if self._hash is None:
+            self._hash = hash(tuple(self._array))
+        return self._hash
+
+    def __repr__(self):
+        return '%s(%r)' % (self.__class__.__name__, self._array.tolist())
+
+    def __reduce__(self):
+        return (self.__class__, (self._array,))
+
+#----------------------------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,305 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+An immutable mapping that supports setting and deleting keys in O(log n) time, by sharing structure with the map it was derived
+from.
+
+This is a hash array mapped trie (HAMT): keys are placed in a trie according to their hash, 5 bits per level, and each node only
+has slots for the children that it actually has, which it finds using a bitmap. Deriving a new map copies only the nodes on the
+path to the key that changed.
+"""
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# includes
+
+# 2+3 compat
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+# this module
+from .immutabledict import ImmutableDict
+
+#----------------------------------------------------------------------------------------------------------------------------------
+
+BITS = 5
+MASK = (1 << BITS) - 1
+HASH_BITS = 64
+HASH_MASK = (1 << HASH_BITS) - 1
+
+# Sentinel used by lookups for missing keys, since None is a valid value
+MISSING = object()
+
+#----------------------------------------------------------------------------------------------------------------------------------
+
+class PersistentMap(ImmutableDict):
+
+    def __init__(self, *args, **kwargs):  # pylint: disable=super-init-not-called
+        root, size = EMPTY_NODE, 0
+        for key, value in getattr(args[0], 'items', args[0].__iter__)() if args else ():
+            root, added = root.assoc(0, _hash(key), key, value)
+            size += added
+        for key, value in kwargs.items():
+            root, added = root.assoc(0, _hash(key), key, value)
+            size += added
+        self._root = root
+        self._size = size
+        self._hash = None
+
+    @staticmethod
+    def check_elems(iter_elems):
+        # Overridden by the `pmap_of' collection classes, which check the type and value of each key and value. `set' passes the
+        # new entry through here, and only it: entries that are already in the map aren't checked again.
+        return iter_elems
+
+    def _derive(self, root, size):
+        # Constructs a map of the same class without going through `__init__', since the trie is already built and checked
+        derived = object.__new__(self.__class__)
+        derived._root = root
+        derived._size = size
+        derived._hash = None
+        return derived
+
+    # mapping protocol
+
+    def _lookup(self, key):
+        # This is the hot path, so the walk down the trie is inlined here rather than recursing through the nodes' methods
+        key_hash = hash(key) & HASH_MASK
+        node = self._root
+        shift = 0
+        while node.__class__ is BitmapNode:
+            bit = 1 << ((key_hash >> shift) & MASK)
+            bitmap = node.bitmap
+            if not bitmap & bit:
+                return MISSING
+            node = node.children[bin(bitmap & (bit - 1)).count('1')]
+            if node.__class__ is tuple:
+                return node[1] if (node[0] is key or node[0] == key) else MISSING
+            shift += BITS
+        return node.lookup(shift, key_hash, key)
+
+    def __getitem__(self, key):
+        value = self._lookup(key)
+        if value is MISSING:
+            raise KeyError(key)
+        return value
+
+    def get(self, key, default=None):
+        value = self._lookup(key)
+        return default if value is MISSING else value
+
+    def __contains__(self, key):
+        return self._lookup(key) is not MISSING
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        return (key for key, _ in self._root.iter_entries())
+
+    def keys(self):
+        return list(self)
+
+    def items(self):
+        return list(self._root.iter_entries())
+
+    def values(self):
+        return [value for _, value in self._root.iter_entries()]
+
+    def iterkeys(self):
+        return iter(self)
+
+    def iteritems(self):
+        return self._root.iter_entries()
+
+    def itervalues(self):
+        return (value for _, value in self._root.iter_entries())
+
+    # deriving new maps
+
+    def set(self, key, value):
+        """
+        Returns a new map with the given key set to the given value. `self' is unchanged.
+        """
+        for key, value in self.check_elems(((key, value),)):
+            root, added = self._root.assoc(0, _hash(key), key, value)
+            if root is self._root:
+                return self
+            return self._derive(root, self._size + added)
+
+    def delete(self, key):
+        """
+        Returns a new map without the given key, which must be present. `self' is unchanged.
+        """
+        root = self._root.dissoc(0, _hash(key), key)
+        if root is self._root:
+            raise KeyError(key)
+        return self._derive(root or EMPTY_NODE, self._size - 1)
+
+    # comparison, hashing, etc
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if not isinstance(other, (ImmutableDict, dict)) or len(self) != len(other):
+            return False
+        for key, value in self._root.iter_entries():
+            # NB ImmutableDict's `get' takes no default
+            if key not in other:
+                return False
+            other_value = other[key]
+            if other_value is not value and other_value != value:
+                return False
+        return True
+
+    def __ne__(self, other):
+        return not (self == other)
+
+    def __hash__(self):
+        if self._hash is None:
+            self._hash = hash(frozenset(self._root.iter_entries()))
+        return self._hash
+
+    def __str__(self):
+        return str(dict(self._root.iter_entries()))
+
+    def __repr__(self):
+        return repr(dict(self._root.iter_entries()))
+
+    def __reduce__(self):
+        return (self.__class__, (dict(self._root.iter_entries()),))
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# trie nodes. These are never modified. Their children are either (key, value) tuples, or other nodes. Lookups are implemented in
+# PersistentMap._lookup.
+
+class BitmapNode(object):
+
+    __slots__ = ('bitmap', 'children')
+
+    def __init__(self, bitmap, children):
+        self.bitmap = bitmap
+        self.children = children
+
+    def assoc(self, shift, key_hash, key, value):
+        # Returns a (node, added) tuple. If the map already held that value for that key, the node returned is `self'
+        bit = 1 << ((key_hash >> shift) & MASK)
+        index = _popcount(self.bitmap & (bit - 1))
+        children = self.children
+        if not self.bitmap & bit:
+            return BitmapNode(self.bitmap | bit, children[:index] + ((key, value),) + children[index:]), True
+        child = children[index]
+        if child.__class__ is tuple:
+            if child[0] is key or child[0] == key:
+                if child[1] is value:
+                    return self, False
+                new_child, added = (key, value), False
+            else:
+                new_child, added = _merge(shift + BITS, _hash(child[0]), child, key_hash, (key, value)), True
+        else:
+            new_child, added = child.assoc(shift + BITS, key_hash, key, value)
+            if new_child is child:
+                return self, False
+        return BitmapNode(self.bitmap, children[:index] + (new_child,) + children[index+1:]), added
+
+    def dissoc(self, shift, key_hash, key):
+        # Returns the new node, which is None if it would be empty, or `self' if the key wasn't found
+        bit = 1 << ((key_hash >> shift) & MASK)
+        if not self.bitmap & bit:
+            return self
+        index = _popcount(self.bitmap & (bit - 1))
+        children = self.children
+        child = children[index]
+        if child.__class__ is tuple:
+            if not (child[0] is key or child[0] == key):
+                return self
+            new_child = None
+        else:
+            new_child = child.dissoc(shift + BITS, key_hash, key)
+            if new_child is child:
+                return self
+            if new_child.__class__ is BitmapNode and len(new_child.children) == 1 \
+                    and new_child.children[0].__class__ is tuple:
+                # a node with a single entry can be replaced by that entry
+                new_child = new_child.children[0]
+        if new_child is None:
+            if len(children) == 1:
+                return None
+            return BitmapNode(self.bitmap & ~bit, children[:index] + children[index+1:])
+        return BitmapNode(self.bitmap, children[:index] + (new_child,) + children[index+1:])
+
+    def iter_entries(self):
+        for child in self.children:
+            if child.__class__ is tuple:
+                yield child
+            else:
+                for entry in child.iter_entries():
+                    yield entry
+
+
+class CollisionNode(object):
+    # Holds entries whose keys have the exact same hash
+
+    __slots__ = ('key_hash', 'entries')
+
+    def __init__(self, key_hash, entries):
+        self.key_hash = key_hash
+        self.entries = entries
+
+    def _index(self, key):
+        for index, entry in enumerate(self.entries):
+            if entry[0] is key or entry[0] == key:
+                return index
+        return None
+
+    def lookup(self, _shift_unused, key_hash, key):
+        index = self._index(key) if key_hash == self.key_hash else None
+        return MISSING if index is None else self.entries[index][1]
+
+    def assoc(self, shift, key_hash, key, value):
+        if key_hash != self.key_hash:
+            # Push this node one level down, under a bitmap node that can then also hold the new key
+            node = BitmapNode(1 << ((self.key_hash >> shift) & MASK), (self,))
+            return node.assoc(shift, key_hash, key, value)
+        index = self._index(key)
+        if index is None:
+            return CollisionNode(self.key_hash, self.entries + ((key, value),)), True
+        if self.entries[index][1] is value:
+            return self, False
+        return CollisionNode(self.key_hash, self.entries[:index] + ((key, value),) + self.entries[index+1:]), False
+
+    def dissoc(self, shift, key_hash, key):
+        index = self._index(key) if key_hash == self.key_hash else None
+        if index is None:
+            return self
+        entries = self.entries[:index] + self.entries[index+1:]
+        if len(entries) == 1:
+            return BitmapNode(1 << ((self.key_hash >> shift) & MASK), entries)
+        return CollisionNode(self.key_hash, entries)
+
+    def iter_entries(self):
+        return iter(self.entries)
+
+
+EMPTY_NODE = BitmapNode(0, ())
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# private utils
+
+def _hash(key):
+    return hash(key) & HASH_MASK
+
+def _popcount(bitmap):
+    return bin(bitmap).count('1')
+
+def _merge(shift, hash1, entry1, hash2, entry2):
+    # Builds the node that holds two entries with different keys
+    if hash1 == hash2 or shift >= HASH_BITS:
+        return CollisionNode(hash1, (entry1, entry2))
+    index1 = (hash1 >> shift) & MASK
+    index2 = (hash2 >> shift) & MASK
+    if index1 == index2:
+        return BitmapNode(1 << index1, (_merge(shift + BITS, hash1, entry1, hash2, entry2),))
+    children = (entry1, entry2) if index1 < index2 else (entry2, entry1)
+    return BitmapNode((1 << index1) | (1 << index2), children)
+
+#----------------------------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,234 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+An immutable sequence that supports appending, updating and slicing in O(log n) time, by sharing structure with the vector it was
+derived from.
+
+Elements are stored in a trie of tuples, 32 to a node, so that a vector of a million elements is only 4 levels deep. Deriving a new
+vector copies only the nodes on the path to the element that changed, and everything else is shared. Slicing (with a step of 1)
+doesn't copy anything: the slice is a window over the same trie. NB this means that a small slice keeps the whole of the original
+vector alive.
+"""
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# includes
+
+# 2+3 compat
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+# standards
+from itertools import islice
+
+#----------------------------------------------------------------------------------------------------------------------------------
+
+BITS = 5
+WIDTH = 1 << BITS
+MASK = WIDTH - 1
+
+#----------------------------------------------------------------------------------------------------------------------------------
+
+class PersistentVector(object):
+
+    # `_root' is the root node of the trie, `_shift' is its depth times BITS, and `_count' is the number of elements stored in it.
+    # The elements that are part of this vector are the ones in range(_start, _stop); there may be more elements in the trie, if
+    # this vector is a slice of another one.
+    __slots__ = ('_root', '_shift', '_count', '_start', '_stop', '_hash')
+
+    def __init__(self, iter_elems=()):
+        # NB the constructor of the `pvec_of' collection classes checks `iter_elems' before passing them on to this one
+        elems = list(iter_elems)
+        self._root, self._shift = _build_trie(elems)
+        self._count = self._stop = len(elems)
+        self._start = 0
+        self._hash = None
+
+    @staticmethod
+    def check_elems(iter_elems):
+        # Overridden by the `pvec_of' collection classes, which check the type and value of each element. All methods that add
+        # elements to an existing vector pass them through here, and only them: elements that are already in the vector aren't
+        # checked again.
+        return iter_elems
+
+    def _derive(self, root, shift, count, start, stop):
+        # Constructs a vector of the same class without going through `__init__', since the trie is already built and checked
+        derived = object.__new__(self.__class__)
+        derived._root = root
+        derived._shift = shift
+        derived._count = count
+        derived._start = start
+        derived._stop = stop
+        derived._hash = None
+        return derived
+
+    def _leaf(self, trie_index):
+        node = self._root
+        level = self._shift
+        while level > 0:
+            node = node[(trie_index >> level) & MASK]
+            level -= BITS
+        return node
+
+    def _trie_index(self, index):
+        length = self._stop - self._start
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError('%s index out of range' % self.__class__.__name__)
+        return self._start + index
+
+    # sequence protocol
+
+    def __len__(self):
+        return self._stop - self._start
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._stop - self._start)
+            if step != 1:
+                return self._derive_from_checked_elems(list(self)[index])
+            stop = max(start, stop)
+            return self._derive(self._root, self._shift, self._count, self._start + start, self._start + stop)
+        trie_index = self._trie_index(index)
+        return self._leaf(trie_index)[trie_index & MASK]
+
+    def __iter__(self):
+        trie_index = self._start
+        stop = self._stop
+        while trie_index < stop:
+            leaf_start = trie_index & MASK
+            leaf_stop = min(WIDTH, leaf_start + stop - trie_index)
+            for elem in islice(self._leaf(trie_index), leaf_start, leaf_stop):
+                yield elem
+            trie_index += leaf_stop - leaf_start
+
+    def __reversed__(self):
+        for index in range(len(self) - 1, -1, -1):
+            yield self[index]
+
+    def __contains__(self, value):
+        return any(elem is value or elem == value for elem in self)
+
+    def index(self, value):
+        for index, elem in enumerate(self):
+            if elem is value or elem == value:
+                return index
+        raise ValueError('%r is not in %s' % (value, self.__class__.__name__))
+
+    def count(self, value):
+        return sum(1 for elem in self if elem is value or elem == value)
+
+    # deriving new vectors
+
+    def append(self, value):
+        """
+        Returns a new vector with the given value added at the end. `self' is unchanged.
+        """
+        for value in self.check_elems((value,)):
+            return self._append_checked(value)
+
+    def extend(self, iter_elems):
+        """
+        Returns a new vector with the given values added at the end. `self' is unchanged.
+        """
+        derived = self
+        for value in self.check_elems(iter_elems):
+            derived = derived._append_checked(value)  # pylint: disable=protected-access
+        return derived
+
+    def set(self, index, value):
+        """
+        Returns a new vector with the element at the given index replaced. `self' is unchanged.
+        """
+        trie_index = self._trie_index(index)
+        for value in self.check_elems((value,)):
+            root = _assoc(self._root, self._shift, trie_index, value)
+            return self._derive(root, self._shift, self._count, self._start, self._stop)
+
+    def __add__(self, other):
+        return self.extend(other)
+
+    def _append_checked(self, value):
+        if self._stop < self._count:
+            # This is a slice that doesn't extend to the end of the trie, so we overwrite what comes after it
+            root = _assoc(self._root, self._shift, self._stop, value)
+            return self._derive(root, self._shift, self._count, self._start, self._stop + 1)
+        root, shift = self._root, self._shift
+        if self._count == WIDTH << shift:
+            root, shift = (root, _new_path(shift, value)), shift + BITS
+        else:
+            root = _push(root, shift, self._count, value)
+        return self._derive(root, shift, self._count + 1, self._start, self._stop + 1)
+
+    def _derive_from_checked_elems(self, elems):
+        root, shift = _build_trie(elems)
+        return self._derive(root, shift, len(elems), 0, len(elems))
+
+    # comparison, hashing, etc
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if not isinstance(other, (PersistentVector, tuple, list)) or len(self) != len(other):
+            return False
+        return all(mine is theirs or mine == theirs for mine, theirs in zip(self, other))
+
+    def __ne__(self, other):
+        return not (self == other)
+
+    def __lt__(self, other):
+        return tuple(self) < tuple(other)
+
+    def __le__(self, other):
+        return tuple(self) <= tuple(other)
+
+    def __gt__(self, other):
+        return tuple(self) > tuple(other)
+
+    def __ge__(self, other):
+        return tuple(self) >= tuple(other)
+
+    def __hash__(self):
+        if self._hash is None:
+            self._hash = hash(tuple(self))
+        return self._hash
+
+    def __repr__(self):
+        return '%s(%r)' % (self.__class__.__name__, list(self))
+
+    def __reduce__(self):
+        return (self.__class__, (list(self),))
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# trie operations. Nodes are tuples, and are never modified.
+
+def _build_trie(elems):
+    nodes = [tuple(elems[i:i+WIDTH]) for i in range(0, len(elems), WIDTH)]
+    shift = 0
+    while len(nodes) > 1:
+        nodes = [tuple(nodes[i:i+WIDTH]) for i in range(0, len(nodes), WIDTH)]
+        shift += BITS
+    return (nodes[0] if nodes else ()), shift
+
+def _new_path(level, value):
+    if level == 0:
+        return (value,)
+    return (_new_path(level - BITS, value),)
+
+def _push(node, level, trie_index, value):
+    if level == 0:
+        return node + (value,)
+    child_index = (trie_index >> level) & MASK
+    if child_index < len(node):
+        return node[:child_index] + (_push(node[child_index], level - BITS, trie_index, value),)
+    return node + (_new_path(level - BITS, value),)
+
+def _assoc(node, level, trie_index, value):
+    child_index = (trie_index >> level) & MASK
+    if level == 0:
+        child = value
+    else:
+        child = _assoc(node[child_index], level - BITS, trie_index, value)
+    return node[:child_index] + (child,) + node[child_index+1:]
+
+#----------------------------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Finding all the errors in the values given to a record's constructor, rather than only the first one. Every record class has a
+generated `record_validate' classmethod, which runs the same checks as the constructor, and calls this module if they fail.
+
+Each field is then checked on its own, by the same statements as in the constructor, so the errors are the same as the constructor
+would raise. When a collection or a nested record is invalid, its elements or fields are checked in turn, so that the errors point
+to the invalid values within it.
+"""
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# includes
+
+# 2+3 compat
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+# this module
+from .basics import FieldError
+from .record import FieldHandlingStmtsTemplate, Record
+from .unpickler import RecordRegistryMetaClass, schema_fields
+from .utils.codegen import SourceCodeTemplate, compile_expr
+from .utils.compatibility import string_types
+
+#----------------------------------------------------------------------------------------------------------------------------------
+
+def collect_errors(cls, values, constructor_error):
+    """
+    Returns a list of all the FieldErrors in the given values for a record of class `cls', each with its `path' set. Re-raises
+    `constructor_error' if none are found, e.g. if it wasn't caused by the values at all.
+    """
+    errors = record_errors(cls, values, ())
+    if not errors:
+        raise constructor_error
+    return errors
+
+def record_errors(cls, values, path):
+    checkers = field_checkers(cls)
+    errors = []
+    for field_id in sorted(set(values) - set(cls.record_fields)):
+        # Only possible in nested records, since `record_validate' itself takes no other arguments. The constructor raises
+        # TypeError for these.
+        error = FieldError('%s has no field %r' % (cls.__name__, field_id))
+        error.path = path + (field_id,)
+        errors.append(error)
+    for field_id, field in sorted(cls.record_fields.items()):
+        errors.extend(value_errors(field, checkers[field_id], values.get(field_id), path + (field_id,)))
+    return errors
+
+def value_errors(field, check, value, path):
+    try:
+        check(value)
+    except (FieldError, TypeError) as error:
+        errors = nested_errors(field.type, value, path)
+        if errors:
+            return errors
+        if not isinstance(error, FieldError):
+            raise
+        error.path = path
+        return [error]
+    return []
+
+def nested_errors(value_type, value, path):
+    # Returns the errors within the given value, if it's a collection or a dict of values for a nested record
+    if not isinstance(value_type, RecordRegistryMetaClass) or value is None or isinstance(value, string_types):
+        return []
+    if issubclass(value_type, Record):
+        return record_errors(value_type, value, path) if isinstance(value, dict) else []
+    checkers = field_checkers(value_type)
+    errors = []
+    if getattr(value_type, 'key_field', None) is not None:
+        items = getattr(value, 'items', None)
+        for key, elem in (items() if items is not None else ()):
+            errors.extend(value_errors(value_type.key_field, checkers['<key>'], key, path + (key,)))
+            errors.extend(value_errors(value_type.value_field, checkers['<value>'], elem, path + (key,)))
+    elif getattr(value_type, 'element_field', None) is not None and not isinstance(value, dict):
+        try:
+            elems = list(value)
+        except TypeError:
+            return []
+        for index, elem in enumerate(elems):
+            errors.extend(value_errors(value_type.element_field, checkers['[elem]'], elem, path + (index,)))
+    return errors
+
+#----------------------------------------------------------------------------------------------------------------------------------
+
+def field_checkers(cls):
+    """
+    Returns a dict that maps the IDs of the fields of the given record class, or '[elem]', '<key>' and '<value>' for collection
+    classes, to functions that run the statements that handle that field in the constructor. These are compiled the first time the
+    class fails to validate, and cached on it.
+    """
+    checkers = cls.__dict__.get('_record_field_checkers')
+    if checkers is None:
+        checkers = {
+            field_id: compile_field_checker(
+                field,
+                # same descriptions as in the error messages of the constructors
+                '{}.{}'.format(cls.__name__, field_id) if issubclass(cls, Record) else field_id,
+            )
+            for field_id, field in schema_fields(cls).items()
+        }
+        type.__setattr__(cls, '_record_field_checkers', checkers)
+    return checkers
+
+def compile_field_checker(field, description):
+    return compile_expr(
+        SourceCodeTemplate(
+            '''
+            def check_field(value):
+                $stmts
+                return value
+            ''',
+            stmts=FieldHandlingStmtsTemplate(field, 'value', description=description),
+        ),
+        'check_field',
+    )
+
+#----------------------------------------------------------------------------------------------------------------------------------
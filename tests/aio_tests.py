@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# includes
+
+# 2+3 compat
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+# standards
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import json
+
+# tdds
+from tdds import FieldTypeError, MissingMigration, Record, dict_of, nullable, pair_of, seq_of, temporary_migration_registration
+from tdds.aio import decode, decode_many, iter_jsonl
+from tdds.utils.compatibility import text_type
+
+# this module
+from .plumbing import assert_eq, assert_raises, build_test_registry
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# init
+
+ALL_TESTS, test = build_test_registry()
+
+class Track(Record):
+    title = text_type
+    duration = nullable(int)
+
+class Album(Record):
+    title = text_type
+    released = datetime
+    tracks = seq_of(Track)
+    tags = dict_of(text_type, int)
+    sides = nullable(pair_of(seq_of(Track)))
+    best_track = nullable(Track)
+
+def make_album_pods(num_tracks):
+    tracks = [{'title': 'Track %d' % i, 'duration': i} for i in range(num_tracks)]
+    return {
+        'title': 'Album',
+        'released': '1975-11-21T00:00:00',
+        'tracks': tracks,
+        'tags': {'rock': 1},
+        'sides': [tracks[:num_tracks // 2], tracks[num_tracks // 2:]],
+        'best_track': tracks[0] if tracks else None,
+    }
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+async def count_ticks_while(coroutine):
+    # Returns the result of the coroutine, and the number of times another task got to run while it was being awaited
+    ticks = [0]
+    async def ticker():
+        while True:
+            ticks[0] += 1
+            await asyncio.sleep(0)
+    ticker_task = asyncio.ensure_future(ticker())
+    await asyncio.sleep(0)
+    ticks[0] = 0
+    try:
+        return await coroutine, ticks[0]
+    finally:
+        ticker_task.cancel()
+
+async def async_iter(values):
+    for value in values:
+        yield value
+
+#----------------------------------------------------------------------------------------------------------------------------------
+
+@test('from_pods_async returns the same as from_pods')
+def _():
+    for num_tracks in (0, 1, 10, 2500):
+        pods = make_album_pods(num_tracks)
+        assert_eq(run(Album.from_pods_async(pods, chunk_size=100)), Album.from_pods(pods))
+
+@test('from_pods_async yields to the event loop while decoding large sequences')
+def _():
+    pods = make_album_pods(5000)
+    album, num_ticks = run(count_ticks_while(Album.from_pods_async(pods, chunk_size=100)))
+    assert_eq(len(album.tracks), 5000)
+    # 5000 tracks, and 5000 more in the sides, 100 at a time
+    assert num_ticks >= 100, num_ticks
+
+@test('sequence classes can be decoded asynchronously, like records')
+def _():
+    pods = make_album_pods(300)['tracks']
+    track_seq = Album.record_fields['tracks'].type
+    assert_eq(run(decode(track_seq, pods, chunk_size=7)), track_seq.from_pods(pods))
+
+@test('from_pods_async can offload decoding to an executor')
+def _():
+    pods = make_album_pods(100)
+    with ThreadPoolExecutor(1) as executor:
+        album, num_ticks = run(count_ticks_while(Album.from_pods_async(pods, executor=executor)))
+    assert_eq(album, Album.from_pods(pods))
+    assert num_ticks >= 1, num_ticks
+
+@test('from_pods_async raises the same exceptions as from_pods')
+def _():
+    pods = make_album_pods(10)
+    pods['tracks'][5]['title'] = 5
+    with assert_raises(FieldTypeError):
+        Album.from_pods(pods)
+    with assert_raises(FieldTypeError):
+        run(Album.from_pods_async(pods, chunk_size=3))
+
+@test('from_pods_async migrates PODS from an older fingerprint, and selects fields, as from_pods does')
+def _():
+    def rename_released(values):
+        values['released'] = values.pop('date')
+        return values
+    pods = make_album_pods(10)
+    pods['date'] = pods.pop('released')
+    with temporary_migration_registration(Album, 'old', Album.record_fingerprint(), rename_released):
+        expected = Album.from_pods(pods, fingerprint='old')
+        assert_eq(run(Album.from_pods_async(pods, fingerprint='old', chunk_size=3)), expected)
+        with ThreadPoolExecutor(1) as executor:
+            assert_eq(run(Album.from_pods_async(pods, fingerprint='old', executor=executor)), expected)
+        assert_eq(
+            run(Album.from_pods_async(pods, fingerprint='old', fields=['title', 'released'])),
+            Album.from_pods(pods, fingerprint='old', fields=['title', 'released']),
+        )
+    with assert_raises(MissingMigration):
+        run(Album.from_pods_async(pods, fingerprint='old'))
+
+@test('decode_many decodes a list of records, yielding to the event loop between chunks')
+def _():
+    all_pods = make_album_pods(1000)['tracks']
+    tracks, num_ticks = run(count_ticks_while(decode_many(Track, all_pods, chunk_size=10)))
+    assert_eq(tracks, [Track.from_pods(pods) for pods in all_pods])
+    assert num_ticks >= 99, num_ticks
+    with ThreadPoolExecutor(1) as executor:
+        assert_eq(run(decode_many(Track, iter(all_pods), executor=executor)), tracks)
+
+@test('iter_jsonl iterates over records in JSON lines, skipping blank lines')
+def _():
+    all_pods = make_album_pods(25)['tracks']
+    lines = [json.dumps(pods).encode('UTF-8') + b'\n' for pods in all_pods]
+    lines.insert(3, b'\n')
+    expected = [Track.from_pods(pods) for pods in all_pods]
+    async def collect(**kwargs):
+        return [track async for track in iter_jsonl(Track, async_iter(lines), **kwargs)]
+    assert_eq(run(collect()), expected)
+    assert_eq(run(collect(chunk_size=4)), expected)
+    with ThreadPoolExecutor(1) as executor:
+        assert_eq(run(collect(chunk_size=4, executor=executor)), expected)
+
+#----------------------------------------------------------------------------------------------------------------------------------
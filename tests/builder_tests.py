@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# includes
+
+# 2+3 compat
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+# tdds
+from tdds import Record, builder
+from tdds.utils.compatibility import text_type
+
+# this module
+from .plumbing import assert_eq, build_test_registry
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# init
+
+ALL_TESTS, test = build_test_registry()
+
+class Person(Record):
+    name = text_type
+    age = int
+
+class PersonBuilder(builder(Person)):
+
+    initialised = []
+
+    def __init__(self, raw):
+        PersonBuilder.initialised.append(self)
+        self.raw = raw
+
+    def name(self):
+        return self.raw.split(':')[0]
+
+    def age(self):
+        if not hasattr(self, 'cached_age'):
+            self.cached_age = int(self.raw.split(':')[1])
+        return self.cached_age
+
+#----------------------------------------------------------------------------------------------------------------------------------
+
+@test('a builder instance builds one record')
+def _():
+    assert_eq(PersonBuilder('Pearl:7')(), Person(name='Pearl', age=7))
+
+@test('build_many builds one record per input, in order')
+def _():
+    assert_eq(
+        list(PersonBuilder.build_many(['Pearl:7', 'Gus:9', 'Ada:3'])),
+        [Person(name='Pearl', age=7), Person(name='Gus', age=9), Person(name='Ada', age=3)],
+    )
+
+@test('build_many reuses a single builder instance')
+def _():
+    del PersonBuilder.initialised[:]
+    list(PersonBuilder.build_many(['Pearl:7', 'Gus:9', 'Ada:3']))
+    assert_eq(len(PersonBuilder.initialised), 3)
+    assert_eq(len(set(map(id, PersonBuilder.initialised))), 1)
+
+@test('build_many resets values cached on the builder between inputs')
+def _():
+    people = list(PersonBuilder.build_many(['Pearl:7', 'Gus:9']))
+    assert_eq(people[1].age, 9)
+
+@test('build_many can run on an executor')
+def _():
+    try:
+        from concurrent.futures import ThreadPoolExecutor  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        # not in the standard library on Python 2.7, where it needs the `futures' backport, without which there's nothing to test
+        return
+    inputs = ['P%d:%d' % (i, i) for i in range(50)]
+    with ThreadPoolExecutor(4) as executor:
+        people = list(PersonBuilder.build_many(inputs, executor=executor))
+    assert_eq(people, [Person(name='P%d' % i, age=i) for i in range(50)])
+
+#----------------------------------------------------------------------------------------------------------------------------------
@@ -7,17 +7,26 @@
 # 2+3 compat
 from __future__ import absolute_import, division, print_function, unicode_literals
 
+# standards
+from array import array
+import pickle
+
 # tdds
 from tdds import (
     Field,
     FieldNotNullable,
     FieldTypeError,
     FieldValueError,
+    ImmutableArray,
     ImmutableDict,
+    PersistentMap,
     Record,
+    array_of,
     dict_of,
     nullable,
     pair_of,
+    pmap_of,
+    pvec_of,
     seq_of,
     set_of,
 )
@@ -176,6 +185,34 @@ def _():
     assert_eq(MyRecord(None).v, (1, 2, 3))
     assert_eq(MyRecord().v, (1, 2, 3))
 
+@test('elements of the sequence may be instances of subclasses of the declared type')
+def _():
+    class MyRecord(Record):
+        elems = seq_of(int)
+        texts = set_of(text_type)
+    class MyText(text_type):
+        pass
+    r = MyRecord(elems=[1, True, 3], texts=(t for t in ['a', MyText('b')]))
+    assert_eq(r.elems, (1, True, 3))
+    assert_eq(r.texts, frozenset(['a', 'b']))
+
+@test('when the elements of a sequence are of the wrong type, the error names that type')
+def _():
+    class MyRecord(Record):
+        elems = seq_of(int)
+    with assert_raises(FieldTypeError, '[elem] should be of type int, not float (2.5)'):
+        MyRecord(elems=[1, 2.5, 3])
+    with assert_raises(FieldNotNullable, '[elem] cannot be None'):
+        MyRecord(elems=[1, None, 3])
+
+@test('elements of a sequence of nullables can be None')
+def _():
+    class MyRecord(Record):
+        elems = seq_of(nullable(int))
+    assert_eq(MyRecord(elems=iter([1, None, 3])).elems, (1, None, 3))
+    with assert_raises(FieldTypeError):
+        MyRecord(elems=[1, None, '3'])
+
 #----------------------------------------------------------------------------------------------------------------------------------
 # pair_of
 
@@ -300,6 +337,110 @@ def _():
     assert_eq(MyRecord(None).v, (1, 2))
     assert_eq(MyRecord().v, (1, 2))
 
+#----------------------------------------------------------------------------------------------------------------------------------
+# array_of
+
+@test('array_of fields can be defined using any iterable')
+def _():
+    class MyRecord(Record):
+        samples = array_of('d')
+    r = MyRecord(samples=(x for x in [1.5, 2.5]))
+    assert_eq(r.samples, (1.5, 2.5))
+    assert isinstance(r.samples, ImmutableArray)
+    assert_eq(r.samples.tolist(), [1.5, 2.5])
+
+@test('array_of fields can be defined using an array, which gets copied')
+def _():
+    class MyRecord(Record):
+        samples = array_of('d')
+    samples = array(native_string('d'), [1.5, 2.5])
+    r = MyRecord(samples=samples)
+    samples[0] = 3.5
+    assert_eq(r.samples, (1.5, 2.5))
+
+@test('array_of fields are immutable')
+def _():
+    class MyRecord(Record):
+        samples = array_of('i')
+    r = MyRecord(samples=[1, 2, 3])
+    with assert_raises(TypeError):
+        r.samples[2] = 4  # pylint: disable=unsupported-assignment-operation
+    view = r.samples.as_memoryview()
+    assert view.readonly
+    assert_eq(view.tolist(), [1, 2, 3])
+
+@test('elements of float arrays must be floats or ints')
+def _():
+    class MyRecord(Record):
+        samples = array_of('d')
+    assert_eq(MyRecord(samples=[1, 2.5]).samples, (1.0, 2.5))
+    with assert_raises(FieldTypeError, '[elem] should be of type float, not list ([])'):
+        MyRecord(samples=[1.5, []])
+    with assert_raises(FieldNotNullable):
+        MyRecord(samples=[1.5, None])
+
+@test('elements of integer arrays must be ints within the range of the typecode')
+def _():
+    class MyRecord(Record):
+        samples = array_of('b')
+    assert_eq(MyRecord(samples=[-128, 127]).samples, (-128, 127))
+    with assert_raises(FieldTypeError):
+        MyRecord(samples=[1, 2.0])
+    with assert_raises(FieldValueError, "[elem]: 128 is out of range for an array of typecode 'b'"):
+        MyRecord(samples=[1, 128])
+    with assert_raises(ValueError):
+        array_of('u')
+
+@test('elements of float32 arrays must not overflow to infinity')
+def _():
+    class MyRecord(Record):
+        samples = array_of('f')
+    assert_eq(MyRecord(samples=[-3.4e38, 3.4e38, float('inf')]).samples[2], float('inf'))
+    with assert_raises(FieldValueError, "[elem]: 3.5e+38 is out of range for an array of typecode 'f'"):
+        MyRecord(samples=[1.0, 3.5e38])
+    with assert_raises(FieldValueError, "[elem]: -1e+39 is out of range for an array of typecode 'f'"):
+        MyRecord(samples=[float('-inf'), -1e39])
+    with assert_raises(FieldValueError):
+        MyRecord(samples=[10**40])
+    assert_eq(array_of('d').type([1e300]), (1e300,))
+
+@test('elements of float32 arrays that overflow are found even after a NaN')
+def _():
+    class MyRecord(Record):
+        samples = array_of('f')
+    with assert_raises(FieldValueError, "[elem]: 1e+39 is out of range for an array of typecode 'f'"):
+        MyRecord(samples=[1.0, float('nan'), 1e39])
+    with assert_raises(FieldValueError, "[elem]: -1e+39 is out of range for an array of typecode 'f'"):
+        MyRecord(samples=[float('nan'), -1e39, 1.0])
+    assert_eq(len(MyRecord(samples=[float('nan'), 1.0]).samples), 2)
+
+@test('elements of float64 arrays must be ints within the range of a double')
+def _():
+    class MyRecord(Record):
+        samples = array_of('d')
+    with assert_raises(FieldValueError, "[elem]: %r is out of range for an array of typecode 'd'" % 10**400):
+        MyRecord(samples=[1.5, 10**400])
+    assert_eq(MyRecord(samples=[1.5, 10**300]).samples, (1.5, 1e300))
+
+@test('array_of fields can be serialized to and from PODS, and pickled')
+def _():
+    class MyRecord(Record):
+        samples = array_of('f')
+    r = MyRecord(samples=[0.5, 0.25])
+    assert_eq(r.record_pods(), {'samples': [0.5, 0.25]})
+    assert_eq(MyRecord.from_pods(r.record_pods()), r)
+    assert_eq(pickle.loads(pickle.dumps(r)), r)
+
+@test('arrays with the same elements are equal and have the same hash')
+def _():
+    class MyRecord(Record):
+        samples = array_of('d')
+    r1 = MyRecord(samples=[1.0, 2.0])
+    r2 = MyRecord(samples=[1, 2, 3]).record_derive(samples=MyRecord(samples=[1, 2, 3]).samples[:2])
+    assert_eq(r1, r2)
+    assert_eq(hash(r1), hash(r2))
+    assert r1 != MyRecord(samples=[1.0])
+
 #----------------------------------------------------------------------------------------------------------------------------------
 # set_of
 
@@ -409,6 +550,120 @@ def _():
     assert_eq(MyRecord(None).v, {1, 2, 3})
     assert_eq(MyRecord().v, {1, 2, 3})
 
+#----------------------------------------------------------------------------------------------------------------------------------
+# pvec_of
+
+@test('pvec_of fields can be defined using any iterable')
+def _():
+    class MyRecord(Record):
+        elems = pvec_of(int)
+    r = MyRecord(elems=(i for i in [1, 2, 3]))
+    assert_eq(r.elems, (1, 2, 3))
+    assert_eq(list(r.elems), [1, 2, 3])
+
+@test('elements of the pvec must be of the correct type')
+def _():
+    class MyRecord(Record):
+        elems = pvec_of(int)
+    with assert_raises(FieldTypeError):
+        MyRecord(elems=[1, '2', 3])
+
+@test('pvec_of fields are immutable, but new pvecs can be derived from them')
+def _():
+    class MyRecord(Record):
+        elems = pvec_of(int)
+    r = MyRecord(elems=range(100))
+    with assert_raises(TypeError):
+        r.elems[2] = 4  # pylint: disable=unsupported-assignment-operation
+    appended = r.elems.append(100)
+    assert_eq(list(appended), list(range(101)))
+    assert_eq(list(r.elems), list(range(100)))
+    assert_eq(list(r.elems.set(-1, 0)[-2:]), [98, 0])
+    assert_eq(list(r.elems.extend([100, 101])[-3:]), [99, 100, 101])
+    assert_eq(list(r.elems[10:20:5]), [10, 15])
+    assert_is(appended.__class__, r.elems.__class__)
+
+@test('elements added to a pvec must be of the correct type')
+def _():
+    class MyRecord(Record):
+        elems = pvec_of(int)
+    r = MyRecord(elems=[1, 2, 3])
+    with assert_raises(FieldTypeError):
+        r.elems.append('4')
+    with assert_raises(FieldTypeError):
+        r.elems.set(0, '4')
+    with assert_raises(FieldTypeError):
+        r.elems.extend([4, '5'])
+
+@test('deriving a pvec only checks the new elements')
+def _():
+    checked = []
+    def check(value):
+        checked.append(value)
+        return True
+    class MyRecord(Record):
+        elems = pvec_of(Field(int, check=check))
+    r = MyRecord(elems=range(1000))
+    del checked[:]
+    r = r.record_derive(elems=r.elems.append(1000))
+    r = r.record_derive(elems=r.elems.set(0, -1))
+    r = r.record_derive(elems=r.elems[1:])
+    assert_eq(checked, [1000, -1])
+    assert_eq(len(r.elems), 1000)
+
+@test('slices of a pvec can be appended to without modifying the original')
+def _():
+    class MyRecord(Record):
+        elems = pvec_of(int)
+    elems = MyRecord(elems=range(100)).elems
+    head = elems[:50].append(-1)
+    assert_eq(list(head), list(range(50)) + [-1])
+    assert_eq(list(elems), list(range(100)))
+
+@test('pvecs can be sliced with any step, as lists can')
+def _():
+    class MyRecord(Record):
+        elems = pvec_of(int)
+    elems = MyRecord(elems=range(100)).elems
+    expected = list(range(100))
+    for index in (
+            slice(None, None, -1),
+            slice(None, None, 2),
+            slice(None, None, -3),
+            slice(10, 2, -1),
+            slice(-5, None, -7),
+            slice(90, 10, 5),
+            slice(20, 80, 7),
+            ):
+        assert_eq(list(elems[index]), expected[index])
+        assert_eq(list(elems[30:70][index]), expected[30:70][index])
+
+@test('pvec_of fields can be serialized to and from PODS, and pickled')
+def _():
+    class MyRecord(Record):
+        elems = pvec_of(int)
+    r = MyRecord(elems=range(40))
+    assert_eq(r.record_pods(), {'elems': list(range(40))})
+    assert_eq(MyRecord.from_pods(r.record_pods()), r)
+    assert_eq(pickle.loads(pickle.dumps(r)), r)
+
+@test('pvecs with the same elements are equal and have the same hash')
+def _():
+    class MyRecord(Record):
+        elems = pvec_of(int)
+    r1 = MyRecord(elems=range(50))
+    r2 = MyRecord(elems=range(49)).record_derive(elems=MyRecord(elems=range(49)).elems.append(49))
+    assert_eq(r1, r2)
+    assert_eq(hash(r1), hash(r2))
+    assert r1 != MyRecord(elems=range(49))
+    assert_eq(MyRecord(elems=[1, 2]).elems, MyRecord(elems=[1, 2, 3]).elems[:2])
+
+@test("pvec_of accepts a `nullable' kwarg")
+def _():
+    class MyRecord(Record):
+        elems = pvec_of(int, nullable=True)
+    assert_none(MyRecord(elems=None).elems)
+
 #----------------------------------------------------------------------------------------------------------------------------------
 # dict_of
 
@@ -550,6 +805,108 @@ def _():
     assert_eq(MyRecord(None).v, {1:1, 2:2, 3:3})
     assert_eq(MyRecord().v, {1:1, 2:2, 3:3})
 
+#----------------------------------------------------------------------------------------------------------------------------------
+# pmap_of
+
+@test('pmap_of fields can be defined using a dict or an iterator of key/value pairs')
+def _():
+    class MyRecord(Record):
+        elems = pmap_of(int, text_type)
+    assert_eq(MyRecord(elems={1: 'uno', 2: 'zwei'}).elems, {1: 'uno', 2: 'zwei'})
+    assert_eq(MyRecord(elems=iter([(1, 'uno'), (2, 'zwei')])).elems, {1: 'uno', 2: 'zwei'})
+
+@test('keys and values of the pmap must be of the correct type')
+def _():
+    class MyRecord(Record):
+        elems = pmap_of(int, text_type)
+    with assert_raises(FieldTypeError):
+        MyRecord(elems={'1': 'uno'})
+    with assert_raises(FieldTypeError):
+        MyRecord(elems={1: 1})
+
+@test('pmap_of fields are PersistentMap instances, and therefore immutable')
+def _():
+    class MyRecord(Record):
+        elems = pmap_of(int, text_type)
+    elems = MyRecord(elems={1: 'uno'}).elems
+    assert isinstance(elems, PersistentMap)
+    assert isinstance(elems, ImmutableDict)
+    with assert_raises(TypeError):
+        elems[2] = 'zwei'  # pylint: disable=unsupported-assignment-operation
+    with assert_raises(AttributeError):
+        elems.update({2: 'zwei'})  # pylint: disable=no-member
+
+@test('new pmaps can be derived with set and delete, without modifying the original')
+def _():
+    class MyRecord(Record):
+        elems = pmap_of(int, int)
+    elems = MyRecord(elems={i: i for i in range(1000)}).elems
+    derived = elems.set(1000, 1000).set(0, -1).delete(1)
+    assert_eq(len(derived), 1000)
+    assert_eq((derived[0], derived[1000], derived.get(1)), (-1, 1000, None))
+    assert_eq(elems, {i: i for i in range(1000)})
+    assert_is(derived.__class__, elems.__class__)
+    with assert_raises(KeyError):
+        elems.delete(1000)
+
+@test('entries set on a pmap must be of the correct type')
+def _():
+    class MyRecord(Record):
+        elems = pmap_of(int, text_type)
+    elems = MyRecord(elems={1: 'uno'}).elems
+    with assert_raises(FieldTypeError):
+        elems.set('2', 'zwei')
+    with assert_raises(FieldTypeError):
+        elems.set(2, 2)
+
+@test('deriving a pmap only checks the new entry')
+def _():
+    checked = []
+    def check(value):
+        checked.append(value)
+        return True
+    class MyRecord(Record):
+        elems = pmap_of(int, Field(int, check=check))
+    r = MyRecord(elems={i: i for i in range(1000)})
+    del checked[:]
+    r = r.record_derive(elems=r.elems.set(1000, 1000))
+    r = r.record_derive(elems=r.elems.delete(0))
+    assert_eq(checked, [1000])
+    assert_eq(len(r.elems), 1000)
+
+@test('pmap_of fields can be serialized to and from PODS, and pickled')
+def _():
+    class MyRecord(Record):
+        elems = pmap_of(text_type, int)
+    r = MyRecord(elems={'one': 1, 'two': 2})
+    assert_eq(r.record_pods(), {'elems': {'one': 1, 'two': 2}})
+    assert_eq(MyRecord.from_pods(r.record_pods()), r)
+    assert_eq(pickle.loads(pickle.dumps(r)), r)
+
+@test('pmaps with the same entries are equal and have the same hash')
+def _():
+    class MyRecord(Record):
+        elems = pmap_of(int, int)
+    r1 = MyRecord(elems={1: 1, 2: 2})
+    r2 = MyRecord(elems={1: 1}).record_derive(elems=MyRecord(elems={1: 1}).elems.set(2, 2))
+    assert_eq(r1, r2)
+    assert_eq(hash(r1), hash(r2))
+    assert r1 != MyRecord(elems={1: 1, 2: 3})
+
+@test('pmaps compare equal to dict_of values and to plain dicts with the same entries, either way round')
+def _():
+    class MyRecord(Record):
+        pmap = pmap_of(int, int)
+        dict = dict_of(int, int)
+    record = MyRecord(pmap={1: 1, 2: 2}, dict={1: 1, 2: 2})
+    for other in (record.dict, {1: 1, 2: 2}):
+        assert record.pmap == other
+        assert other == record.pmap
+        assert not record.pmap != other
+    for other in (MyRecord(pmap={}, dict={1: 1, 3: 2}).dict, {1: 1, 3: 2}, {1: 1, 2: 3}):
+        assert record.pmap != other
+        assert other != record.pmap
+
 #----------------------------------------------------------------------------------------------------------------------------------
 # ImmutableDict
 
@@ -604,6 +961,31 @@ def _():
 
 #----------------------------------------------------------------------------------------------------------------------------------
 
+@test('identically declared collection fields share the same collection class')
+def _():
+    class Record1(Record):
+        elems = seq_of(int)
+        pairs = dict_of(text_type, seq_of(int))
+    class Record2(Record):
+        elems = seq_of(int)
+        pairs = dict_of(text_type, seq_of(int))
+    assert_is(Record1.record_fields['elems'].type, Record2.record_fields['elems'].type)
+    assert_is(Record1.record_fields['pairs'].type, Record2.record_fields['pairs'].type)
+    assert_eq(Record1([1], {}).elems.__class__, Record2([1], {}).elems.__class__)
+
+@test('collection fields whose elements are declared differently do not share a class')
+def _():
+    class MyRecord(Record):
+        plain = seq_of(int)
+        nullable_elems = seq_of(nullable(int))
+        checked_elems = seq_of(Field(int, check=lambda v: v > 0))
+    classes = set(field.type for field in MyRecord.record_fields.values())
+    assert_eq(len(classes), 3)
+    with assert_raises(FieldValueError):
+        MyRecord(plain=[0], nullable_elems=[None], checked_elems=[0])
+    with assert_raises(FieldNotNullable):
+        MyRecord(plain=[None], nullable_elems=[None], checked_elems=[1])
+
 @test('The type of the elements of a seq_of is accessible')
 def _():
     class MyClass(object):
@@ -628,6 +1010,14 @@ def _():
         v = set_of(MyClass)
     assert_is(MyRecord.record_fields['v'].type.element_field.type, MyClass)
 
+@test('The type of the elements of a pvec_of is accessible')
+def _():
+    class MyClass(object):
+        pass
+    class MyRecord(Record):
+        v = pvec_of(MyClass)
+    assert_is(MyRecord.record_fields['v'].type.element_field.type, MyClass)
+
 @test('The type of the keys and values of a dict_of are accessible')
 def _():
     class MyClass1(object):
@@ -9,10 +9,11 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 
 # standards
 from abc import ABCMeta
+import copy
 from random import randrange
 
 # tdds
-from tdds import Field, FieldNotNullable, Record, RecordsAreImmutable, nullable
+from tdds import Field, FieldNotNullable, Record, RecordsAreImmutable, RecursiveType, dict_of, nullable, record_sort, seq_of
 from tdds.utils.compatibility import integer_types, native_string, string_types, text_type
 
 # this module
@@ -349,6 +350,132 @@ def _():
         ]
     )
 
+@test('rich comparisons are consistent with comparing keys')
+def _():
+    class Point(Record):
+        x = int
+        y = int
+    points = [Point(randrange(3), randrange(3)) for _ in range(50)]
+    for p1 in points:
+        for p2 in points:
+            k1, k2 = p1.__key__(), p2.__key__()
+            assert_eq(
+                (p1 < p2, p1 <= p2, p1 > p2, p1 >= p2, p1 == p2, p1 != p2),
+                (k1 < k2, k1 <= k2, k1 > k2, k1 >= k2, k1 == k2, k1 != k2),
+            )
+
+@test('rich comparisons build each key only once')
+def _():
+    num_calls = [0]
+    class Point(Record):
+        x = int
+        y = int
+    class CountingPoint(Point):
+        def __key__(self):
+            num_calls[0] += 1
+            return (self.x, self.y)
+    p1, p2 = CountingPoint(1, 2), CountingPoint(2, 1)
+    for compare in (p1.__lt__, p1.__le__, p1.__gt__, p1.__ge__, p1.__eq__):
+        num_calls[0] = 0
+        compare(p2)
+        assert_eq(num_calls[0], 2)
+
+@test('classes that define their own __lt__ get the other comparisons from it')
+def _():
+    class Backwards(Record):
+        v = int
+        def __lt__(self, other):
+            return self.v > other.v
+    assert Backwards(2) < Backwards(1)
+    assert Backwards(2) <= Backwards(1)
+    assert Backwards(1) > Backwards(2)
+    assert Backwards(1) >= Backwards(1)
+
+@test('non-record subclasses that define their own __lt__ get the other comparisons from it')
+def _():
+    class Forwards(Record):
+        v = int
+    class Backwards(Forwards):
+        def __lt__(self, other):
+            return self.v > other.v
+    for v1, v2 in ((1, 2), (2, 1), (1, 1)):
+        b1, b2 = Backwards(v1), Backwards(v2)
+        assert_eq(
+            (b1 < b2, b1 <= b2, b1 > b2, b1 >= b2),
+            (v1 > v2, v1 >= v2, v1 < v2, v1 <= v2),
+        )
+
+@test('record_sort_key sorts records in the same order as their comparison methods')
+def _():
+    class Name(Record):
+        first = text_type
+        last = text_type
+        middle = nullable(text_type)
+    class LastFirst(Record):
+        first = text_type
+        last = text_type
+        def __key__(self):
+            return (self.last, self.first)
+    class FirstOnly(Name):
+        def __key__(self):
+            return (self.first,)
+    names = [('Jesus', 'Christ'), ('Jesus', 'Nazareth'), ('King', 'Jews'), ('Alpha', 'Zulu')]
+    for cls in (Name, LastFirst, FirstOnly):
+        records = [cls(first=first, last=last) for first, last in names]
+        assert_eq(sorted(records, key=cls.record_sort_key), sorted(records))
+
+@test('record_sort_key uses the __key__ of non-record subclasses that define their own')
+def _():
+    class Name(Record):
+        first = text_type
+        last = text_type
+    class LastOnly(Name):
+        def __key__(self):
+            return (self.last,)
+    records = [LastOnly(first='Jesus', last='Christ'), LastOnly(first='Alpha', last='Zulu'), LastOnly(first='King', last='Jews')]
+    assert_eq([name.first for name in sorted(records, key=LastOnly.record_sort_key)], ['Jesus', 'King', 'Alpha'])
+
+@foreach((
+    ('record classes', False),
+    ('non-record subclasses', True),
+))
+def _(kind, subclassed):
+
+    @test('record_sort_key uses the __lt__ of {} that define their own'.format(kind))
+    def _():
+        class Forwards(Record):
+            v = int
+            if not subclassed:
+                def __lt__(self, other):
+                    return self.v > other.v
+        class Backwards(Forwards):
+            if subclassed:
+                def __lt__(self, other):
+                    return self.v > other.v
+        records = [Backwards(v) for v in (2, 3, 1)]
+        assert_eq([record.v for record in sorted(records, key=Backwards.record_sort_key)], [3, 2, 1])
+
+@test('record_sort sorts records by the given fields')
+def _():
+    class Artist(Record):
+        name = text_type
+    class Album(Record):
+        title = text_type
+        year = int
+        artist = Artist
+    albums = [
+        Album(title='Gyroscope', year=2000, artist=Artist('Wah-wah')),
+        Album(title='Elevon', year=1998, artist=Artist('Wah-wah')),
+        Album(title='Gear', year=2000, artist=Artist('Boing')),
+    ]
+    titles = lambda albums: [album.title for album in albums]
+    assert_eq(titles(record_sort(albums)), titles(sorted(albums)))
+    assert_eq(titles(record_sort(albums, by='title')), ['Elevon', 'Gear', 'Gyroscope'])
+    assert_eq(titles(record_sort(albums, by=('year', 'title'))), ['Elevon', 'Gear', 'Gyroscope'])
+    assert_eq(titles(record_sort(albums, by=('artist.name', 'year'), reverse=True)), ['Gyroscope', 'Elevon', 'Gear'])
+    with assert_raises(ValueError):
+        record_sort(albums, by=())
+
 @test('classes have a default __hash__')
 def _():
     class Point(Record):
@@ -423,3 +550,39 @@ def _():
     )
 
 #----------------------------------------------------------------------------------------------------------------------------------
+# copying
+
+@test('copying a record returns the record itself')
+def _():
+    class MyRecord(Record):
+        values = list
+    record = MyRecord(values=[1, 2])
+    assert_is(copy.copy(record), record)
+
+@test('deep-copying a record whose fields are all immutable returns the record itself')
+def _():
+    class Inner(Record):
+        name = text_type
+        values = seq_of(int)
+    class Outer(Record):
+        inners = dict_of(text_type, Inner)
+        next = nullable(RecursiveType)
+    record = Outer(inners={'a': Inner(name='a', values=[1])}, next=Outer(inners={}))
+    assert_is(copy.deepcopy(record), record)
+    assert_is(copy.deepcopy(record.inners), record.inners)
+    assert_is(copy.copy(record.inners), record.inners)
+
+@test('deep-copying a record with a mutable field copies the field')
+def _():
+    class Inner(Record):
+        name = text_type
+    class MyRecord(Record):
+        inner = Inner
+        values = list
+    record = MyRecord(inner=Inner(name='a'), values=[[1], [2]])
+    copied = copy.deepcopy(record)
+    assert_eq(copied, record)
+    assert copied.values[0] is not record.values[0]
+    assert_is(copied.inner, record.inner)
+
+#----------------------------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# includes
+
+# 2+3 compat
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+# standards
+import pickle
+
+# tdds
+from tdds import Record, array_of, diff, dict_of, nullable, patch, pmap_of, pvec_of, seq_of, set_of
+from tdds.utils.compatibility import text_type
+
+# this module
+from .plumbing import assert_eq, assert_is, assert_none, build_test_registry, foreach
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# init
+
+ALL_TESTS, test = build_test_registry()
+
+class Track(Record):
+    title = text_type
+    seconds = int
+
+class Album(Record):
+    title = text_type
+    year = nullable(int)
+    tracks = seq_of(Track)
+
+TRACKS = tuple(Track(title='Track %d' % i, seconds=i) for i in range(20))
+
+ALBUM = Album(title='Pink Moon', year=1972, tracks=TRACKS)
+
+def with_track(tracks, index, **kwargs):
+    tracks = list(tracks)
+    tracks[index] = tracks[index].record_derive(**kwargs)
+    return tracks
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# records
+
+@test('diff returns None for equal records')
+def _():
+    assert_none(diff(ALBUM, ALBUM))
+    assert_none(diff(ALBUM, Album(title='Pink Moon', year=1972, tracks=list(TRACKS))))
+
+@test('diff only holds the fields that changed')
+def _():
+    assert_eq(diff(ALBUM, ALBUM.record_derive(year=1973)), ('r', {'year': ('=', 1973)}))
+
+@test('diff does not replace a field that holds the same NaN in both records')
+def _():
+    class Sample(Record):
+        label = text_type
+        value = float
+    old = Sample(label='a', value=float('nan'))
+    assert_none(diff(old, old.record_derive(label='a')))
+    assert_eq(diff(old, old.record_derive(label='b')), ('r', {'label': ('=', 'b')}))
+
+@test('diff recurses into nested records')
+def _():
+    class Outer(Record):
+        album = Album
+    outer = Outer(album=ALBUM)
+    assert_eq(
+        diff(outer, Outer(album=ALBUM.record_derive(title='Bryter Layter'))),
+        ('r', {'album': ('r', {'title': ('=', 'Bryter Layter')})}),
+    )
+
+@test('nullable fields can be diffed to and from None')
+def _():
+    for old, new in ((ALBUM, ALBUM.record_derive(year=None)), (ALBUM.record_derive(year=None), ALBUM)):
+        assert_eq(patch(old, diff(old, new)), new)
+
+@test('patch leaves unchanged fields shared')
+def _():
+    new = patch(ALBUM, diff(ALBUM, ALBUM.record_derive(year=1973)))
+    assert_eq(new.year, 1973)
+    assert_is(new.tracks, ALBUM.tracks)
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# sequences
+
+@foreach((
+    ('an element is changed', lambda tracks: with_track(tracks, 7, seconds=99)),
+    ('an element is inserted', lambda tracks: tracks[:3] + (Track(title='New', seconds=0),) + tracks[3:]),
+    ('an element is removed', lambda tracks: tracks[:3] + tracks[4:]),
+    ('elements are appended', lambda tracks: tracks + (Track(title='New', seconds=0),) * 2),
+    ('elements are reordered', lambda tracks: tuple(reversed(tracks))),
+    ('all elements are removed', lambda tracks: ()),
+))
+def _(description, edit):
+
+    @test('sequences can be diffed and patched when {}'.format(description))
+    def _():
+        new = ALBUM.record_derive(tracks=edit(TRACKS))
+        assert_eq(patch(ALBUM, diff(ALBUM, new)), new)
+
+@test('elements changed in place are patched rather than replaced')
+def _():
+    assert_eq(
+        diff(ALBUM, ALBUM.record_derive(tracks=with_track(TRACKS, 7, seconds=99))),
+        ('r', {'tracks': ('s', ((7, ('r', {'seconds': ('=', 99)})),))}),
+    )
+
+@test('inserted elements are the only ones in the patch')
+def _():
+    new_track = Track(title='New', seconds=0)
+    assert_eq(
+        diff(ALBUM, ALBUM.record_derive(tracks=TRACKS[:3] + (new_track,) + TRACKS[3:])),
+        ('r', {'tracks': ('s', ((3, 3, (new_track,)),))}),
+    )
+
+@foreach((
+    ('pvec_of', pvec_of(Track), [TRACKS[0], TRACKS[1]], [TRACKS[0], TRACKS[2], TRACKS[1]]),
+    ('array_of', array_of('i'), [1, 2, 3], [1, 5, 3, 4]),
+    ('set_of', set_of(int), [1, 2, 3], [1, 3, 4]),
+    ('dict_of', dict_of(text_type, Track), {'a': TRACKS[0], 'b': TRACKS[1]}, {'a': TRACKS[2], 'c': TRACKS[3]}),
+    ('pmap_of', pmap_of(text_type, Track), {'a': TRACKS[0], 'b': TRACKS[1]}, {'a': TRACKS[2], 'c': TRACKS[3]}),
+))
+def _(name, field, old_value, new_value):
+
+    @test('{} fields can be diffed and patched'.format(name))
+    def _():
+        class Holder(Record):
+            value = field
+        old, new = Holder(value=old_value), Holder(value=new_value)
+        patched = patch(old, diff(old, new))
+        assert_eq(patched, new)
+        assert_is(patched.value.__class__, new.value.__class__)
+        assert_none(diff(old, Holder(value=old_value)))
+
+@test('unchanged values of patched pmap fields are shared')
+def _():
+    class Holder(Record):
+        value = pmap_of(text_type, Track)
+    old = Holder(value={'a': TRACKS[0], 'b': TRACKS[1]})
+    new = patch(old, diff(old, Holder(value={'a': TRACKS[0], 'b': TRACKS[2]})))
+    assert_eq(new.value['b'], TRACKS[2])
+    assert_is(new.value['a'], old.value['a'])
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# patches
+
+@test('patches can be pickled')
+def _():
+    new = ALBUM.record_derive(tracks=with_track(TRACKS[2:], 5, title='Renamed'))
+    assert_eq(patch(ALBUM, pickle.loads(pickle.dumps(diff(ALBUM, new)))), new)
+
+@test('patching with None returns the value unchanged')
+def _():
+    assert_is(patch(ALBUM, None), ALBUM)
+
+#----------------------------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# includes
+
+# 2+3 compat
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+# tdds
+from tdds import Record, RecordIndex, nullable, set_of
+from tdds.utils.compatibility import text_type
+
+# this module
+from .plumbing import assert_eq, assert_raises, build_test_registry
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# init
+
+ALL_TESTS, test = build_test_registry()
+
+class Album(Record):
+    artist = text_type
+    title = text_type
+    year = int
+    rating = nullable(float)
+
+ALBUMS = (
+    Album(artist='Nick Drake', title='Five Leaves Left', year=1969, rating=4.5),
+    Album(artist='Nick Drake', title='Bryter Layter', year=1971),
+    Album(artist='Nick Drake', title='Pink Moon', year=1972, rating=5.0),
+    Album(artist='John Martyn', title='Solid Air', year=1973, rating=4.5),
+    Album(artist='John Martyn', title='Bless the Weather', year=1971),
+)
+
+def titles(albums):
+    return [album.title for album in albums]
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# lookups
+
+@test('find returns records with the given field value, in the order they were added')
+def _():
+    index = RecordIndex(Album, ALBUMS, on=('artist', 'year'))
+    assert_eq(titles(index.find(artist='Nick Drake')), ['Five Leaves Left', 'Bryter Layter', 'Pink Moon'])
+    assert_eq(titles(index.find(year=1971)), ['Bryter Layter', 'Bless the Weather'])
+    assert_eq(index.find(artist='Vashti Bunyan'), [])
+
+@test('find can combine several criteria, including on fields that are not indexed')
+def _():
+    index = RecordIndex(Album, ALBUMS, on=('artist', 'year'))
+    assert_eq(titles(index.find(artist='Nick Drake', year=1971)), ['Bryter Layter'])
+    assert_eq(titles(index.find(artist='Nick Drake', title='Pink Moon')), ['Pink Moon'])
+    assert_eq(titles(index.find(title='Solid Air')), ['Solid Air'])
+
+@test('find_range returns records with a field value in the given half-open range, sorted by that value')
+def _():
+    index = RecordIndex(Album, ALBUMS, on=('year',))
+    assert_eq(titles(index.find_range('year', 1971, 1973)), ['Bryter Layter', 'Bless the Weather', 'Pink Moon'])
+    assert_eq(titles(index.find_range('year', start=1972)), ['Pink Moon', 'Solid Air'])
+    assert_eq(titles(index.find_range('year', stop=1971)), ['Five Leaves Left'])
+    assert_eq(
+        titles(index.find_range('year', stop=1971, include_stop=True)),
+        ['Five Leaves Left', 'Bryter Layter', 'Bless the Weather'],
+    )
+
+@test('find_range skips records whose value is None, but find can look them up')
+def _():
+    index = RecordIndex(Album, ALBUMS, on=('rating',))
+    assert_eq(titles(index.find_range('rating')), ['Five Leaves Left', 'Solid Air', 'Pink Moon'])
+    assert_eq(titles(index.find(rating=None)), ['Bryter Layter', 'Bless the Weather'])
+
+@test('fields whose values are not orderable have no sorted index')
+def _():
+    class Tagged(Record):
+        tags = set_of(text_type)
+    index = RecordIndex(Tagged, [Tagged(tags=['a'])], on=('tags',))
+    assert_eq(len(index.find(tags=frozenset(['a']))), 1)
+    with assert_raises(ValueError):
+        index.find_range('tags', frozenset())
+
+@test('fields that hold records have no sorted index, since records that differ in a None field cannot be compared')
+def _():
+    class Credit(Record):
+        name = text_type
+        role = nullable(text_type)
+    class Credited(Record):
+        credit = Credit
+    records = [Credited(Credit('Nick Drake', 'guitar')), Credited(Credit('Nick Drake', None))]
+    index = RecordIndex(Credited, records, on=('credit',))
+    assert_eq(index.find(credit=Credit('Nick Drake', None)), [records[1]])
+    with assert_raises(ValueError):
+        index.find_range('credit', Credit('A', None))
+
+@test('indexing a field that does not exist raises ValueError')
+def _():
+    with assert_raises(ValueError):
+        RecordIndex(Album, ALBUMS, on=('label',))
+
+@test('finding by a field that does not exist raises ValueError, even if the index is empty')
+def _():
+    for records in (ALBUMS, ()):
+        index = RecordIndex(Album, records, on=('year',))
+        with assert_raises(ValueError):
+            index.find(label='Island')
+        with assert_raises(ValueError):
+            index.find(year=1971, label='Island')
+
+@test('indexing a record of another class raises TypeError')
+def _():
+    class Single(Record):
+        title = text_type
+    index = RecordIndex(Album, ALBUMS, on=('title',))
+    with assert_raises(TypeError):
+        index.add(Single(title='River Man'))
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# updates
+
+@test('records can be added to and removed from an index')
+def _():
+    index = RecordIndex(Album, ALBUMS[:2], on=('artist', 'year'))
+    index.add(ALBUMS[2])
+    index.update(ALBUMS[3:])
+    index.remove(ALBUMS[1])
+    assert_eq(len(index), 4)
+    assert ALBUMS[1] not in index
+    assert_eq(titles(index.find(artist='Nick Drake')), ['Five Leaves Left', 'Pink Moon'])
+    assert_eq(titles(index.find_range('year', 1971, 1972)), ['Bless the Weather'])
+    assert_eq(titles(index), ['Five Leaves Left', 'Pink Moon', 'Solid Air', 'Bless the Weather'])
+
+@test('equal records can be added several times, and are removed one at a time')
+def _():
+    index = RecordIndex(Album, ALBUMS, on=('year',))
+    index.add(ALBUMS[0])
+    assert_eq(titles(index.find(year=1969)), ['Five Leaves Left', 'Five Leaves Left'])
+    index.remove(ALBUMS[0])
+    assert_eq(titles(index.find(year=1969)), ['Five Leaves Left'])
+    assert_eq(titles(index.find_range('year', 1969, 1970)), ['Five Leaves Left'])
+    assert ALBUMS[0] in index
+
+@test('removing a record that is not in the index raises KeyError')
+def _():
+    index = RecordIndex(Album, ALBUMS[1:], on=('year',))
+    with assert_raises(KeyError):
+        index.remove(ALBUMS[0])
+    assert_eq(len(index), len(ALBUMS) - 1)
+
+@test('lookups are the same whether records are added one by one or in bulk')
+def _():
+    albums = [
+        Album(artist='Artist %d' % (i % 7), title='Album %d' % i, year=1960 + (i * 37) % 50)
+        for i in range(200)
+    ]
+    bulk = RecordIndex(Album, albums, on=('artist', 'year'))
+    incremental = RecordIndex(Album, albums[:100], on=('artist', 'year'))
+    for album in albums[100:]:
+        incremental.add(album)
+    for index in (bulk, incremental):
+        assert_eq(index.find(artist='Artist 3'), [album for album in albums if album.artist == 'Artist 3'])
+        assert_eq(
+            index.find_range('year', 1970, 1980),
+            sorted((album for album in albums if 1970 <= album.year < 1980), key=lambda album: album.year),
+        )
+
+#----------------------------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# includes
+
+# 2+3 compat
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+# standards
+from contextlib import contextmanager
+
+# tdds
+from tdds import Field, Record, disable_instrumentation, enable_instrumentation, scoped_stats, seq_of, stats
+from tdds.utils.compatibility import text_type
+
+# this module
+from .plumbing import assert_eq, build_test_registry
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# init
+
+ALL_TESTS, test = build_test_registry()
+
+@contextmanager
+def instrumentation():
+    enable_instrumentation()
+    try:
+        yield
+    finally:
+        disable_instrumentation()
+
+#----------------------------------------------------------------------------------------------------------------------------------
+
+@test('instrumented records count constructor invocations and field checks')
+def _():
+    with instrumentation():
+        class InstrumentedRecord(Record):
+            id = Field(int, check=lambda v: v > 0)
+    with scoped_stats() as scoped:
+        InstrumentedRecord(id=1)
+        InstrumentedRecord(id=2)
+    assert_eq(scoped['InstrumentedRecord.__init__'].calls, 2)
+    assert_eq(scoped['InstrumentedRecord.id'].calls, 2)
+    assert scoped['InstrumentedRecord.__init__'].seconds >= scoped['InstrumentedRecord.id'].seconds
+
+@test('instrumented records count PODS serialization invocations')
+def _():
+    with instrumentation():
+        class InstrumentedElem(Record):
+            label = text_type
+        class InstrumentedRecord(Record):
+            elems = seq_of(InstrumentedElem)
+    r = InstrumentedRecord(elems=[InstrumentedElem('a'), InstrumentedElem('b')])
+    with scoped_stats() as scoped:
+        InstrumentedRecord.from_pods(r.record_pods())
+    assert_eq(scoped['InstrumentedRecord.record_pods'].calls, 1)
+    assert_eq(scoped['InstrumentedRecord.from_pods'].calls, 1)
+    assert_eq(scoped['InstrumentedElem.from_pods'].calls, 2)
+    assert_eq(scoped['InstrumentedElemSeq.check_elems'].calls, 1)
+    assert_eq(scoped['InstrumentedElemSeq[elem]'].calls, 2)
+
+@test('records compiled while instrumentation is disabled are not instrumented')
+def _():
+    class UninstrumentedRecord(Record):
+        id = int
+    with scoped_stats() as scoped:
+        UninstrumentedRecord(id=1)
+    assert_eq(scoped, {})
+    assert 'UninstrumentedRecord.__init__' not in stats()
+
+#----------------------------------------------------------------------------------------------------------------------------------
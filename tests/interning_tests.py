@@ -0,0 +1,170 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# includes
+
+# 2+3 compat
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+# standards
+import gc
+import pickle
+
+# tdds
+from tdds import FieldTypeError, Interner, Record, seq_of
+from tdds.utils.compatibility import text_type
+
+# this module
+from .plumbing import assert_eq, assert_is, assert_raises, build_test_registry
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# init
+
+ALL_TESTS, test = build_test_registry()
+
+#----------------------------------------------------------------------------------------------------------------------------------
+
+@test('interned records with equal values are the same instance')
+def _():
+    class MyRecord(Record):
+        __intern = True
+        id = int
+        label = text_type
+    r1 = MyRecord(id=1, label='one')
+    assert_is(MyRecord(id=1, label='one'), r1)
+    assert MyRecord(id=2, label='one') is not r1
+
+@test('interned records with equal values of different types or signs are different instances')
+def _():
+    class MyRecord(Record):
+        __intern = True
+        id = int
+        weight = float
+    r1 = MyRecord(id=1, weight=0.0)
+    assert_is(MyRecord(id=1, weight=0.0), r1)
+    assert MyRecord(id=True, weight=0.0) is not r1
+    assert MyRecord(id=1, weight=-0.0) is not r1
+    assert_is(type(MyRecord(id=True, weight=0.0).id), bool)
+    assert_eq(repr(MyRecord(id=1, weight=-0.0).weight), '-0.0')
+
+@test('values within collections of interned records are only compared for equality')
+def _():
+    class MyRecord(Record):
+        __intern = True
+        weights = seq_of(float)
+    assert_is(MyRecord(weights=[-0.0]), MyRecord(weights=[0.0]))
+
+@test('interned records whose class defines its own __key__ are only shared if all their fields are equal')
+def _():
+    class MyRecord(Record):
+        __intern = True
+        id = int
+        label = text_type
+        def __key__(self):
+            return (self.id,)
+    r1 = MyRecord(id=1, label='one')
+    assert_is(MyRecord(id=1, label='one'), r1)
+    assert_eq(MyRecord(id=1, label='two').label, 'two')
+
+@test('interned records are still checked')
+def _():
+    class MyRecord(Record):
+        __intern = True
+        id = int
+    with assert_raises(FieldTypeError):
+        MyRecord(id='1')
+
+@test('records that are not interned are not shared')
+def _():
+    class MyRecord(Record):
+        id = int
+    assert MyRecord(id=1) is not MyRecord(id=1)
+
+@test('records decoded from PODS, unpickled or derived are interned')
+def _():
+    class Track(Record):
+        __intern = True
+        title = text_type
+    class Album(Record):
+        tracks = seq_of(Track)
+    track = Track('Elevon')
+    assert_is(Album.from_pods({'tracks': [{'title': 'Elevon'}]}).tracks[0], track)
+    assert_is(pickle.loads(pickle.dumps(track)), track)
+    assert_is(Track('Gear').record_derive(title='Elevon'), track)
+
+@test('the default interner only holds on to weak references')
+def _():
+    class MyRecord(Record):
+        __intern = True
+        id = int
+    r = MyRecord(id=1)
+    assert_eq(len(MyRecord.record_interner), 1)
+    del r
+    gc.collect()
+    assert_eq(len(MyRecord.record_interner), 0)
+
+@test('an Interner with a max_size evicts the least recently used instances')
+def _():
+    interner = Interner(max_size=2)
+    class MyRecord(Record):
+        __intern = interner
+        id = int
+    r1 = MyRecord(id=1)
+    r2 = MyRecord(id=2)
+    assert_is(MyRecord(id=1), r1)  # now 2 is the least recently used
+    MyRecord(id=3)
+    assert_eq(len(interner), 2)
+    assert_is(MyRecord(id=1), r1)
+    assert MyRecord(id=2) is not r2
+
+@test('an Interner can be shared between classes without mixing them up')
+def _():
+    interner = Interner()
+    class Record1(Record):
+        __intern = interner
+        id = int
+    class Record2(Record):
+        __intern = interner
+        id = int
+    r1 = Record1(id=1)
+    r2 = Record2(id=1)
+    assert_is(Record1(id=1), r1)
+    assert_is(Record2(id=1), r2)
+    assert r1.__class__ is not r2.__class__
+
+@test('Interner objects can be used directly on any record')
+def _():
+    class MyRecord(Record):
+        id = int
+    interner = Interner()
+    r1 = interner.intern(MyRecord(id=1))
+    assert_is(interner.intern(MyRecord(id=1)), r1)
+
+@test('lazy records can be interned')
+def _():
+    class MyRecord(Record):
+        __lazy = True
+        __intern = True
+        id = int
+    assert_is(MyRecord(id=1), MyRecord(id=1))
+
+@test('subclasses of interned records are interned separately')
+def _():
+    class Parent(Record):
+        __intern = True
+        id = int
+    class Child(Parent):
+        pass
+    assert_is(Child(id=1), Child(id=1))
+    assert Child(id=1) is not Parent(id=1)
+    assert_eq(Child(id=1), Parent(id=1))
+
+@test('__intern must be True or an Interner')
+def _():
+    with assert_raises(TypeError):
+        class MyRecord(Record):  # pylint: disable=unused-variable
+            __intern = 'yes'
+            id = int
+
+#----------------------------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# includes
+
+# 2+3 compat
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+# standards
+import pickle
+
+# tdds
+from tdds import FieldTypeError, Record, RecursiveType, nullable, seq_of
+from tdds.utils.compatibility import text_type
+
+# this module
+from .plumbing import assert_eq, assert_is, assert_none, assert_raises, build_test_registry
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# init
+
+ALL_TESTS, test = build_test_registry()
+
+#----------------------------------------------------------------------------------------------------------------------------------
+
+@test('lazy record classes are not compiled when defined')
+def _():
+    class MyRecord(Record):
+        __lazy = True
+        id = int
+    assert_none(MyRecord._record_compiled)  # pylint: disable=protected-access
+
+@test('lazy record classes are compiled when first instantiated')
+def _():
+    class MyRecord(Record):
+        __lazy = True
+        id = int
+    r = MyRecord(id=10)
+    assert_eq(r.id, 10)
+    assert isinstance(r, MyRecord)
+    with assert_raises(FieldTypeError):
+        MyRecord(id='10')
+
+@test('lazy record classes are compiled when one of their attributes is looked up')
+def _():
+    class MyRecord(Record):
+        __lazy = True
+        id = int
+    assert_eq(sorted(MyRecord.record_fields), ['id'])
+
+@test('lazy record classes can have methods and properties')
+def _():
+    class MyRecord(Record):
+        __lazy = True
+        x = int
+        square = property(lambda self: self.x*self.x)
+        def cube(self):
+            return self.x*self.x*self.x
+    assert_eq(MyRecord(3).square, 9)
+    assert_eq(MyRecord(3).cube(), 27)
+
+@test('using a lazy record as the element of a collection does not compile it')
+def _():
+    class Track(Record):
+        __lazy = True
+        title = text_type
+    class Album(Record):
+        tracks = seq_of(Track)
+    assert_none(Track._record_compiled)  # pylint: disable=protected-access
+    album = Album(tracks=[{'title': 'Elevon'}])
+    assert isinstance(album.tracks[0], Track)
+
+@test('lazy records can be serialized to and from PODS')
+def _():
+    class Track(Record):
+        __lazy = True
+        title = text_type
+    class Album(Record):
+        __lazy = True
+        tracks = seq_of(Track)
+    album = Album(tracks=[Track('Elevon'), Track('Gear')])
+    assert_eq(Album.from_pods(album.record_pods()), album)
+
+@test("the placeholder's record_pods compiles the class rather than calling itself")
+def _():
+    class Track(Record):
+        __lazy = True
+        title = text_type
+    placeholder_record_pods = vars(Track)['record_pods']
+    track = Track('Elevon')
+    assert_eq(placeholder_record_pods(track), {'title': 'Elevon'})
+    assert_eq(placeholder_record_pods(track, fields=['title']), {'title': 'Elevon'})
+
+@test('lazy records can be pickled')
+def _():
+    class MyRecord(Record):
+        __lazy = True
+        id = int
+    r = MyRecord(1)
+    assert_eq(pickle.loads(pickle.dumps(r)), r)
+
+@test('lazy records can be recursive')
+def _():
+    class MyRecord(Record):
+        __lazy = True
+        nxt = nullable(RecursiveType)
+    r1 = MyRecord()
+    assert_is(MyRecord(r1).nxt, r1)
+
+@test('lazy records can be subclassed as normal')
+def _():
+    class Parent(Record):
+        __lazy = True
+        name = text_type
+    class Child(Parent):
+        def greet(self):
+            return 'Hello, {}'.format(self.name)
+    assert_eq(Child('Pearl').greet(), 'Hello, Pearl')
+    assert isinstance(Child('Pearl'), Parent)
+
+@test('lazy records can be extended by other records')
+def _():
+    class Parent(Record):
+        __lazy = True
+        name = text_type
+    class Child(Parent, Record):
+        __lazy = True
+        age = int
+    child = Child(name='Pearl', age=7)
+    assert_eq((child.name, child.age), ('Pearl', 7))
+    assert isinstance(child, Parent)
+
+#----------------------------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# includes
+
+# 2+3 compat
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+# standards
+import sys
+
+# tdds
+from tdds import Record, array_of, dict_of, format_memory_report, memory_report, pmap_of, pvec_of, seq_of, sizeof
+from tdds.utils.compatibility import text_type
+
+# this module
+from .plumbing import assert_eq, assert_matches, build_test_registry
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# init
+
+ALL_TESTS, test = build_test_registry()
+
+class Track(Record):
+    title = text_type
+
+class Album(Record):
+    tracks = seq_of(Track)
+    tags = dict_of(text_type, int)
+    plays = pvec_of(int)
+    ratings = pmap_of(text_type, int)
+
+def make_album(title1='Elevon', title2='Gear', num_tags=1):
+    return Album(
+        tracks=[Track(title1), Track(title2)],
+        tags={'ambient': num_tags},
+        plays=range(100),
+        ratings={'pitchfork': 8},
+    )
+
+#----------------------------------------------------------------------------------------------------------------------------------
+
+@test('sizeof follows record fields into the objects they refer to')
+def _():
+    track = Track('x' * 1000)
+    assert_eq(sizeof(track, deep=False), sys.getsizeof(track))
+    assert_eq(sizeof(track), sys.getsizeof(track) + sys.getsizeof(track.title))
+
+@test('sizeof includes the internal structures of collections')
+def _():
+    album = make_album()
+    assert sizeof(album.tags, deep=False) > sys.getsizeof(album.tags)
+    assert sizeof(album.plays, deep=False) > sys.getsizeof(album.plays)
+    assert sizeof(album.ratings, deep=False) > sys.getsizeof(album.ratings)
+    assert sizeof(album.plays) > sizeof(album.plays, deep=False)
+    samples = array_of('d').type(range(1000))
+    assert sizeof(samples) > 8000
+
+@test('objects that are referred to more than once are only counted once')
+def _():
+    track = Track('x' * 1000)
+    album1 = Album(tracks=[track], tags={}, plays=[], ratings={})
+    album3 = Album(tracks=[track, track, track], tags={}, plays=[], ratings={})
+    assert_eq(sizeof(album3) - sizeof(album1), sys.getsizeof(album3.tracks) - sys.getsizeof(album1.tracks))
+
+@test('trie nodes shared by several versions of a pvec or pmap are only counted once')
+def _():
+    plays1 = pvec_of(int).type(range(1000))
+    plays2 = plays1.append(1000)
+    ratings1 = pmap_of(int, int).type({i: i for i in range(1000)})
+    ratings2 = ratings1.set(1000, 1000)
+    for version1, version2 in ((plays1, plays2), (ratings1, ratings2)):
+        assert_eq(memory_report([version1, version1]).total_bytes, sizeof(version1))
+        assert memory_report([version1, version2]).total_bytes - sizeof(version1) < sizeof(version2, deep=False) / 4
+
+@test('memory_report breaks down memory usage by class and by field')
+def _():
+    album = make_album()
+    report = memory_report([album])
+    assert_eq(report.total_bytes, sizeof(album))
+    assert_eq(report.by_class['Track'].count, 2)
+    assert_eq(report.by_class['Album'].bytes, sys.getsizeof(album))
+    assert_eq(report.total_bytes, sum(report.by_field.values()) + sys.getsizeof(album))
+    assert_eq(
+        report.by_field['Track.title'],
+        sys.getsizeof(album.tracks[0].title) + sys.getsizeof(album.tracks[1].title),  # pylint: disable=unsubscriptable-object
+    )
+    assert_matches(r'\n\s*\d+\s+Album\.plays\n', format_memory_report(report))
+
+@test('memory_report reports how many bytes interning duplicate records would save')
+def _():
+    album1 = make_album(title1='x' * 1000)
+    album2 = make_album(title1=''.join(['x'] * 1000), num_tags=2)
+    report = memory_report([album1, album2])
+    # Both tracks of album2 are duplicates. The title of the first one is a distinct string, the other one's is shared.
+    track1, track2 = album2.tracks
+    assert_eq(
+        report.interning_savings['Track'],
+        sys.getsizeof(track1) + sys.getsizeof(track1.title) + sys.getsizeof(track2),
+    )
+    assert 'Album' not in report.interning_savings
+    # interning the outer record would also free the nested ones
+    report = memory_report([album1, make_album(title1=''.join(['x'] * 1000))])
+    assert report.interning_savings['Album'] > report.interning_savings['Track']
+
+#----------------------------------------------------------------------------------------------------------------------------------
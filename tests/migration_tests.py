@@ -0,0 +1,190 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# includes
+
+# 2+3 compat
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+# standards
+import gc
+import pickle
+
+# tdds
+from tdds import MissingMigration, Record, nullable, register_migration, seq_of, temporary_migration_registration
+from tdds.migrations import migration_chain
+from tdds.utils.compatibility import text_type
+
+# this module
+from .plumbing import assert_eq, assert_raises, build_test_registry
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# init
+
+ALL_TESTS, test = build_test_registry()
+
+def rename_field(old_id, new_id):
+    def migrate(values):
+        values[new_id] = values.pop(old_id)
+        return values
+    return migrate
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# fingerprints
+
+@test('classes with the same schema have the same fingerprint')
+def _():
+    def define_class():
+        class Fingerprinted(Record):
+            id = int
+            tags = seq_of(text_type)
+        return Fingerprinted
+    assert_eq(define_class().record_fingerprint(), define_class().record_fingerprint())
+
+@test('renaming a field changes the fingerprint')
+def _():
+    class Fingerprinted(Record):
+        id = int
+    old_fingerprint = Fingerprinted.record_fingerprint()
+    class Fingerprinted(Record):  # pylint: disable=function-redefined
+        key = int
+    assert Fingerprinted.record_fingerprint() != old_fingerprint
+
+@test('changing a nested record class changes the fingerprint')
+def _():
+    def define_class(nested_type):
+        class Nested(Record):
+            value = nested_type
+        class Outer(Record):
+            nested = Nested
+        return Outer
+    assert define_class(int).record_fingerprint() != define_class(nullable(int)).record_fingerprint()
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# from_pods
+
+@test('from_pods applies migrations from the given fingerprint')
+def _():
+    class Album(Record):
+        title = text_type
+        year = int
+    with temporary_migration_registration(Album, 'old', Album.record_fingerprint(), rename_field('released', 'year')):
+        assert_eq(
+            Album.from_pods({'title': 'Pink Moon', 'released': 1972}, fingerprint='old'),
+            Album(title='Pink Moon', year=1972),
+        )
+
+@test('from_pods does not modify the given PODS when migrating them')
+def _():
+    class Album(Record):
+        year = int
+    pods = {'released': 1972}
+    with temporary_migration_registration(Album, 'old', Album.record_fingerprint(), rename_field('released', 'year')):
+        Album.from_pods(pods, fingerprint='old')
+    assert_eq(pods, {'released': 1972})
+
+@test('from_pods does not migrate PODS with the current fingerprint')
+def _():
+    class Album(Record):
+        year = int
+    assert_eq(Album.from_pods({'year': 1972}, fingerprint=Album.record_fingerprint()), Album(year=1972))
+
+@test('from_pods raises MissingMigration if there is no migration from the given fingerprint')
+def _():
+    class Album(Record):
+        year = int
+    with assert_raises(MissingMigration):
+        Album.from_pods({'released': 1972}, fingerprint='unknown')
+
+@test('from_pods can migrate PODS and select fields')
+def _():
+    class Album(Record):
+        title = text_type
+        year = int
+    with temporary_migration_registration(Album, 'old', Album.record_fingerprint(), rename_field('released', 'year')):
+        assert_eq(
+            Album.from_pods({'title': 'Pink Moon', 'released': 1972}, fields=['year'], fingerprint='old'),
+            {'year': 1972},
+        )
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# chains
+
+@test('migrations are chained, and each chain is compiled once')
+def _():
+    class Album(Record):
+        year = int
+    with temporary_migration_registration(Album, 'v1', 'v2', rename_field('date', 'released')), \
+         temporary_migration_registration(Album, 'v2', Album.record_fingerprint(), rename_field('released', 'year')):
+        assert_eq(Album.from_pods({'date': 1972}, fingerprint='v1'), Album(year=1972))
+        assert_eq(Album.from_pods({'released': 1972}, fingerprint='v2'), Album(year=1972))
+        assert migration_chain(Album, 'v1') is migration_chain(Album, 'v1')
+
+@test('a migration chain that loops raises MissingMigration')
+def _():
+    class Album(Record):
+        year = int
+    with temporary_migration_registration(Album, 'v1', 'v2', rename_field('a', 'b')), \
+         temporary_migration_registration(Album, 'v2', 'v1', rename_field('b', 'a')):
+        with assert_raises(MissingMigration):
+            Album.from_pods({'a': 1972}, fingerprint='v1')
+
+@test('there can only be one migration from a given fingerprint')
+def _():
+    class Album(Record):
+        year = int
+    with temporary_migration_registration(Album, 'v1', 'v2', rename_field('a', 'b')):
+        with assert_raises(ValueError):
+            register_migration(Album, 'v1', 'v3', rename_field('a', 'c'))
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# unpickling
+
+@test('records pickled with an older schema are migrated when unpickled')
+def _():
+    def pickle_old_records():
+        class Track(Record):
+            title = text_type
+            seconds = int
+        class Album(Record):
+            tracks = seq_of(Track)
+        return Track.record_fingerprint(), pickle.dumps(Album(tracks=[Track(title='Parasite', seconds=216)]))
+    old_fingerprint, data = pickle_old_records()
+    gc.collect()
+    class Track(Record):
+        title = text_type
+        duration = int
+    class Album(Record):
+        tracks = seq_of(Track)
+    with temporary_migration_registration(Track, old_fingerprint, Track.record_fingerprint(), rename_field('seconds', 'duration')):
+        assert_eq(pickle.loads(data), Album(tracks=[Track(title='Parasite', duration=216)]))
+
+@test('records pickled with an older schema and no migration are unpickled as before')
+def _():
+    def pickle_old_record():
+        class Track(Record):
+            seconds = int
+        return pickle.dumps(Track(seconds=216))
+    data = pickle_old_record()
+    gc.collect()
+    class Track(Record):
+        duration = int
+    assert_eq(pickle.loads(data), Track(duration=216))
+
+@test('records pickled with an older schema and no migration get their values by field name when their fields are reordered')
+def _():
+    def pickle_old_record():
+        class Track(Record):
+            artist = nullable(text_type)
+            title = text_type
+        return pickle.dumps(Track(artist='Nick Drake', title='Parasite'))
+    data = pickle_old_record()
+    gc.collect()
+    class Track(Record):
+        # making `artist' required moves it before `title'
+        artist = text_type
+        title = text_type
+    assert_eq(pickle.loads(data), Track(artist='Nick Drake', title='Parasite'))
+
+#----------------------------------------------------------------------------------------------------------------------------------
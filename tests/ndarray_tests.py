@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# includes
+
+# 2+3 compat
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+# standards
+import pickle
+
+# numpy is optional, these tests are only run if it's installed
+try:
+    import numpy
+except ImportError:
+    numpy = None  # pylint: disable=invalid-name
+
+# tdds
+from tdds import FieldNotNullable, FieldTypeError, FieldValueError, Record, nonnegative, nullable
+
+# this module
+from .plumbing import assert_eq, assert_is, assert_raises, build_test_registry
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# init
+
+ALL_TESTS, test = build_test_registry()
+
+if numpy is None:
+    test = lambda _description: (lambda func: func)  # pylint: disable=invalid-name
+else:
+    from tdds.ndarray import FrozenNDArray, ndarray_of
+
+#----------------------------------------------------------------------------------------------------------------------------------
+
+@test('ndarray_of fields hold read-only copies of the given arrays')
+def _():
+    class MyRecord(Record):
+        samples = ndarray_of('float64')
+    samples = numpy.array([1.0, 2.0])
+    r = MyRecord(samples=samples)
+    samples[0] = 3.0
+    assert isinstance(r.samples, FrozenNDArray)
+    assert_eq(r.samples.tolist(), [1.0, 2.0])
+    with assert_raises(ValueError):
+        r.samples[0] = 3.0
+
+@test('ndarray_of fields accept any array-like whose dtype can be cast to theirs')
+def _():
+    class MyRecord(Record):
+        samples = ndarray_of('float64')
+    assert_eq(MyRecord(samples=[1, 2]).samples.dtype, numpy.dtype('float64'))
+    with assert_raises(FieldTypeError):
+        MyRecord(samples=['a', 'b'])
+    with assert_raises(FieldNotNullable):
+        MyRecord(samples=None)
+
+@test('ndarray_of fields are not copied again when passed from one record to another')
+def _():
+    class MyRecord(Record):
+        samples = ndarray_of('int64')
+    r = MyRecord(samples=[1, 2, 3])
+    assert_is(MyRecord(samples=r.samples).samples, r.samples)
+
+@test('ndarray_of fields can constrain the number of dimensions and the shape of the array')
+def _():
+    class MyRecord(Record):
+        vector = nullable(ndarray_of('float64', ndim=1))
+        points = nullable(ndarray_of('float64', shape=(None, 2)))
+    MyRecord(vector=[1.0, 2.0], points=[[1.0, 2.0], [3.0, 4.0]])
+    with assert_raises(FieldValueError, 'Expected an array with 1 dimensions, not 2'):
+        MyRecord(vector=[[1.0, 2.0]])
+    with assert_raises(FieldValueError, 'Expected an array of shape (None, 2), not (1, 3)'):
+        MyRecord(points=[[1.0, 2.0, 3.0]])
+
+@test('value checks on ndarray_of fields apply to all elements')
+def _():
+    class MyRecord(Record):
+        samples = nonnegative(ndarray_of('float64'))
+        evens = ndarray_of('int64', check=lambda arr: arr % 2 == 0)
+    MyRecord(samples=[0.0, 1.0], evens=[0, 2])
+    with assert_raises(FieldValueError):
+        MyRecord(samples=[0.0, -1.0], evens=[0, 2])
+    with assert_raises(FieldValueError):
+        MyRecord(samples=[0.0, 1.0], evens=[0, 1])
+
+@test('records with ndarray_of fields can be compared and hashed')
+def _():
+    class MyRecord(Record):
+        samples = ndarray_of('float64')
+    r1 = MyRecord(samples=[1.0, 2.0])
+    r2 = MyRecord(samples=numpy.array([1, 2]))
+    assert_eq(r1, r2)
+    assert_eq(hash(r1), hash(r2))
+    assert r1 != MyRecord(samples=[1.0, 3.0])
+    assert r1 != MyRecord(samples=[[1.0, 2.0]])
+
+@test('arrays holding -0.0 and 0.0 are equal and have the same hash')
+def _():
+    for dtype in ('float32', 'float64', 'complex128'):
+        class MyRecord(Record):
+            samples = ndarray_of(dtype)
+        r1 = MyRecord(samples=[-0.0, 1.0])
+        r2 = MyRecord(samples=[0.0, 1.0])
+        assert_eq(r1, r2)
+        assert_eq(hash(r1.samples), hash(r2.samples))
+        assert_eq(len({r1, r2}), 1)
+
+@test('ndarray_of fields can be serialized to and from PODS, and pickled')
+def _():
+    class MyRecord(Record):
+        samples = ndarray_of('float32', ndim=2)
+    r = MyRecord(samples=[[1.0, 2.0], [3.0, 4.0]])
+    pods = r.record_pods()
+    assert_eq(sorted(pods['samples']), ['data', 'dtype', 'shape'])
+    assert_eq(pods['samples']['shape'], [2, 2])
+    assert_eq(MyRecord.from_pods(pods), r)
+    assert_eq(pickle.loads(pickle.dumps(r)), r)
+
+#----------------------------------------------------------------------------------------------------------------------------------
@@ -8,10 +8,14 @@
 from __future__ import absolute_import, division, print_function, unicode_literals
 
 # standards
+import copy
+import gc
 import pickle
+from threading import Thread
+from weakref import ref
 
 # tdds
-from tdds import Record, dict_of, pair_of, seq_of, set_of
+from tdds import Record, dict_of, nullable, pair_of, seq_of, set_of
 from tdds.utils.compatibility import text_type
 
 # this module
@@ -70,3 +74,98 @@ for p in (0, 1, 2, -1):
         assert_eq(r2, r1)
 
 #----------------------------------------------------------------------------------------------------------------------------------
+# class registry
+
+@test('records of classes with the same name but different schemas unpickle to the right class')
+def _():
+    def define_class(field_type):
+        class SameName(Record):
+            value = field_type
+        return SameName
+    cls1 = define_class(int)
+    cls2 = define_class(nullable(text_type))
+    for r1 in (cls1(value=1), cls2(value='one'), cls1(value=2)):
+        r2 = pickle.loads(pickle.dumps(r1))
+        assert r2.__class__ is r1.__class__, (r2.__class__, r1.__class__)
+        assert_eq(r2, r1)
+
+@test('records of a class that has been shadowed by another with the same name are copied to their own class')
+def _():
+    class Shadowed(Record):
+        values = list
+    old = Shadowed(values=[1])
+    class Shadowed(Record):  # pylint: disable=function-redefined
+        items = list
+    for copied in (copy.deepcopy(old), copy.deepcopy(old)):
+        assert copied.__class__ is old.__class__
+        assert_eq(copied, old)
+
+@test('records of classes with the same name in different modules unpickle to the right class')
+def _():
+    class SameNameInModule(Record):
+        value = int
+    cls1 = SameNameInModule
+    class SameNameInModule(Record):  # pylint: disable=function-redefined
+        __module__ = 'some.other.module'
+        value = int
+    cls2 = SameNameInModule
+    for cls in (cls1, cls2):
+        assert pickle.loads(pickle.dumps(cls(value=1))).__class__ is cls
+
+@test('records pickled before classes were registered by module can still be unpickled')
+def _():
+    class LegacyRecord(Record):
+        id = int
+        tags = seq_of(text_type)
+    # pickle.dumps(LegacyRecord(id=1, tags=['a']), protocol=2), as produced before fingerprints were added
+    legacy_pickle = (
+        b'\x80\x02ctdds.unpickler\nRecordUnpickler\nq\x00)\x81q\x01}q\x02X\n\x00\x00\x00class_nameq\x03X\x0c\x00\x00\x00Legacy'
+        b'Recordq\x04sbK\x01h\x00)\x81q\x05}q\x06h\x03X\x06\x00\x00\x00StrSeqq\x07sbX\x01\x00\x00\x00aq\x08\x85q\t\x85q\nRq\x0b'
+        b'\x86q\x0cRq\r.'
+    )
+    assert_eq(pickle.loads(legacy_pickle), LegacyRecord(id=1, tags=['a']))
+
+@test('the class name is only stored once when pickling many records of the same class')
+def _():
+    class OftenPickled(Record):
+        id = int
+    data = pickle.dumps([OftenPickled(id=i) for i in range(100)], protocol=2)
+    assert_eq(data.count(b'OftenPickled'), 1)
+    assert_eq(pickle.loads(data), [OftenPickled(id=i) for i in range(100)])
+
+@test('record classes that are no longer referenced can be garbage-collected')
+def _():
+    def define_classes():
+        class Elem(Record):
+            id = int
+        class Holder(Record):
+            elems = seq_of(Elem)
+            elems_by_key = dict_of(text_type, seq_of(Elem))
+        Holder(elems=[Elem(id=1)], elems_by_key={'a': [Elem(id=2)]})
+        pickle.loads(pickle.dumps(Holder(elems=[], elems_by_key={})))
+        return ref(Elem), ref(Holder)
+    refs = define_classes()
+    gc.collect()
+    assert_eq([r() for r in refs], [None, None])
+
+@test('record classes can be created and unpickled concurrently from several threads')
+def _():
+    errors = []
+    def run(thread_id):
+        try:
+            for i in range(20):
+                # each thread has its own schema, since classes with the same name and schema are interchangeable
+                field_id = 'value_%d' % thread_id
+                cls = type(Record)(str('ThreadLocalRecord'), (Record,), {field_id: int, '__module__': __name__})
+                r = cls(**{field_id: i})
+                assert pickle.loads(pickle.dumps(r)).__class__ is cls
+        except Exception as ex:  # pylint: disable=broad-except
+            errors.append(ex)
+    threads = [Thread(target=run, args=(thread_id,)) for thread_id in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert_eq(errors, [])
+
+#----------------------------------------------------------------------------------------------------------------------------------
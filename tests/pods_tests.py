@@ -16,8 +16,10 @@ from decimal import Decimal
 from tdds import (
     CannotBeSerializedToPods,
     FieldNotNullable,
+    FieldTypeError,
     Marshaller,
     Record,
+    array_of,
     dict_of,
     nullable,
     pair_of,
@@ -25,6 +27,7 @@ from tdds import (
     set_of,
     temporary_marshaller_registration,
 )
+from tdds.utils.codegen import temporary_compilation_listener
 from tdds.utils.compatibility import bytes_type, integer_types, text_type
 
 # this module
@@ -351,3 +354,107 @@ def _():
             MyRecord(Point(1, 2)).record_pods()
 
 #----------------------------------------------------------------------------------------------------------------------------------
+# projections
+
+class ProjTrack(Record):
+    title = text_type
+    total_seconds = int
+
+class ProjAlbum(Record):
+    title = text_type
+    released = datetime
+    tracks = seq_of(ProjTrack)
+    tracks_by_side = dict_of(text_type, seq_of(ProjTrack))
+    best_track = nullable(ProjTrack)
+    samples = array_of('d')
+
+def make_proj_album(**kwargs):
+    tracks = [ProjTrack(title='Elevon', total_seconds=209), ProjTrack(title='Gear', total_seconds=514)]
+    return ProjAlbum(**dict(
+        dict(
+            title='Gyroscope',
+            released=datetime(2000, 3, 27),
+            tracks=tracks,
+            tracks_by_side={'A': tracks[:1], 'B': tracks[1:]},
+            samples=[0.5],
+        ),
+        **kwargs
+    ))
+
+@test('record_pods can serialize only some of the fields')
+def _():
+    album = make_proj_album()
+    assert_eq(album.record_pods(fields=['title', 'released']), {'title': 'Gyroscope', 'released': '2000-03-27T00:00:00'})
+    assert_eq(album.record_pods(fields={'title': True, 'samples': False}), {'title': 'Gyroscope'})
+
+@test('record_pods projections can select fields within nested records and collections')
+def _():
+    album = make_proj_album(best_track=ProjTrack(title='Gear', total_seconds=514))
+    assert_eq(
+        album.record_pods(fields={
+            'tracks': {'title': True},
+            'tracks_by_side': ['total_seconds'],
+            'best_track': {'title': True},
+        }),
+        {
+            'tracks': [{'title': 'Elevon'}, {'title': 'Gear'}],
+            'tracks_by_side': {'A': [{'total_seconds': 209}], 'B': [{'total_seconds': 514}]},
+            'best_track': {'title': 'Gear'},
+        },
+    )
+    assert_eq(make_proj_album().record_pods(fields={'best_track': ['title']}), {})
+
+@test('record_pods projections are compiled once per class and projection')
+def _():
+    album = make_proj_album()
+    album.record_pods(fields={'title': True, 'tracks': {'title': True}})
+    compiled = []
+    with temporary_compilation_listener(compiled.append):
+        album.record_pods(fields={'title': True, 'tracks': {'title': True}})
+        album.record_pods(fields=['tracks', 'title'])
+        album.record_pods(fields=('title', 'tracks'))
+    assert_eq([stats.name for stats in compiled], ['project'])
+
+@test('from_pods can decode only some of the fields, and returns them in a dict')
+def _():
+    album = make_proj_album()
+    pods = album.record_pods()
+    assert_eq(ProjAlbum.from_pods(pods, fields=['released', 'tracks']), {'released': album.released, 'tracks': album.tracks})
+    assert_eq(
+        ProjAlbum.from_pods(pods, fields={'title': True, 'tracks': ['title'], 'tracks_by_side': {'total_seconds': True}}),
+        {
+            'title': 'Gyroscope',
+            'tracks': [{'title': 'Elevon'}, {'title': 'Gear'}],
+            'tracks_by_side': {'A': [{'total_seconds': 209}], 'B': [{'total_seconds': 514}]},
+        },
+    )
+
+@test('from_pods checks the fields that it decodes, and only them')
+def _():
+    pods = make_proj_album().record_pods()
+    pods['tracks'][0]['total_seconds'] = 'long'
+    with assert_raises(FieldTypeError):
+        ProjAlbum.from_pods(pods, fields=['tracks'])
+    assert_eq(ProjAlbum.from_pods(pods, fields={'tracks': ['title']}), {'tracks': [{'title': 'Elevon'}, {'title': 'Gear'}]})
+    del pods['title']
+    with assert_raises(FieldNotNullable):
+        ProjAlbum.from_pods(pods, fields=['title'])
+
+@foreach((
+    {'nope': True},
+    {'title': ['length']},
+    {'tracks': ['nope']},
+    {'tracks_by_side': {'title': ['length']}},
+    {'samples': ['real']},
+))
+def _(fields):
+
+    @test('record_pods and from_pods reject the invalid projection {!r}'.format(fields))
+    def _():
+        album = make_proj_album()
+        with assert_raises(ValueError):
+            album.record_pods(fields=fields)
+        with assert_raises(ValueError):
+            ProjAlbum.from_pods(album.record_pods(), fields=fields)
+
+#----------------------------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# includes
+
+# 2+3 compat
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+# standards
+from os import path
+from shutil import rmtree
+import sys
+from tempfile import mkdtemp
+
+# tdds
+from tdds import Record, seq_of
+from tdds.profile_import import format_report, profile_import
+from tdds.utils.codegen import temporary_compilation_listener
+from tdds.utils.compatibility import text_type
+
+# this module
+from .plumbing import assert_eq, assert_matches, build_test_registry
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# init
+
+ALL_TESTS, test = build_test_registry()
+
+#----------------------------------------------------------------------------------------------------------------------------------
+
+@test('compilation listeners are called once per compiled class')
+def _():
+    all_stats = []
+    with temporary_compilation_listener(all_stats.append):
+        class MyElement(Record):
+            label = text_type
+        class MyRecord(Record):  # pylint: disable=unused-variable
+            elems = seq_of(MyElement)
+    assert_eq([stats.name for stats in all_stats], ['MyElement', 'MyElementSeq', 'MyRecord'])
+    for stats in all_stats:
+        assert stats.expand_seconds > 0
+        assert stats.compile_seconds > 0
+        assert stats.source_size > 0
+
+@test('compilation listeners are no longer called once unregistered')
+def _():
+    all_stats = []
+    with temporary_compilation_listener(all_stats.append):
+        pass
+    class MyRecord(Record):  # pylint: disable=unused-variable
+        label = text_type
+    assert_eq(all_stats, [])
+
+@test('profile_import reports on the classes compiled by importing a module')
+def _():
+    temp_dir = mkdtemp()
+    try:
+        with open(path.join(temp_dir, 'tdds_profile_import_test_mod.py'), 'w') as file_out:
+            file_out.write('from tdds import Record\nclass ProfiledRecord(Record):\n    id = int\n')
+        sys.path.insert(0, temp_dir)
+        all_stats = profile_import('tdds_profile_import_test_mod')
+    finally:
+        sys.path.remove(temp_dir)
+        rmtree(temp_dir)
+    assert_eq([stats.name for stats in all_stats], ['ProfiledRecord'])
+    assert_matches(r'\bProfiledRecord\n\n1 classes compiled in', format_report(all_stats))
+
+#----------------------------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# includes
+
+# 2+3 compat
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+# tdds
+from tdds import Record, RecordIndex, nullable, select
+from tdds.utils.codegen import temporary_compilation_listener
+from tdds.utils.compatibility import text_type
+
+# this module
+from .plumbing import assert_eq, assert_raises, build_test_registry, foreach
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# init
+
+ALL_TESTS, test = build_test_registry()
+
+class Label(Record):
+    name = text_type
+
+class Album(Record):
+    artist = text_type
+    title = text_type
+    year = int
+    rating = nullable(float)
+    label = nullable(Label)
+
+ISLAND = Label(name='Island')
+
+ALBUMS = (
+    Album(artist='Nick Drake', title='Five Leaves Left', year=1969, rating=4.5, label=ISLAND),
+    Album(artist='Nick Drake', title='Bryter Layter', year=1971, label=ISLAND),
+    Album(artist='Nick Drake', title='Pink Moon', year=1972, rating=5.0, label=ISLAND),
+    Album(artist='John Martyn', title='Solid Air', year=1973, rating=4.5, label=ISLAND),
+    Album(artist='John Martyn', title='Bless the Weather', year=1971),
+    Album(artist='Vashti Bunyan', title='Just Another Diamond Day', year=1970, rating=4.0, label=Label(name='Philips')),
+)
+
+# Queries run the same on a sequence and on an index, whether or not the index can be used for them
+SOURCES = (
+    ('a tuple', lambda: ALBUMS),
+    ('a generator', lambda: iter(ALBUMS)),
+    ('an index', lambda: RecordIndex(Album, ALBUMS, on=('artist', 'year', 'rating'))),
+)
+
+def titles(albums):
+    return [album.title for album in albums]
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# criteria
+
+@foreach(SOURCES)
+def _(source_name, source):
+
+    @foreach((
+        ({'artist': 'Nick Drake'}, ['Five Leaves Left', 'Bryter Layter', 'Pink Moon']),
+        ({'artist': 'Nick Drake', 'year': 1971}, ['Bryter Layter']),
+        ({'artist__ne': 'Nick Drake'}, ['Solid Air', 'Bless the Weather', 'Just Another Diamond Day']),
+        ({'year__gt': 1971}, ['Pink Moon', 'Solid Air']),
+        ({'year__gte': 1971, 'year__lt': 1973}, ['Bryter Layter', 'Pink Moon', 'Bless the Weather']),
+        ({'year__lte': 1970}, ['Five Leaves Left', 'Just Another Diamond Day']),
+        ({'rating__gte': 4.5}, ['Five Leaves Left', 'Pink Moon', 'Solid Air']),
+        ({'rating__lt': 4.5}, ['Just Another Diamond Day']),
+        ({'rating__isnull': True}, ['Bryter Layter', 'Bless the Weather']),
+        ({'rating__isnull': False, 'artist': 'John Martyn'}, ['Solid Air']),
+        ({'title__in': ['Pink Moon', 'Solid Air', 'Ghost']}, ['Pink Moon', 'Solid Air']),
+        ({'label__name': 'Philips'}, ['Just Another Diamond Day']),
+        ({'label__name__ne': 'Island'}, ['Bless the Weather', 'Just Another Diamond Day']),
+        ({'label__isnull': True}, ['Bless the Weather']),
+        ({'year': 2000}, []),
+    ))
+    def _(criteria, expected):
+
+        @test('where({}) selects the right records from {}'.format(
+            ', '.join('{}={!r}'.format(key, value) for key, value in sorted(criteria.items())),
+            source_name,
+        ))
+        def _():
+            # NB results are sorted here, since an index may return them in the order of the indexed field
+            results = select(Album).where(**criteria).execute(source())
+            assert_eq(sorted(titles(results)), sorted(expected))
+
+    @test('queries can be ordered by several fields, ascending or descending, on {}'.format(source_name))
+    def _():
+        query = select(Album, 'year', 'title').where(year__gte=1971).order_by('-year', 'title')
+        assert_eq(query.execute(source()), [
+            (1973, 'Solid Air'),
+            (1972, 'Pink Moon'),
+            (1971, 'Bless the Weather'),
+            (1971, 'Bryter Layter'),
+        ])
+
+    @test('None values sort last on {}'.format(source_name))
+    def _():
+        assert_eq(
+            select(Album, 'title').order_by('rating', 'title').execute(source()),
+            [
+                ('Just Another Diamond Day',),
+                ('Five Leaves Left',),
+                ('Solid Air',),
+                ('Pink Moon',),
+                ('Bless the Weather',),
+                ('Bryter Layter',),
+            ],
+        )
+
+    @test('limit returns the first results, on {}'.format(source_name))
+    def _():
+        assert_eq(select(Album, 'title').where(year__gt=1970).order_by('year').limit(2).execute(source()), [
+            ('Bryter Layter',),
+            ('Bless the Weather',),
+        ])
+        assert_eq(len(select(Album).limit(2).execute(source())), 2)
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# fields
+
+@test('selecting fields returns tuples of their values')
+def _():
+    assert_eq(
+        select(Album, 'title', 'label__name').where(artist='John Martyn').execute(ALBUMS),
+        [('Solid Air', 'Island'), ('Bless the Weather', None)],
+    )
+
+@foreach((
+    ('a field that does not exist', lambda: select(Album, 'label_name')),
+    ('a criterion on a field that does not exist', lambda: select(Album).where(released=1971)),
+    ('a criterion with an unknown operator', lambda: select(Album).where(year__after=1971)),
+    ('a path through a field that is not a record', lambda: select(Album).where(title__name='x')),
+    ('ordering by a field that does not exist', lambda: select(Album).order_by('-released')),
+))
+def _(description, make_query):
+
+    @test('{} raises ValueError'.format(description))
+    def _():
+        with assert_raises(ValueError):
+            make_query()
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# compilation
+
+@test('queries are compiled once, and then reused')
+def _():
+    query = select(Album, 'title', 'year').where(year__gt=1970, artist='Nick Drake')
+    compiled = []
+    with temporary_compilation_listener(compiled.append):
+        query.execute(ALBUMS)
+        query.execute(ALBUMS)
+    assert_eq([stats.name for stats in compiled], ['results'])
+
+@test('queries that only differ in their operands share their compiled functions')
+def _():
+    compiled = []
+    with temporary_compilation_listener(compiled.append):
+        results = [
+            select(Album, 'title', 'rating').where(year__lt=year, artist=artist, label__isnull=False).execute(ALBUMS)
+            for year, artist in ((1972, 'Nick Drake'), (1974, 'John Martyn'), (1971, 'Vashti Bunyan'))
+        ]
+        select(Album, 'title', 'rating').where(year__lt=1972, artist='Nick Drake', label__isnull=True).execute(ALBUMS)
+    assert_eq(results, [
+        [('Five Leaves Left', 4.5), ('Bryter Layter', None)],
+        [('Solid Air', 4.5)],
+        [('Just Another Diamond Day', 4.0)],
+    ])
+    assert_eq([stats.name for stats in compiled], ['results', 'results'])
+
+@test('queries are immutable')
+def _():
+    query = select(Album).where(artist='Nick Drake')
+    query.where(year=1972).order_by('title').limit(1)
+    assert_eq(len(query.execute(ALBUMS)), 3)
+
+#----------------------------------------------------------------------------------------------------------------------------------
@@ -73,6 +73,17 @@ def _():
     r2 = MyRecord([r1])
     assert_is(r2.children[0], r1)  # you're confused, pylint: disable=unsubscriptable-object
 
+@test('sequences of RecursiveType are not shared between record classes')
+def _():
+    class Record1(Record):
+        children = seq_of(RecursiveType)
+    class Record2(Record):
+        children = seq_of(RecursiveType)
+    Record1([Record1([])])
+    Record2([Record2([])])
+    with assert_raises(FieldTypeError):
+        Record1([Record2([])])
+
 @test("RecursiveType doesn't allow sequence elems with other types")
 def _():
     class MyRecord(Record):
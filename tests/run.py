@@ -10,39 +10,70 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 # standards
 from collections import Counter
 import re
-from sys import argv, exit
+from sys import argv, exit, version_info
 
 # this module
 from . import (
+    builder_tests,
     check_tests,
     cleaner_tests,
     coercion_tests,
     collection_tests,
     core_tests,
+    diffing_tests,
+    indexing_tests,
+    instrumentation_tests,
+    interning_tests,
+    lazy_tests,
     marshaller_tests,
+    memory_tests,
+    migration_tests,
+    ndarray_tests,
     pickle_tests,
     pods_tests,
+    profile_import_tests,
+    querying_tests,
     readme_tests,
     recursive_types_tests,
     shortcut_tests,
     subclassing_tests,
+    validation_tests,
 )
 
 #----------------------------------------------------------------------------------------------------------------------------------
 
-ALL_TEST_MODS = (
+# tdds.aio requires Python 3.6 or later, and its tests wouldn't even compile before that
+if version_info >= (3, 6):
+    from . import aio_tests  # pylint: disable=ungrouped-imports
+    ASYNC_TEST_MODS = (aio_tests,)
+else:
+    ASYNC_TEST_MODS = ()
+
+ALL_TEST_MODS = ASYNC_TEST_MODS + (
+    builder_tests,
     check_tests,
     cleaner_tests,
     coercion_tests,
     collection_tests,
     core_tests,
+    diffing_tests,
+    indexing_tests,
+    instrumentation_tests,
+    interning_tests,
+    lazy_tests,
     marshaller_tests,
+    memory_tests,
+    migration_tests,
+    ndarray_tests,
     pickle_tests,
     pods_tests,
+    profile_import_tests,
+    querying_tests,
     readme_tests,
     recursive_types_tests,
     shortcut_tests,
     subclassing_tests,
+    validation_tests,
 )
 
 def iter_all_tests(selected_mod_name):
@@ -14,7 +14,11 @@ from functools import total_ordering
 from tdds import (
     FieldValueError,
     Record,
+    absolute_http_url,
     dict_of,
+    digits_str,
+    lowercase_hex,
+    lowercase_letters,
     one_of,
     nonempty,
     nonnegative,
@@ -126,6 +130,56 @@ def _():
     with assert_raises(FieldValueError):
         MyRecord(s='a')
 
+@foreach((
+    (uppercase_letters, 'ABC', ('AbC', 'AB1', 'AB\u00c9', 'AB ')),
+    (lowercase_letters, 'abc', ('aBc', 'ab1', 'ab\u00e9', 'ab_')),
+    (digits_str, '012', ('01a', '01\u0663', '01\u00b2', '-01')),
+    (uppercase_wchars, 'A1_', ('a1_', 'A1-', 'A1\u00c9')),
+    (lowercase_hex, '0af', ('0aF', '0ag', '0a ')),
+))
+def _(field_def, valid, invalid_values):
+
+    @test('{}(3) accepts {!r}'.format(field_def.__name__, valid))
+    def _():
+        class MyRecord(Record):
+            s = field_def(3)
+        assert_eq(MyRecord(s=valid).s, valid)
+
+    @test('{}() accepts {!r} and the empty string'.format(field_def.__name__, valid))
+    def _():
+        class MyRecord(Record):
+            s = field_def()
+        assert_eq(MyRecord(s=valid * 3).s, valid * 3)
+        assert_eq(MyRecord(s='').s, '')
+
+    for invalid in invalid_values + (valid + '\n',):
+
+        @test('{}() rejects {!r}'.format(field_def.__name__, invalid), invalid)
+        def _(invalid):
+            class MyRecord(Record):
+                s3 = nullable(field_def(3))
+                s = nullable(field_def())
+            with assert_raises(FieldValueError):
+                MyRecord(s3=invalid)
+            with assert_raises(FieldValueError):
+                MyRecord(s=invalid)
+
+@test('string fields declared identically share the same check')
+def _():
+    assert uppercase_letters(3).check is uppercase_letters(3).check
+    assert uppercase_wchars().check is uppercase_wchars().check
+    assert uppercase_letters(3).check is not uppercase_letters(4).check
+
+@test('absolute_http_url accepts http and https URLs')
+def _():
+    class MyRecord(Record):
+        url = absolute_http_url
+    for url in (b'http://example.com/', b'https://example.com/a?b=c'):
+        assert_eq(MyRecord(url=url).url, url)
+    for url in (b'ftp://example.com/', b'http://', b'http://example.com/\n', b'/relative'):
+        with assert_raises(FieldValueError):
+            MyRecord(url=url)
+
 #----------------------------------------------------------------------------------------------------------------------------------
 # one_of
 
@@ -0,0 +1,215 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# includes
+
+# 2+3 compat
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+# standards
+import pickle
+
+# tdds
+from tdds import (
+    Field,
+    FieldError,
+    FieldNotNullable,
+    FieldTypeError,
+    FieldValueError,
+    Record,
+    dict_of,
+    nonempty,
+    nonnegative,
+    nullable,
+    seq_of,
+)
+from tdds.utils.compatibility import text_type
+
+# this module
+from .plumbing import assert_eq, assert_raises, build_test_registry
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# init
+
+ALL_TESTS, test = build_test_registry()
+
+class Track(Record):
+    title = nonempty(text_type)
+    seconds = nonnegative(int)
+
+class Album(Record):
+    title = text_type
+    year = Field(int, check=lambda year: 1900 < year < 2100)
+    tracks = seq_of(Track)
+    ratings = dict_of(text_type, nonnegative(int))
+    bonus = nullable(Track)
+
+VALID = {
+    'title': 'Pink Moon',
+    'year': 1972,
+    'tracks': [Track(title='Pink Moon', seconds=124)],
+    'ratings': {'NME': 5},
+}
+
+def summary(errors):
+    return [(error.path, type(error).__name__, str(error)) for error in errors]
+
+#----------------------------------------------------------------------------------------------------------------------------------
+
+@test('record_validate returns an empty list for valid values, including dicts for nested records')
+def _():
+    assert_eq(Album.record_validate(**VALID), [])
+    assert_eq(Album.record_validate(**dict(VALID, bonus={'title': 'Plan', 'seconds': 1})), [])
+
+@test('record_validate returns all the errors, with their paths, rather than just the first one')
+def _():
+    errors = Album.record_validate(
+        title=1972,
+        year=1872,
+        tracks=[Track(title='Place to Be', seconds=163), {'title': '', 'seconds': -1}, 'Road'],
+        ratings={'NME': -1, 'Q': 4},
+        bonus={'title': 'Plan'},
+    )
+    assert_eq(summary(errors), [
+        (('bonus', 'seconds'), 'FieldNotNullable', 'Track.seconds cannot be None'),
+        (('ratings', 'NME'), 'FieldValueError', '<value>: -1 is not a valid value'),
+        (('title',), 'FieldTypeError', 'Album.title should be of type %s, not int (1972)' % text_type.__name__),
+        (('tracks', 1, 'seconds'), 'FieldValueError', 'Track.seconds: -1 is not a valid value'),
+        (('tracks', 1, 'title'), 'FieldValueError', "Track.title: '' is not a valid value"),
+        (('tracks', 2), 'FieldTypeError', "[elem] should be of type Track, not %s ('Road')" % type('').__name__),
+        (('year',), 'FieldValueError', 'Album.year: 1872 is not a valid value'),
+    ])
+
+@test('record_validate reports missing fields as FieldNotNullable')
+def _():
+    errors = Album.record_validate(year=1972)
+    assert_eq([error.path for error in errors], [('ratings',), ('title',), ('tracks',)])
+    assert_eq({type(error) for error in errors}, {FieldNotNullable})
+
+@test('record_validate finds the same error as the constructor')
+def _():
+    for values, error_class in (
+            (dict(VALID, title=1972), FieldTypeError),
+            (dict(VALID, year=1872), FieldValueError),
+            (dict(VALID, title=None), FieldNotNullable),
+            ):
+        try:
+            Album(**values)
+        except error_class as error:
+            assert_eq([str(found) for found in Album.record_validate(**values)], [str(error)])
+        else:
+            raise AssertionError('Expected %s' % error_class.__name__)
+
+@test('record_validate raises TypeError for unknown fields')
+def _():
+    with assert_raises(TypeError):
+        Album.record_validate(artist='Nick Drake', **VALID)
+
+@test('record_validate reports unknown fields in dicts given for nested records')
+def _():
+    errors = Album.record_validate(**dict(VALID, bonus={'titel': 'Plan', 'seconds': 1}))
+    assert_eq(summary(errors), [
+        (('bonus', 'titel'), 'FieldError', "Track has no field 'titel'"),
+        (('bonus', 'title'), 'FieldNotNullable', 'Track.title cannot be None'),
+    ])
+
+@test('record_validate covers fields inherited from a superclass')
+def _():
+    class Deluxe(Album, Record):
+        discs = nonnegative(int)
+    assert_eq(Deluxe.record_validate(discs=2, **VALID), [])
+    assert_eq(summary(Deluxe.record_validate(**dict(VALID, year=1872, discs=-2))), [
+        (('discs',), 'FieldValueError', 'Deluxe.discs: -2 is not a valid value'),
+        (('year',), 'FieldValueError', 'Deluxe.year: 1872 is not a valid value'),
+    ])
+
+@test('record_validate works with fields named like the names it uses itself')
+def _():
+    class Clashing(Record):
+        cls = text_type
+        error = nullable(text_type)
+        checked_cls = int
+    assert_eq(Clashing.record_validate(cls='a', error='b', checked_cls=1), [])
+    assert_eq(summary(Clashing.record_validate(cls='a', error=1, checked_cls=1)), [
+        (('error',), 'FieldTypeError', 'Clashing.error should be of type %s, not int (1)' % text_type.__name__),
+    ])
+    assert_eq(Clashing(cls='a', error='b', checked_cls=1).error, 'b')
+
+@test('record_validate can be overridden')
+def _():
+    class Overridden(Record):
+        title = text_type
+        @classmethod
+        def record_validate(cls, **values):
+            return ['overridden']
+    assert_eq(Overridden.record_validate(title=1), ['overridden'])
+
+@test('errors raised by the constructor have an empty path')
+def _():
+    try:
+        Track(title='', seconds=1)
+    except FieldValueError as error:
+        assert_eq(error.path, ())
+    else:
+        raise AssertionError('Expected FieldValueError')
+
+#----------------------------------------------------------------------------------------------------------------------------------
+# error details
+
+@test('errors raised by the constructor carry the description of the field, the invalid value and the expected type')
+def _():
+    errors = Album.record_validate(**dict(VALID, title=1972, year=1872, ratings=None))
+    assert_eq(
+        [(error.description, error.value, error.expected_type) for error in errors],
+        [('Album.ratings', None, None), ('Album.title', 1972, text_type), ('Album.year', 1872, None)],
+    )
+
+@test('error messages are only formatted when asked for')
+def _():
+    formatted = []
+    class Loud(object):
+        def __repr__(self):
+            formatted.append(self)
+            return 'Loud()'
+    class Quiet(Record):
+        value = int
+    try:
+        Quiet(value=Loud())
+    except FieldTypeError as error:
+        assert_eq(formatted, [])
+        assert_eq(str(error), 'Quiet.value should be of type int, not Loud (Loud())')
+        assert_eq(repr(error), "FieldTypeError('Quiet.value should be of type int, not Loud (Loud())')")
+    else:
+        raise AssertionError('Expected FieldTypeError')
+
+@test('large values are shortened in error messages')
+def _():
+    class Small(Record):
+        value = int
+    with assert_raises(FieldTypeError, 'Small.value should be of type int, not list ([0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, '
+                                       '13, 14, 15, 16, 17, 18, 19, ...])'):
+        Small(value=list(range(10000)))
+
+@test('FieldErrors can still be raised with a message')
+def _():
+    error = FieldValueError('Expected an array of 3 dimensions')
+    assert_eq(str(error), 'Expected an array of 3 dimensions')
+    assert_eq(error.description, None)
+
+@test('FieldErrors can be built from the details of the invalid value')
+def _():
+    assert_eq(str(FieldError.for_value('Album.year', 1872)), 'Album.year: 1872')
+    assert_eq(str(FieldValueError.for_value('Album.year', 1872)), 'Album.year: 1872 is not a valid value')
+    assert_eq(str(FieldNotNullable.for_value('Album.year', None)), 'Album.year cannot be None')
+    assert_eq(str(FieldTypeError.for_value('Album.year', 1872.5, int)), 'Album.year should be of type int, not float (1872.5)')
+    assert_eq(FieldValueError.for_value('Album.year', 1872).args, ())
+
+@test('errors raised by the constructor can be pickled')
+def _():
+    errors = Album.record_validate(**dict(VALID, year=1872))
+    error = pickle.loads(pickle.dumps(errors[0]))
+    assert_eq((type(error), error.description, error.value), (FieldValueError, 'Album.year', 1872))
+    assert_eq(str(error), 'Album.year: 1872 is not a valid value')
+
+#----------------------------------------------------------------------------------------------------------------------------------